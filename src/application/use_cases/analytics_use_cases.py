@@ -1,25 +1,51 @@
-from typing import List, Dict
-from datetime import datetime, timedelta
-from collections import defaultdict, Counter
+from typing import List, Dict, Optional, Tuple
+from datetime import date, datetime, timedelta
+from collections import Counter
 from ...infrastructure.repositories.workout_session_repository import (
     WorkoutSessionRepository,
 )
-from ...infrastructure.repositories.water_intake_repository import WaterIntakeRepository
+from ...infrastructure.repositories.daily_activity_repository import DailyActivityRepository
 from ...infrastructure.repositories.user_repository import UserRepository
 from ...domain.entities.workout_session import StrengthSet
+from ...domain.entities.user import UserEntity
 from ...infrastructure.repositories.weight_history_repository import WeightHistoryRepository
+from ...infrastructure.repositories.calendar_snapshot_repository import CalendarSnapshotRepository
+from ...infrastructure.repositories.personal_record_repository import PersonalRecordRepository
+from ...infrastructure.repositories.activity_year_repository import ActivityYearRepository
+from ...infrastructure.repositories.exercise_repository import ExerciseRepository
+from ...infrastructure.repositories.muscle_volume_repository import MuscleVolumeRepository
+from ...infrastructure.repositories.water_intake_repository import WaterIntakeRepository
+from ...domain.entities.activity_year import ActivityYearEntity, MAX_LEVEL, compute_streaks
+from ...domain.entities.personal_record import PersonalRecordEntity, RECORD_KINDS
+from ...domain.entities.daily_activity import ACTIVITY_METRICS
+from ...core.timezones import day_bucket, local_today, local_midnight_utc, week_start
+from ...core.downsampling import lttb_indices
 
+# Metrics compared between periods, all read from the daily buckets
+COMPARISON_METRICS = ACTIVITY_METRICS + ("water_ml",)
+COMPARISON_PERIODS = ("week", "month")
 
 
 class AnalyticsUseCases:
-    def __init__(self, session_repository: WorkoutSessionRepository, water_intake_repository: WaterIntakeRepository, user_repository: UserRepository, weight_history_repository: WeightHistoryRepository):
+    def __init__(self, session_repository: WorkoutSessionRepository, activity_repository: DailyActivityRepository, user_repository: UserRepository, weight_history_repository: WeightHistoryRepository, snapshot_repository: CalendarSnapshotRepository, record_repository: PersonalRecordRepository, activity_year_repository: ActivityYearRepository, exercise_repository: ExerciseRepository, muscle_volume_repository: MuscleVolumeRepository, water_intake_repository: WaterIntakeRepository):
         self.session_repository = session_repository
-        self.water_intake_repository = water_intake_repository
+        self.activity_repository = activity_repository
         self.user_repository = user_repository
         self.weight_history_repository = weight_history_repository
+        self.snapshot_repository = snapshot_repository
+        self.record_repository = record_repository
+        self.activity_year_repository = activity_year_repository
+        self.exercise_repository = exercise_repository
+        self.muscle_volume_repository = muscle_volume_repository
+        self.water_intake_repository = water_intake_repository
 
-    async def get_workout_stats(self, user_id: str, days: int = 30) -> Dict:
+    async def _timezone(self, user_id: str, timezone: Optional[str] = None) -> str:
+        """The given timezone, or the user's own when not known yet"""
+        return timezone or await self.user_repository.find_timezone(user_id)
+
+    async def get_workout_stats(self, user_id: str, days: int = 30, timezone: Optional[str] = None) -> Dict:
         """Get workout statistics for the last N days"""
+        timezone = await self._timezone(user_id, timezone)
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
 
@@ -52,24 +78,154 @@ class AnalyticsUseCases:
             "count": most_frequent_exercise[0][1]
         } if most_frequent_exercise else None
 
-        # Workouts by day
-        workouts_by_day = defaultdict(int)
-        for session in completed_sessions:
-            day = session.start_time.date().isoformat()
-            workouts_by_day[day] += 1
+        # Workouts by the user's local day, bucketed by the database
+        workouts_by_day = await self.session_repository.count_completed_by_local_day(
+            user_id, start_date, end_date, timezone
+        )
+        streaks = await self.get_streaks(user_id, timezone)
 
         return {
             "total_workouts": total_workouts,
             "total_duration_minutes": total_duration,
             "average_duration_minutes": round(avg_duration, 1),
-            "workouts_by_day": dict(workouts_by_day),
+            "workouts_by_day": workouts_by_day,
             "total_volume": round(total_volume),
             "weekly_frequency": round((total_workouts / days) * 7, 1) if days > 0 else 0,
             "most_frequent_exercise": most_frequent_exercise_data,
+            **streaks,
+        }
+
+    async def get_heatmap(self, user_id: str, year: int) -> Dict:
+        """Activity level of every day of a year, one digit per day"""
+        activity_year = await self.activity_year_repository.find_one(user_id, year)
+        if not activity_year:
+            activity_year = ActivityYearEntity(user_id=user_id, year=year)
+        return {"year": year, "max_level": MAX_LEVEL, "levels": activity_year.level_string()}
+
+    async def get_streaks(self, user_id: str, timezone: Optional[str] = None) -> Dict[str, int]:
+        """Current and longest day and week streaks, from the yearly day bitmaps"""
+        timezone = await self._timezone(user_id, timezone)
+        years = await self.activity_year_repository.find_by_user(user_id)
+        active = {day for year in years for day in year.active_days()}
+        return compute_streaks(active, local_today(timezone))
+
+    async def get_muscle_volume(self, user_id: str, weeks: int = 8, timezone: Optional[str] = None) -> List[Dict]:
+        """Strength volume of the last N local weeks by muscle group and category"""
+        timezone = await self._timezone(user_id, timezone)
+        current_week = week_start(datetime.combine(local_today(timezone), datetime.min.time()))
+        week_starts = [current_week - timedelta(weeks=i) for i in range(weeks - 1, -1, -1)]
+
+        # Past weeks are served from rollups; the current one is always computed
+        generation = await self.muscle_volume_repository.generation(user_id)
+        catalog_version = await self.exercise_repository.catalog_version()
+        stored, versions = await self.muscle_volume_repository.find_weeks(
+            user_id, week_starts[:-1], generation, catalog_version
+        )
+        missing = [w for w in week_starts if w not in stored]
+        sessions = await self.session_repository.find_by_user_and_date_range(
+            user_id, local_midnight_utc(missing[0].date(), timezone), datetime.utcnow()
+        )
+        catalog = await self.exercise_repository.get_catalog(catalog_version)
+
+        computed = {w: {"by_muscle_group": Counter(), "by_category": Counter()} for w in missing}
+        for session in sessions:
+            week = computed.get(week_start(day_bucket(session.start_time, timezone)))
+            if week is None or not session.is_completed:
+                continue
+            for exercise_log in session.exercises:
+                exercise = catalog.get(exercise_log.exercise_id)
+                if not exercise or exercise_log.type != "strength":
+                    continue
+                volume = sum(s.weight * s.reps for s in exercise_log.sets if isinstance(s, StrengthSet))
+                # A compound lift counts in full for every muscle group it trains
+                for muscle_group in exercise["muscle_groups"]:
+                    week["by_muscle_group"][muscle_group] += volume
+                if exercise["category"]:
+                    week["by_category"][exercise["category"]] += volume
+
+        computed = {
+            w: {key: {name: round(v, 1) for name, v in totals.items()} for key, totals in data.items()}
+            for w, data in computed.items()
+        }
+        await self.muscle_volume_repository.save_many(
+            user_id,
+            {w: data for w, data in computed.items() if w != current_week},
+            versions,
+            generation,
+            catalog_version,
+        )
+
+        return [
+            {"week_start": w.date().isoformat(), **(stored.get(w) or computed[w])}
+            for w in week_starts
+        ]
+
+    async def compare_periods(
+        self, user_id: str, period: str = "week", count: int = 2, to_date: bool = False,
+        timezone: Optional[str] = None,
+    ) -> Dict:
+        """Totals of the current and previous weeks or months, newest first"""
+        if period not in COMPARISON_PERIODS:
+            raise ValueError("Period must be week or month")
+        timezone = await self._timezone(user_id, timezone)
+        today = local_today(timezone)
+        ranges = self._period_ranges(today, period, count)
+        if to_date:
+            # Cut every period at the same offset the current one has reached
+            elapsed = today - ranges[0][0]
+            ranges = [(start, min(end, start + elapsed)) for start, end in ranges]
+
+        # One read of at most one bucket per day covers every period
+        buckets = await self.activity_repository.find_by_user_and_date_range(
+            user_id,
+            datetime.combine(ranges[-1][0], datetime.min.time()),
+            datetime.combine(ranges[0][1], datetime.min.time()),
+        )
+        periods = []
+        for start, end in ranges:
+            totals = Counter()
+            for bucket in buckets:
+                if start <= bucket.day.date() <= end:
+                    for metric in COMPARISON_METRICS:
+                        totals[metric] += getattr(bucket, metric)
+            periods.append({
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                **{metric: round(totals[metric], 1) for metric in COMPARISON_METRICS},
+            })
+
+        current, previous = periods[0], periods[1]
+        return {
+            "period": period,
+            "to_date": to_date,
+            "periods": periods,
+            "change_percent": {
+                metric: round((current[metric] - previous[metric]) / previous[metric] * 100, 1)
+                if previous[metric] else None
+                for metric in COMPARISON_METRICS
+            },
         }
 
+    @staticmethod
+    def _period_ranges(today: date, period: str, count: int) -> List[Tuple[date, date]]:
+        """First and last day of the period containing today and of the count - 1 before it"""
+        if period == "week":
+            start = today - timedelta(days=today.weekday())
+            return [
+                (start - timedelta(weeks=i), start - timedelta(weeks=i) + timedelta(days=6))
+                for i in range(count)
+            ]
+
+        ranges = []
+        start = today.replace(day=1)
+        for _ in range(count):
+            next_start = (start + timedelta(days=32)).replace(day=1)
+            ranges.append((start, next_start - timedelta(days=1)))
+            start = (start - timedelta(days=1)).replace(day=1)
+        return ranges
+
     async def get_exercise_progression(
-        self, user_id: str, exercise_id: str, days: int = 90
+        self, user_id: str, exercise_id: str, days: int = 90, max_points: Optional[int] = None
     ) -> List[Dict]:
         """Get progression data for a specific exercise"""
         end_date = datetime.utcnow()
@@ -98,58 +254,90 @@ class AnalyticsUseCases:
                                 }
                             )
 
-        return progression_data
+        # One row per set adds up fast over long ranges
+        return self._downsample(progression_data, max_points, "weight")
 
     async def get_calendar_data(
-        self, user_id: str, year: int, month: int
+        self, user_id: str, year: int, month: int, timezone: Optional[str] = None
     ) -> Dict[str, List[Dict]]:
-        """Get workout sessions grouped by date for calendar view"""
-        # Get first and last day of the month
-        start_date = datetime(year, month, 1)
+        """Get workout sessions grouped by local date for calendar view"""
+        timezone = await self._timezone(user_id, timezone)
+        # Fully past months only change when one of their sessions does
+        is_past_month = self.snapshot_repository.is_past_month(year, month, local_today(timezone))
+        if is_past_month:
+            cached = await self.snapshot_repository.find("user", user_id, year, month)
+            if cached is not None:
+                return cached
+            generation = await self.snapshot_repository.generation("user", user_id)
+
+        # Local month boundaries, as UTC instants
+        start_date = local_midnight_utc(date(year, month, 1), timezone)
         if month == 12:
-            end_date = datetime(year + 1, 1, 1) - timedelta(days=1)
+            end_date = local_midnight_utc(date(year + 1, 1, 1), timezone)
         else:
-            end_date = datetime(year, month + 1, 1) - timedelta(days=1)
-        
-        end_date = end_date.replace(hour=23, minute=59, second=59)
+            end_date = local_midnight_utc(date(year, month + 1, 1), timezone)
 
-
-        sessions = await self.session_repository.find_by_user_and_date_range(
-            user_id, start_date, end_date
+        sessions_by_day = await self.session_repository.find_completed_by_local_day(
+            [user_id], start_date, end_date, timezone
         )
+        result = {
+            day: [
+                {
+                    "id": s["id"],
+                    "package_name": s["package_name"],
+                    "duration_minutes": s.get("duration_minutes"),
+                    "start_time": s["start_time"].isoformat(),
+                }
+                for s in sessions
+            ]
+            for day, sessions in sessions_by_day.items()
+        }
+        if is_past_month:
+            await self.snapshot_repository.save("user", user_id, year, month, result, generation)
+        return result
 
-        # Group by date
-        calendar_data = defaultdict(list)
-        for session in sessions:
-            if session.is_completed:
-                day = session.start_time.date().isoformat()
-                calendar_data[day].append(
-                    {
-                        "id": str(session.id),
-                        "package_name": session.package_name,
-                        "duration_minutes": session.duration_minutes,
-                        "start_time": session.start_time.isoformat(),
-                    }
-                )
-
-        return dict(calendar_data)
-
-    async def get_water_consumption_stats(self, user_id: str, days: int) -> Dict:
+    async def get_water_consumption_stats(self, user_id: str, days: int, timezone: Optional[str] = None) -> Dict:
         """Get daily water consumption for the last N days"""
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        intakes = await self.water_intake_repository.find_by_user_and_date_range(user_id, start_date, end_date)
-        
-        consumption_by_day = defaultdict(int)
-        for intake in intakes:
-            day = intake.created_at.date().isoformat()
-            consumption_by_day[day] += intake.amount_ml
-            
-        return dict(consumption_by_day)
+        timezone = await self._timezone(user_id, timezone)
+        # Reads the pre-aggregated daily counters: at most one document per local day
+        end_day = datetime.combine(local_today(timezone), datetime.min.time())
+        start_day = end_day - timedelta(days=days)
+        buckets = await self.activity_repository.find_by_user_and_date_range(user_id, start_day, end_day)
+        totals = await self._buffered_water(user_id, start_day, timezone)
+        for bucket in buckets:
+            totals[bucket.day] += bucket.water_ml
+        return {
+            day.date().isoformat(): water_ml
+            for day, water_ml in sorted(totals.items())
+            if water_ml
+        }
+
+    async def _buffered_water(self, user_id: str, start_day: datetime, timezone: Optional[str]) -> Counter:
+        """Water logged but still buffered, per daily bucket from start_day on"""
+        # Buffered entries are only counted once flushed, so nothing is added twice
+        since = local_midnight_utc(start_day.date(), timezone)
+        totals = Counter()
+        for intake in await self.water_intake_repository.find_buffered(user_id, since):
+            totals[day_bucket(intake.created_at, timezone)] += intake.amount_ml
+        return totals
 
     async def calculate_daily_water_recommendation(self, user_id: str) -> Dict:
-        """Calculate daily water recommendation based on user's weight"""
+        """Calculate daily water recommendation and today's progress towards it"""
         user = await self.user_repository.find_by_id(user_id)
+        recommendation = self.water_recommendation_for(user)
+        timezone = user.timezone if user else None
+        today = datetime.combine(local_today(timezone), datetime.min.time())
+        buckets = await self.activity_repository.find_by_user_and_date_range(user_id, today, today)
+        buffered = await self._buffered_water(user_id, today, timezone)
+        consumed = (buckets[0].water_ml if buckets else 0) + buffered[today]
+        return {
+            **recommendation,
+            "consumed_ml": consumed,
+            "progress": round(consumed / recommendation["recommendation_ml"], 2) if recommendation["recommendation_ml"] else 0,
+        }
+
+    def water_recommendation_for(self, user: Optional[UserEntity]) -> Dict:
+        """Water recommendation for an already loaded user"""
         if not user or not user.weight or user.weight <= 0:
             # Default recommendation if no weight is available
             return {"recommendation_ml": 2000}
@@ -158,10 +346,40 @@ class AnalyticsUseCases:
         recommendation = user.weight * 35
         return {"recommendation_ml": round(recommendation)}
     
-    async def get_weight_progression(self, user_id: str, days: int) -> List[Dict]:
+    async def get_weight_progression(self, user_id: str, days: int, max_points: Optional[int] = None) -> List[Dict]:
         """Get daily weight entries for the last N days"""
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         entries = await self.weight_history_repository.find_by_user_and_date_range(user_id, start_date, end_date)
         
-        return [{"date": entry.created_at.isoformat(), "weight": entry.weight} for entry in entries]
\ No newline at end of file
+        points = [{"date": entry.created_at.isoformat(), "weight": entry.weight} for entry in entries]
+        return self._downsample(points, max_points, "weight")
+
+    async def get_personal_records(self, user_id: str) -> List[Dict]:
+        """Best sets of every exercise the user has completed"""
+        records = await self.record_repository.find_by_user(user_id)
+        return [self._format_record(r) for r in records]
+
+    async def get_exercise_records(self, user_id: str, exercise_id: str) -> Optional[Dict]:
+        """Best sets of one exercise, or None if it was never completed"""
+        record = await self.record_repository.find_one(user_id, exercise_id)
+        return self._format_record(record) if record else None
+
+    @staticmethod
+    def _format_record(record: PersonalRecordEntity) -> Dict:
+        formatted = {"exercise_id": record.exercise_id, "exercise_name": record.exercise_name}
+        for kind in RECORD_KINDS:
+            best = getattr(record, kind)
+            formatted[kind] = {**best.model_dump(), "date": best.date.isoformat()} if best else None
+        return formatted
+
+    @staticmethod
+    def _downsample(points: List[Dict], max_points: Optional[int], value_key: str) -> List[Dict]:
+        """Keep at most max_points of a chart series (LTTB), in their original order"""
+        if not max_points or len(points) <= max_points:
+            return points
+        order = sorted(range(len(points)), key=lambda i: points[i]["date"])
+        xs = [datetime.fromisoformat(points[i]["date"]).timestamp() for i in order]
+        ys = [points[i][value_key] for i in order]
+        kept = {order[i] for i in lttb_indices(xs, ys, max_points)}
+        return [point for i, point in enumerate(points) if i in kept]
\ No newline at end of file
@@ -2,13 +2,25 @@ from typing import Optional
 from datetime import datetime, timedelta, date
 from ...domain.entities.user import UserEntity
 from ...infrastructure.repositories.user_repository import UserRepository
+from ...infrastructure.repositories.group_membership_repository import GroupMembershipRepository
+from ...infrastructure.repositories.calendar_snapshot_repository import CalendarSnapshotRepository
+from ...infrastructure.repositories.muscle_volume_repository import MuscleVolumeRepository
 from ...core.security import verify_password, get_password_hash, create_access_token
 from ...core.config import settings
 
 
 class AuthUseCases:
-    def __init__(self, user_repository: UserRepository):
+    def __init__(
+        self,
+        user_repository: UserRepository,
+        membership_repository: GroupMembershipRepository,
+        snapshot_repository: CalendarSnapshotRepository,
+        muscle_volume_repository: MuscleVolumeRepository,
+    ):
         self.user_repository = user_repository
+        self.membership_repository = membership_repository
+        self.snapshot_repository = snapshot_repository
+        self.muscle_volume_repository = muscle_volume_repository
 
     async def register_user(
         self, email: str, username: str, password: str, name: str
@@ -98,12 +110,14 @@ class AuthUseCases:
             "weight": user.weight,
             "gender": user.gender,
             "birth_date": user.birth_date.date() if user.birth_date else None,
+            "timezone": user.timezone,
             "created_at": user.created_at.isoformat()
         }
 
     async def update_user_details(self, user_id: str, name: str, email: str, username: str,
                                 height: Optional[float], weight: Optional[float],
-                                gender: Optional[str], birth_date: Optional[date]) -> bool:
+                                gender: Optional[str], birth_date: Optional[date],
+                                timezone: Optional[str] = None) -> bool:
         """Update user details"""
         current_user = await self.user_repository.find_by_id(user_id)
         if not current_user:
@@ -135,7 +149,19 @@ class AuthUseCases:
             "updated_at": datetime.utcnow()
         }
 
-        return await self.user_repository.update(user_id, update_data)
+        timezone_changed = bool(timezone) and timezone != current_user.timezone
+        if timezone_changed:
+            update_data["timezone"] = timezone
+
+        updated = await self.user_repository.update(user_id, update_data)
+        if timezone_changed:
+            # Cached calendars and weekly volume were bucketed with the old day
+            # boundaries; dropped after the write so nothing recomputes with them
+            await self.snapshot_repository.invalidate_owner("user", user_id)
+            for group_id in await self.membership_repository.find_group_ids_by_user(user_id):
+                await self.snapshot_repository.invalidate_owner("group", group_id)
+            await self.muscle_volume_repository.invalidate_user(user_id)
+        return updated
 
     async def change_password(self, user_id: str, current_password: str, new_password: str) -> bool:
         """Change user password"""
@@ -1,26 +1,58 @@
 from typing import Dict, List, Optional
 from collections import defaultdict
-from datetime import datetime, timedelta
-from ...domain.entities.competition_group import CompetitionGroupEntity, GroupMember
+from datetime import date, datetime, timedelta
+from ...domain.entities.competition_group import CompetitionGroupEntity
+from ...domain.entities.group_membership import GroupMembershipEntity
 from ...infrastructure.repositories.competition_group_repository import (
     CompetitionGroupRepository,
 )
+from ...infrastructure.repositories.group_membership_repository import (
+    GroupMembershipRepository,
+)
+from ...infrastructure.repositories.daily_activity_repository import (
+    DailyActivityRepository,
+)
+from ...infrastructure.repositories.calendar_snapshot_repository import (
+    CalendarSnapshotRepository,
+)
 from ...infrastructure.repositories.user_repository import UserRepository
 from ...infrastructure.repositories.workout_session_repository import (
     WorkoutSessionRepository,
 )
+from ...core.projection import build_projection
+from ...core.timezones import LATEST_TIMEZONE, local_midnight_utc, local_today
+
+# Response fields selectable with ?fields=, mapped to the document fields they read
+GROUP_FIELDS = {
+    "id": (),
+    "name": ("name",),
+    "description": ("description",),
+    "owner_id": ("owner_id",),
+    "member_count": ("member_count",),
+    "invite_code": ("invite_code",),
+    "created_at": ("created_at",),
+    "version": ("version",),
+}
+# Details add the leaderboard, which comes from the memberships instead
+GROUP_DETAIL_FIELDS = {**GROUP_FIELDS, "members": (), "metric": ()}
 
 
 class CompetitionGroupUseCases:
     def __init__(
         self,
         group_repository: CompetitionGroupRepository,
+        membership_repository: GroupMembershipRepository,
         user_repository: UserRepository,
         session_repository: WorkoutSessionRepository,
+        activity_repository: DailyActivityRepository,
+        snapshot_repository: CalendarSnapshotRepository,
     ):
         self.group_repository = group_repository
+        self.membership_repository = membership_repository
         self.user_repository = user_repository
         self.session_repository = session_repository
+        self.activity_repository = activity_repository
+        self.snapshot_repository = snapshot_repository
 
     async def create_group(
         self, owner_id: str, name: str, description: Optional[str]
@@ -36,18 +68,23 @@ class CompetitionGroupUseCases:
             name=name,
             description=description,
             owner_id=owner_id,
-            members=[
-                GroupMember(user_id=owner_id, username=owner.username, workout_count=0)
-            ],
+            member_count=1,
             invite_code="",  # Will be generated by repository
         )
 
         group_id = await self.group_repository.create(group)
-        created_group = await self.group_repository.find_by_id(group_id)
+        await self.membership_repository.create(
+            GroupMembershipEntity(
+                group_id=group_id,
+                user_id=owner_id,
+                username=owner.username,
+                workout_count=await self.session_repository.count_completed(owner_id),
+            )
+        )
 
         return {
             "id": group_id,
-            "invite_code": created_group.invite_code if created_group else "",
+            "invite_code": group.invite_code,
         }
 
     async def join_group(self, user_id: str, invite_code: str) -> bool:
@@ -56,67 +93,79 @@ class CompetitionGroupUseCases:
         if not group:
             raise ValueError("Invalid invite code")
 
-        # Check if already a member
-        if any(m.user_id == user_id for m in group.members):
-            raise ValueError("Already a member of this group")
-
         # Get user info
         user = await self.user_repository.find_by_id(user_id)
         if not user:
             raise ValueError("User not found")
 
-        # Add member
-        group.members.append(
-            GroupMember(user_id=user_id, username=user.username, workout_count=0)
+        # The unique (group_id, user_id) index rejects duplicate joins atomically
+        group_id = str(group.id)
+        membership_id = await self.membership_repository.create(
+            GroupMembershipEntity(
+                group_id=group_id,
+                user_id=user_id,
+                username=user.username,
+                workout_count=await self.session_repository.count_completed(user_id),
+            )
         )
+        if not membership_id:
+            raise ValueError("Already a member of this group")
 
-        return await self.group_repository.update(str(group.id), group)
+        # Cached months list sessions per member
+        await self.snapshot_repository.invalidate_owner("group", group_id)
+        return await self.group_repository.increment_member_count(group_id, 1)
 
-    async def get_user_groups(self, user_id: str) -> List[dict]:
+    async def get_user_groups(
+        self, user_id: str, fields: Optional[List[str]] = None
+    ) -> List[dict]:
         """Get all groups for a user"""
-        groups = await self.group_repository.find_by_user(user_id)
+        group_ids = await self.membership_repository.find_group_ids_by_user(user_id)
+        if not group_ids:
+            return []
+        if fields:
+            docs = await self.group_repository.find_by_ids(
+                group_ids, build_projection(fields, GROUP_FIELDS)
+            )
+            return [self._format_group_fields(doc, fields) for doc in docs]
+
+        groups = await self.group_repository.find_by_ids(group_ids)
         return [
             {
                 "id": str(g.id),
                 "name": g.name,
                 "description": g.description,
                 "owner_id": g.owner_id,
-                "member_count": len(g.members),
+                "member_count": g.member_count,
                 "invite_code": g.invite_code,
                 "created_at": g.created_at.isoformat(),
             }
             for g in groups
         ]
 
-    async def get_group_details(self, group_id: str, user_id: str, days: Optional[int] = None) -> Optional[dict]:
-        """Get group details with leaderboard"""
-        group = await self.group_repository.find_by_id(group_id)
+    async def get_group_details(
+        self,
+        group_id: str,
+        user_id: str,
+        days: Optional[int] = None,
+        metric: str = "workouts",
+        period: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Optional[dict]:
+        """Get group details with leaderboard ranked by metric over a window"""
+        projection = build_projection(fields, GROUP_DETAIL_FIELDS) if fields else None
+        group = await self.group_repository.find_by_id(group_id, projection)
         if not group:
             return None
 
         # Check if user is a member
-        if not any(m.user_id == user_id for m in group.members):
+        if not await self.membership_repository.find_one(group_id, user_id):
             raise ValueError("Not a member of this group")
 
-        # Define date range if days are specified
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days) if days else None
-
-        # Update workout counts for all members
-        for member in group.members:
-            if start_date:
-                sessions = await self.session_repository.find_by_user_and_date_range(
-                    member.user_id, start_date, end_date
-                )
-            else:
-                sessions = await self.session_repository.find_by_user(member.user_id, limit=9999) # Large limit for all time
-            
-            member.workout_count = len([s for s in sessions if s.is_completed])
-
-        # Sort members by workout count
-        sorted_members = sorted(
-            group.members, key=lambda m: m.workout_count, reverse=True
-        )
+        if fields:
+            members = None
+            if "members" in fields:
+                members = await self._ranked_members(group_id, days, metric, period)
+            return self._format_group_fields(group, fields, members, metric)
 
         return {
             "id": str(group.id),
@@ -124,16 +173,134 @@ class CompetitionGroupUseCases:
             "description": group.description,
             "owner_id": group.owner_id,
             "invite_code": group.invite_code,
-            "members": [
+            "members": await self._ranked_members(group_id, days, metric, period),
+            "metric": metric,
+            "created_at": group.created_at.isoformat(),
+            "version": group.version,
+        }
+
+    async def _ranked_members(
+        self, group_id: str, days: Optional[int], metric: str, period: Optional[str]
+    ) -> List[dict]:
+        """Members ranked by metric over the window"""
+        # All-time counts are maintained on the memberships, already sorted
+        members = await self.membership_repository.find_by_group(group_id)
+        scores = {m.user_id: m.workout_count for m in members}
+
+        # Anything else is summed from the members' daily activity buckets
+        start_day = self._window_start(days, period)
+        if start_day or metric != "workouts":
+            totals = await self.activity_repository.sum_by_users(
+                [m.user_id for m in members], start_day
+            )
+            for member in members:
+                member_totals = totals.get(member.user_id, {})
+                if start_day:
+                    member.workout_count = member_totals.get("workouts", 0)
+                scores[member.user_id] = member_totals.get(metric, 0)
+            members.sort(key=lambda m: scores[m.user_id], reverse=True)
+
+        return [
+            {
+                "user_id": m.user_id,
+                "username": m.username,
+                "workout_count": m.workout_count,
+                "score": round(scores[m.user_id], 1),
+                "joined_at": m.joined_at.isoformat(),
+            }
+            for m in members
+        ]
+
+    def _format_group_fields(
+        self,
+        doc: dict,
+        fields: List[str],
+        members: Optional[List[dict]] = None,
+        metric: str = "workouts",
+    ) -> dict:
+        """Format only the requested fields from a projected group document"""
+        getters = {
+            "id": lambda: doc["_id"],
+            "name": lambda: doc.get("name"),
+            "description": lambda: doc.get("description"),
+            "owner_id": lambda: doc.get("owner_id"),
+            "member_count": lambda: doc.get("member_count", 0),
+            "invite_code": lambda: doc.get("invite_code"),
+            "created_at": lambda: doc["created_at"].isoformat() if doc.get("created_at") else None,
+            "version": lambda: doc.get("version", 0),
+            "members": lambda: members,
+            "metric": lambda: metric,
+        }
+        return {field: getters[field]() for field in fields}
+
+    def _window_start(self, days: Optional[int], period: Optional[str]) -> Optional[datetime]:
+        """First day of a leaderboard window; None means all time"""
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        if period == "day":
+            return today
+        if period == "week":
+            return today - timedelta(days=today.weekday())
+        if period == "month":
+            return today.replace(day=1)
+        if days:
+            return today - timedelta(days=days - 1)
+        return None
+
+    async def get_leaderboard(
+        self, group_id: str, user_id: str, skip: int = 0, limit: int = 50
+    ) -> dict:
+        """Get one page of the all-time leaderboard, ranked by workout count"""
+        group = await self.group_repository.find_by_id(group_id)
+        if not group:
+            raise ValueError("Group not found")
+
+        if not await self.membership_repository.find_one(group_id, user_id):
+            raise ValueError("Not a member of this group")
+
+        page = await self.membership_repository.find_page_by_group(group_id, skip, limit)
+
+        # Competition ranking (1, 1, 3): only the first row may tie with the previous page
+        entries = []
+        rank = 0
+        previous_count = None
+        for position, member in enumerate(page, start=skip + 1):
+            if previous_count is None:
+                rank = await self.membership_repository.count_ahead(group_id, member.workout_count) + 1
+            elif member.workout_count != previous_count:
+                rank = position
+            previous_count = member.workout_count
+            entries.append(
                 {
-                    "user_id": m.user_id,
-                    "username": m.username,
-                    "workout_count": m.workout_count,
-                    "joined_at": m.joined_at.isoformat(),
+                    "rank": rank,
+                    "user_id": member.user_id,
+                    "username": member.username,
+                    "workout_count": member.workout_count,
                 }
-                for m in sorted_members
-            ],
-            "created_at": group.created_at.isoformat(),
+            )
+
+        return {
+            "group_id": group_id,
+            "total_members": group.member_count,
+            "entries": entries,
+        }
+
+    async def get_member_rank(self, group_id: str, user_id: str) -> dict:
+        """Get the current user's rank in the all-time leaderboard"""
+        group = await self.group_repository.find_by_id(group_id)
+        if not group:
+            raise ValueError("Group not found")
+
+        membership = await self.membership_repository.find_one(group_id, user_id)
+        if not membership:
+            raise ValueError("Not a member of this group")
+
+        ahead = await self.membership_repository.count_ahead(group_id, membership.workout_count)
+        return {
+            "group_id": group_id,
+            "user_id": user_id,
+            "rank": ahead + 1,
+            "workout_count": membership.workout_count,
+            "total_members": group.member_count,
         }
 
     async def leave_group(self, group_id: str, user_id: str) -> bool:
@@ -147,9 +314,11 @@ class CompetitionGroupUseCases:
             raise ValueError("Owner cannot leave the group. Delete it instead.")
 
         # Remove member
-        group.members = [m for m in group.members if m.user_id != user_id]
+        if not await self.membership_repository.delete(group_id, user_id):
+            return False
 
-        return await self.group_repository.update(group_id, group)
+        await self.snapshot_repository.invalidate_owner("group", group_id)
+        return await self.group_repository.increment_member_count(group_id, -1)
 
     async def delete_group(self, group_id: str, user_id: str) -> bool:
         """Delete a group (owner only)"""
@@ -160,6 +329,8 @@ class CompetitionGroupUseCases:
         if group.owner_id != user_id:
             raise ValueError("Only the owner can delete the group")
 
+        await self.membership_repository.delete_by_group(group_id)
+        await self.snapshot_repository.invalidate_owner("group", group_id)
         return await self.group_repository.delete(group_id)
 
     async def get_group_calendar_data(self, group_id: str, user_id: str, year: int, month: int) -> Dict[str, List[Dict]]:
@@ -168,36 +339,74 @@ class CompetitionGroupUseCases:
         if not group:
             raise ValueError("Group not found")
 
-        if not any(m.user_id == user_id for m in group.members):
+        if not await self.membership_repository.find_one(group_id, user_id):
             raise ValueError("Not a member of this group")
 
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1)
-        else:
-            end_date = datetime(year, month + 1, 1)
+        # Fully past months only change when a member's session or the roster does.
+        # Members may live anywhere, so wait until the month is over in every zone.
+        is_past_month = self.snapshot_repository.is_past_month(year, month, local_today(LATEST_TIMEZONE))
+        if is_past_month:
+            cached = await self.snapshot_repository.find("group", group_id, year, month)
+            if cached is not None:
+                return cached
+            generation = await self.snapshot_repository.generation("group", group_id)
 
-        calendar_data = defaultdict(list)
+        members = await self.membership_repository.find_by_group(group_id)
+        usernames = {m.user_id: m.username for m in members}
 
-        for member in group.members:
-            sessions = await self.session_repository.find_by_user_and_date_range(
-                member.user_id, start_date, end_date
+        # Each workout lands on its member's own local day: one query per timezone
+        members_by_timezone = defaultdict(list)
+        timezones = await self.user_repository.find_timezones(list(usernames))
+        for member_id, timezone in timezones.items():
+            members_by_timezone[timezone].append(member_id)
+
+        first_day = date(year, month, 1)
+        next_month = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+
+        calendar_data = defaultdict(list)
+        for timezone, member_ids in members_by_timezone.items():
+            sessions_by_day = await self.session_repository.find_completed_by_local_day(
+                member_ids,
+                local_midnight_utc(first_day, timezone),
+                local_midnight_utc(next_month, timezone),
+                timezone,
             )
-            for session in sessions:
-                if session.is_completed:
-                    day = session.start_time.date().isoformat()
+            for day, sessions in sessions_by_day.items():
+                for s in sessions:
                     calendar_data[day].append(
                         {
-                            "id": str(session.id),
-                            "package_name": session.package_name,
-                            "duration_minutes": session.duration_minutes,
-                            "start_time": session.start_time.isoformat(),
-                            "user_id": member.user_id,
-                            "username": member.username,
+                            "id": s["id"],
+                            "package_name": s["package_name"],
+                            "duration_minutes": s.get("duration_minutes"),
+                            "start_time": s["start_time"].isoformat(),
+                            "user_id": s["user_id"],
+                            "username": usernames.get(s["user_id"]),
                         }
                     )
-        
+
         for day in calendar_data:
             calendar_data[day].sort(key=lambda x: x['start_time'])
 
-        return dict(calendar_data)
\ No newline at end of file
+        result = dict(calendar_data)
+        if is_past_month:
+            await self.snapshot_repository.save("group", group_id, year, month, result, generation)
+        return result
+
+    async def migrate_embedded_members(self) -> int:
+        """Move members still embedded in group documents to the memberships collection"""
+        migrated = 0
+        for group_id, members in await self.group_repository.find_embedded_members():
+            for member in members:
+                await self.membership_repository.create(
+                    GroupMembershipEntity(
+                        group_id=group_id,
+                        user_id=member["user_id"],
+                        username=member["username"],
+                        joined_at=member.get("joined_at") or datetime.utcnow(),
+                        workout_count=await self.session_repository.count_completed(member["user_id"]),
+                    )
+                )
+            member_count = await self.membership_repository.count_by_group(group_id)
+            await self.group_repository.drop_embedded_members(group_id, member_count)
+            migrated += 1
+        return migrated
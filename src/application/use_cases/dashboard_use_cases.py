@@ -0,0 +1,38 @@
+from typing import Dict
+from ...core.concurrency import gather_in_threads
+from ...core.timezones import DEFAULT_TIMEZONE, local_today
+from .analytics_use_cases import AnalyticsUseCases
+from .reminder_use_cases import ReminderUseCases
+
+
+class DashboardUseCases:
+    def __init__(self, analytics_use_cases: AnalyticsUseCases, reminder_use_cases: ReminderUseCases):
+        self.analytics_use_cases = analytics_use_cases
+        self.reminder_use_cases = reminder_use_cases
+
+    async def get_dashboard(
+        self, user_id: str, days: int = 30, weight_days: int = 90
+    ) -> Dict:
+        """Everything the home screen needs, with the queries run concurrently"""
+        analytics = self.analytics_use_cases
+        # The user's timezone decides which month and day "today" is for every section
+        user = await analytics.user_repository.find_by_id(user_id)
+        timezone = user.timezone if user else DEFAULT_TIMEZONE
+        today = local_today(timezone)
+
+        stats, calendar, water_stats, weight_progression, today_reminders = await gather_in_threads(
+            lambda: analytics.get_workout_stats(user_id, days, timezone),
+            lambda: analytics.get_calendar_data(user_id, today.year, today.month, timezone),
+            lambda: analytics.get_water_consumption_stats(user_id, days, timezone),
+            lambda: analytics.get_weight_progression(user_id, weight_days),
+            lambda: self.reminder_use_cases.get_today_reminders(user_id, timezone),
+        )
+
+        return {
+            "stats": stats,
+            "calendar_data": calendar,
+            "water_stats": water_stats,
+            "water_recommendation": analytics.water_recommendation_for(user),
+            "weight_progression": weight_progression,
+            "today_reminders": today_reminders,
+        }
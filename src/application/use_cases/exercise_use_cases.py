@@ -1,11 +1,17 @@
 from typing import List, Optional
 from ...domain.entities.exercise import ExerciseEntity
 from ...infrastructure.repositories.exercise_repository import ExerciseRepository
+from ...infrastructure.repositories.workout_package_repository import WorkoutPackageRepository
 
 
 class ExerciseUseCases:
-    def __init__(self, exercise_repository: ExerciseRepository):
+    def __init__(
+        self,
+        exercise_repository: ExerciseRepository,
+        package_repository: WorkoutPackageRepository,
+    ):
         self.exercise_repository = exercise_repository
+        self.package_repository = package_repository
 
     async def create_exercise(
         self,
@@ -27,27 +33,61 @@ class ExerciseUseCases:
         )
         return await self.exercise_repository.create(exercise)
 
+    async def update_exercise(
+        self,
+        exercise_id: str,
+        name: str,
+        description: Optional[str],
+        category: str,
+        type: str,
+        muscle_groups: List[str],
+        equipment: Optional[str],
+    ) -> int:
+        """Update an exercise (admin only) and refresh its snapshot in packages"""
+        exercise = ExerciseEntity(
+            name=name,
+            description=description,
+            category=category,
+            type=type,
+            muscle_groups=muscle_groups,
+            equipment=equipment,
+        )
+        if not await self.exercise_repository.update(exercise_id, exercise):
+            raise ValueError("Exercise not found")
+
+        return await self.package_repository.refresh_exercise_snapshot(
+            exercise_id, name, type, category
+        )
+
     async def get_all_exercises(self) -> List[dict]:
         """Get all exercises"""
         exercises = await self.exercise_repository.find_all()
-        return [
-            {
-                "id": str(ex.id),
-                "name": ex.name,
-                "description": ex.description,
-                "category": ex.category,
-                "type": ex.type,
-                "muscle_groups": ex.muscle_groups,
-                "equipment": ex.equipment,
-            }
-            for ex in exercises
-        ]
+        return [self._format_exercise(ex) for ex in exercises]
 
     async def get_exercise_by_id(self, exercise_id: str) -> Optional[dict]:
         """Get exercise by ID"""
         exercise = await self.exercise_repository.find_by_id(exercise_id)
         if not exercise:
             return None
+        return self._format_exercise(exercise)
+
+    async def get_exercises_by_ids(self, exercise_ids: List[str]) -> List[dict]:
+        """Get several exercises in one query, in the requested order"""
+        exercises = {
+            str(ex.id): ex for ex in await self.exercise_repository.find_by_ids(exercise_ids)
+        }
+        return [
+            self._format_exercise(exercises[exercise_id])
+            for exercise_id in exercise_ids
+            if exercise_id in exercises
+        ]
+
+    async def get_exercises_by_category(self, category: str) -> List[dict]:
+        """Get exercises by category"""
+        exercises = await self.exercise_repository.find_by_category(category)
+        return [self._format_exercise(ex) for ex in exercises]
+
+    def _format_exercise(self, exercise: ExerciseEntity) -> dict:
         return {
             "id": str(exercise.id),
             "name": exercise.name,
@@ -57,19 +97,3 @@ class ExerciseUseCases:
             "muscle_groups": exercise.muscle_groups,
             "equipment": exercise.equipment,
         }
-
-    async def get_exercises_by_category(self, category: str) -> List[dict]:
-        """Get exercises by category"""
-        exercises = await self.exercise_repository.find_by_category(category)
-        return [
-            {
-                "id": str(ex.id),
-                "name": ex.name,
-                "description": ex.description,
-                "category": ex.category,
-                "type": ex.type,
-                "muscle_groups": ex.muscle_groups,
-                "equipment": ex.equipment,
-            }
-            for ex in exercises
-        ]
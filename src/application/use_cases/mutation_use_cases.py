@@ -0,0 +1,109 @@
+from typing import Dict, List, Optional
+from ...infrastructure.repositories.idempotency_repository import IdempotencyRepository
+from .water_intake_use_cases import WaterIntakeUseCases
+from .weight_history_use_cases import WeightHistoryUseCases
+from .workout_session_use_cases import WorkoutSessionUseCases
+from .reminder_use_cases import ReminderUseCases
+
+MUTATION_SCOPE = "mutations"
+SET_OPERATIONS = ("add_set", "update_set")
+
+
+class MutationUseCases:
+    """Applies a queue of offline mutations in one request.
+
+    Operations are grouped per collection and written in bulk; order is kept
+    within each collection. Every operation carries a client key, so uploading
+    the same queue again returns the stored results instead of writing twice.
+    """
+
+    def __init__(
+        self,
+        water_intake_use_cases: WaterIntakeUseCases,
+        weight_history_use_cases: WeightHistoryUseCases,
+        session_use_cases: WorkoutSessionUseCases,
+        reminder_use_cases: ReminderUseCases,
+        idempotency_repository: IdempotencyRepository,
+    ):
+        self.water_intake_use_cases = water_intake_use_cases
+        self.weight_history_use_cases = weight_history_use_cases
+        self.session_use_cases = session_use_cases
+        self.reminder_use_cases = reminder_use_cases
+        self.idempotency_repository = idempotency_repository
+
+    async def apply(self, user_id: str, operations: List[dict]) -> List[dict]:
+        """Apply operations and return one result per operation, in order"""
+        results: List[Optional[dict]] = [None] * len(operations)
+
+        taken = await self.idempotency_repository.claim_many(
+            user_id, MUTATION_SCOPE, [op["key"] for op in operations]
+        )
+        pending: Dict[str, List[int]] = {}
+        for position, op in enumerate(operations):
+            claim = taken.get(op["key"])
+            if claim is None:
+                pending.setdefault(op["type"], []).append(position)
+            elif claim.get("response"):
+                results[position] = {**claim["response"], "replayed": True}
+            else:
+                results[position] = self._result(op, error="Operation is already being applied")
+
+        try:
+            positions = pending.get("log_water", [])
+            ids = await self.water_intake_use_cases.log_water_many(
+                user_id, [operations[p]["amount_ml"] for p in positions]
+            )
+            for position, doc_id in zip(positions, ids):
+                results[position] = self._result(operations[position], doc_id=doc_id)
+
+            positions = pending.get("log_weight", [])
+            ids = await self.weight_history_use_cases.log_weight_many(
+                user_id, [operations[p]["weight"] for p in positions]
+            )
+            for position, doc_id in zip(positions, ids):
+                results[position] = self._result(operations[position], doc_id=doc_id)
+
+            positions = sorted(p for op_type in SET_OPERATIONS for p in pending.get(op_type, []))
+            outcomes = await self.session_use_cases.apply_set_mutations(
+                user_id, [operations[p] for p in positions]
+            )
+            for position, outcome in zip(positions, outcomes):
+                results[position] = self._result(operations[position], **outcome)
+
+            positions = pending.get("set_reminder_completion", [])
+            errors = await self.reminder_use_cases.set_completions(
+                user_id,
+                [(operations[p]["reminder_id"], operations[p]["completed"]) for p in positions],
+            )
+            for position, error in zip(positions, errors):
+                results[position] = self._result(operations[position], error=error)
+        finally:
+            # Keep successes for replays; release failures, and whatever a raising
+            # step left unapplied, so a retry can apply them
+            claimed = [p for group in pending.values() for p in group]
+            applied = {p for p in claimed if results[p] and results[p]["status"] == "applied"}
+            await self.idempotency_repository.complete_many(
+                user_id, MUTATION_SCOPE, {operations[p]["key"]: results[p] for p in applied}
+            )
+            await self.idempotency_repository.release_many(
+                user_id,
+                MUTATION_SCOPE,
+                [operations[p]["key"] for p in claimed if p not in applied],
+            )
+        return results
+
+    def _result(
+        self,
+        op: dict,
+        doc_id: Optional[str] = None,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+    ) -> dict:
+        return {
+            "key": op["key"],
+            "status": "error" if error else "applied",
+            "id": doc_id,
+            "result": result,
+            "error": error,
+            "replayed": False,
+        }
@@ -1,11 +1,17 @@
-from typing import List, Optional, Union
-from datetime import datetime
+from typing import List, Optional, Tuple, Union
+from datetime import date, datetime
+from bson import ObjectId
 from ...domain.entities.reminder import ReminderEntity
 from ...infrastructure.repositories.reminder_repository import ReminderRepository
+from ...infrastructure.repositories.sync_tombstone_repository import SyncTombstoneRepository
+from ...infrastructure.repositories.user_repository import UserRepository
+from ...core.timezones import local_day, local_today
 
 class ReminderUseCases:
-    def __init__(self, reminder_repository: ReminderRepository):
+    def __init__(self, reminder_repository: ReminderRepository, tombstone_repository: SyncTombstoneRepository, user_repository: UserRepository):
         self.reminder_repository = reminder_repository
+        self.tombstone_repository = tombstone_repository
+        self.user_repository = user_repository
 
     # ... (create_reminder, get_user_reminders, get_today_reminders, delete_reminder are unchanged) ...
     async def create_reminder(self, user_id: str, title: str, time: str, frequency: str, frequency_details: Optional[Union[List[int], int]] = None) -> str:
@@ -22,9 +28,11 @@ class ReminderUseCases:
         reminders = await self.reminder_repository.find_by_user(user_id)
         return [self._format_reminder(r) for r in reminders]
 
-    async def get_today_reminders(self, user_id: str) -> List[dict]:
+    async def get_today_reminders(self, user_id: str, timezone: Optional[str] = None) -> List[dict]:
         all_reminders = await self.reminder_repository.find_by_user(user_id)
-        today = datetime.utcnow().date()
+        # "Today" is the user's local day, not the UTC one
+        timezone = timezone or await self.user_repository.find_timezone(user_id)
+        today = local_today(timezone)
         today_weekday = today.weekday() # Monday is 0 and Sunday is 6
 
         today_reminders = []
@@ -43,7 +51,7 @@ class ReminderUseCases:
             if is_today:
                 reminder_dict = self._format_reminder(r)
                 # Check completion based on date part only
-                reminder_dict['completed'] = r.last_completed_date.date() == today if r.last_completed_date else False
+                reminder_dict['completed'] = self._done_on(r, today, timezone)
                 today_reminders.append(reminder_dict)
 
         # Ordenar pelo horário
@@ -55,7 +63,14 @@ class ReminderUseCases:
         reminder = await self.reminder_repository.find_by_id(reminder_id)
         if not reminder or reminder.user_id != user_id:
             raise ValueError("Reminder not found or unauthorized")
-        return await self.reminder_repository.delete(reminder_id)
+        deleted = await self.reminder_repository.delete(reminder_id)
+        if deleted:
+            await self.tombstone_repository.record(user_id, "reminders", reminder_id)
+        return deleted
+
+    async def get_changed_since(self, user_id: str, since: Optional[datetime]) -> List[dict]:
+        reminders = await self.reminder_repository.find_updated_since(user_id, since)
+        return [self._format_reminder(r) for r in reminders]
 
 
     async def toggle_today_completion(self, reminder_id: str, user_id: str) -> bool:
@@ -63,9 +78,9 @@ class ReminderUseCases:
         if not reminder or reminder.user_id != user_id:
             raise ValueError("Reminder not found or unauthorized")
 
-        today = datetime.utcnow().date()
+        timezone = await self.user_repository.find_timezone(user_id)
         update_data = {}
-        if reminder.last_completed_date and reminder.last_completed_date.date() == today:
+        if self._done_on(reminder, local_today(timezone), timezone):
             # Mark as not completed by setting the date to None
             update_data["last_completed_date"] = None
         else:
@@ -75,6 +90,41 @@ class ReminderUseCases:
         # Pass only the update data dictionary to the repository
         return await self.reminder_repository.update(reminder_id, update_data)
 
+    async def set_completions(self, user_id: str, completions: List[Tuple[str, bool]]) -> List[Optional[str]]:
+        """Set today's completion state of several reminders; returns an error per entry or None"""
+        reminder_ids = [reminder_id for reminder_id, _ in completions if ObjectId.is_valid(reminder_id)]
+        reminders = {}
+        if reminder_ids:
+            reminders = {
+                str(r.id): r for r in await self.reminder_repository.find_by_ids_for_user(reminder_ids, user_id)
+            }
+
+        # Offline clients send the target state rather than a toggle, so replays are harmless
+        timezone = await self.user_repository.find_timezone(user_id)
+        today = local_today(timezone)
+        changed = {}
+        errors = []
+        for reminder_id, completed in completions:
+            reminder = reminders.get(reminder_id)
+            if not reminder:
+                errors.append("Reminder not found or unauthorized")
+                continue
+            errors.append(None)
+            # Later operations on the same reminder see the state left by earlier ones
+            done_today = self._done_on(reminder, today, timezone)
+            if completed and not done_today:
+                reminder.last_completed_date = datetime.utcnow()
+                changed[reminder_id] = reminder
+            elif not completed and done_today:
+                reminder.last_completed_date = None
+                changed[reminder_id] = reminder
+
+        # One write per reminder, holding the state after its last operation
+        await self.reminder_repository.set_completion_many(
+            [(reminder_id, r.last_completed_date) for reminder_id, r in changed.items()]
+        )
+        return errors
+
     async def update_reminder(self, reminder_id: str, user_id: str, title: str, time: str, frequency: str, frequency_details: Optional[Union[List[int], int]] = None) -> bool:
         reminder = await self.reminder_repository.find_by_id(reminder_id)
         if not reminder or reminder.user_id != user_id:
@@ -92,6 +142,13 @@ class ReminderUseCases:
         return await self.reminder_repository.update(reminder_id, update_data)
 
 
+    @staticmethod
+    def _done_on(reminder: ReminderEntity, day: date, timezone: str) -> bool:
+        """Whether the reminder was completed on the given local day"""
+        if not reminder.last_completed_date:
+            return False
+        return local_day(reminder.last_completed_date, timezone) == day
+
     def _format_reminder(self, reminder: ReminderEntity) -> dict:
         return {
             "id": str(reminder.id),
@@ -101,4 +158,6 @@ class ReminderUseCases:
             "frequency": reminder.frequency,
             "frequency_details": reminder.frequency_details,
             "created_at": reminder.created_at.isoformat(),
+            # Lets other devices tell whether it was done on their local day
+            "last_completed_date": reminder.last_completed_date.isoformat() if reminder.last_completed_date else None,
         }
\ No newline at end of file
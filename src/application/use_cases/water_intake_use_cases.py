@@ -1,10 +1,81 @@
+from collections import defaultdict
+from typing import List, Optional
+from datetime import datetime
 from ...domain.entities.water_intake import WaterIntakeEntity
 from ...infrastructure.repositories.water_intake_repository import WaterIntakeRepository
+from ...infrastructure.repositories.daily_activity_repository import DailyActivityRepository
+from ...infrastructure.repositories.user_repository import UserRepository
+from ...core.config import settings
+from ...core.timezones import day_bucket
 
 class WaterIntakeUseCases:
-    def __init__(self, water_intake_repository: WaterIntakeRepository):
+    def __init__(
+        self,
+        water_intake_repository: WaterIntakeRepository,
+        activity_repository: DailyActivityRepository,
+        user_repository: UserRepository,
+    ):
         self.water_intake_repository = water_intake_repository
+        self.activity_repository = activity_repository
+        self.user_repository = user_repository
 
     async def log_water(self, user_id: str, amount_ml: int) -> str:
         intake = WaterIntakeEntity(user_id=user_id, amount_ml=amount_ml)
-        return await self.water_intake_repository.create(intake)
\ No newline at end of file
+        intake_id = await self.water_intake_repository.create(intake)
+        if settings.WATER_BUFFER_ENABLED:
+            # Buffered entries are counted by the flush that stores them
+            await self.flush_buffered(only_if_due=True)
+        else:
+            await self._count_stored([intake_id])
+        return intake_id
+
+    async def log_water_many(self, user_id: str, amounts_ml: List[int]) -> List[str]:
+        intakes = [WaterIntakeEntity(user_id=user_id, amount_ml=amount_ml) for amount_ml in amounts_ml]
+        ids = await self.water_intake_repository.create_many(intakes)
+        await self._count_stored(ids)
+        return ids
+
+    async def backfill_water_counters(self) -> int:
+        """Count entries missing from the daily water counters: older than them, or left by a crash"""
+        await self.water_intake_repository.mark_legacy_uncounted()
+        backfilled = 0
+        while True:
+            intake_ids = await self.water_intake_repository.find_uncounted_ids()
+            if not intake_ids:
+                return backfilled
+            backfilled += await self._count_stored(intake_ids)
+
+    async def _count_stored(self, intake_ids: List[str]) -> int:
+        """Add stored entries to the counters, skipping ones another caller claimed"""
+        intakes = await self.water_intake_repository.claim_uncounted(intake_ids)
+        if intakes:
+            await self._count(intakes)
+        return len(intakes)
+
+    async def _count(self, intakes: List[WaterIntakeEntity]) -> None:
+        """$inc each user's daily water counter, one upsert per bucket"""
+        # Buckets follow each user's local day
+        timezones = await self.user_repository.find_timezones(list({i.user_id for i in intakes}))
+        totals = defaultdict(int)
+        for intake in intakes:
+            day = day_bucket(intake.created_at, timezones[intake.user_id])
+            totals[(intake.user_id, day)] += intake.amount_ml
+        for (user_id, day), amount_ml in totals.items():
+            await self.activity_repository.increment(user_id, day, {"water_ml": amount_ml})
+
+    async def flush_buffered(self, only_if_due: bool = False) -> int:
+        """Persist water logs held by the write-behind buffer"""
+        if only_if_due:
+            intake_ids = await self.water_intake_repository.flush_if_due()
+        else:
+            intake_ids = await self.water_intake_repository.flush()
+        # Only now that they are stored do they reach the counters
+        await self._count_stored(intake_ids)
+        return len(intake_ids)
+
+    async def get_changed_since(self, user_id: str, since: Optional[datetime]) -> List[dict]:
+        intakes = await self.water_intake_repository.find_created_since(user_id, since)
+        return [
+            {"id": str(i.id), "amount_ml": i.amount_ml, "created_at": i.created_at.isoformat()}
+            for i in intakes
+        ]
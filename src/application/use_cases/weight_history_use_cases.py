@@ -1,3 +1,5 @@
+from typing import List, Optional
+from datetime import datetime
 from ...domain.entities.weight_history import WeightHistoryEntity
 from ...infrastructure.repositories.weight_history_repository import WeightHistoryRepository
 from ...infrastructure.repositories.user_repository import UserRepository
@@ -15,4 +17,21 @@ class WeightHistoryUseCases:
         # Update the user's current weight
         await self.user_repository.update(user_id, {"weight": weight})
 
-        return entry_id
\ No newline at end of file
+        return entry_id
+
+    async def log_weight_many(self, user_id: str, weights: List[float]) -> List[str]:
+        entries = [WeightHistoryEntity(user_id=user_id, weight=weight) for weight in weights]
+        entry_ids = await self.weight_history_repository.create_many(entries)
+
+        # The most recent entry is the user's current weight
+        if weights:
+            await self.user_repository.update(user_id, {"weight": weights[-1]})
+
+        return entry_ids
+
+    async def get_changed_since(self, user_id: str, since: Optional[datetime]) -> List[dict]:
+        entries = await self.weight_history_repository.find_created_since(user_id, since)
+        return [
+            {"id": str(e.id), "weight": e.weight, "created_at": e.created_at.isoformat()}
+            for e in entries
+        ]
@@ -1,12 +1,40 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from ...domain.entities.workout_package import WorkoutPackageEntity, ExerciseInPackage
+from ...domain.entities.exercise import ExerciseEntity
+from ...domain.exceptions import VersionConflictError
 from ...infrastructure.repositories.workout_package_repository import WorkoutPackageRepository
+from ...infrastructure.repositories.exercise_repository import ExerciseRepository
+from ...infrastructure.repositories.sync_tombstone_repository import (
+    SyncTombstoneRepository,
+)
+from ...core.projection import build_projection
+from bson import ObjectId
+
+# Response fields selectable with ?fields=, mapped to the document fields they read
+PACKAGE_FIELDS = {
+    "id": (),
+    "user_id": ("user_id",),
+    "name": ("name",),
+    "description": ("description",),
+    "exercises": ("exercises",),
+    "is_public": ("is_public",),
+    "created_at": ("created_at",),
+    "updated_at": ("updated_at",),
+    "version": ("version",),
+}
 
 
 class WorkoutPackageUseCases:
-    def __init__(self, package_repository: WorkoutPackageRepository):
+    def __init__(
+        self,
+        package_repository: WorkoutPackageRepository,
+        exercise_repository: ExerciseRepository,
+        tombstone_repository: SyncTombstoneRepository,
+    ):
         self.package_repository = package_repository
+        self.exercise_repository = exercise_repository
+        self.tombstone_repository = tombstone_repository
 
     async def create_package(
         self,
@@ -17,12 +45,7 @@ class WorkoutPackageUseCases:
         is_public: bool = False,
     ) -> str:
         """Create a new workout package"""
-        exercise_list = [
-            ExerciseInPackage(
-                exercise_id=ex["exercise_id"], order=ex["order"], notes=ex.get("notes")
-            )
-            for ex in exercises
-        ]
+        exercise_list = await self._build_exercises(exercises)
 
         package = WorkoutPackageEntity(
             user_id=user_id,
@@ -34,75 +57,55 @@ class WorkoutPackageUseCases:
 
         return await self.package_repository.create(package)
 
-    async def get_user_packages(self, user_id: str) -> List[dict]:
+    async def get_user_packages(
+        self, user_id: str, expand_exercises: bool = False, fields: Optional[List[str]] = None
+    ) -> List[dict]:
         """Get all packages for a user"""
-        packages = await self.package_repository.find_by_user(user_id)
-        return [
-            {
-                "id": str(pkg.id),
-                "user_id": pkg.user_id,
-                "name": pkg.name,
-                "description": pkg.description,
-                "exercises": [
-                    {
-                        "exercise_id": ex.exercise_id,
-                        "order": ex.order,
-                        "notes": ex.notes,
-                    }
-                    for ex in pkg.exercises
-                ],
-                "is_public": pkg.is_public,
-                "created_at": pkg.created_at.isoformat(),
-                "updated_at": pkg.updated_at.isoformat(),
-            }
-            for pkg in packages
-        ]
-
-    async def get_package_by_id(self, package_id: str) -> Optional[dict]:
+        packages = await self.package_repository.find_by_user(
+            user_id, self._projection(fields)
+        )
+        return await self._format_packages(packages, expand_exercises, fields)
+
+    async def get_package_by_id(
+        self, package_id: str, expand_exercises: bool = False, fields: Optional[List[str]] = None
+    ) -> Optional[dict]:
         """Get package by ID"""
-        package = await self.package_repository.find_by_id(package_id)
+        package = await self.package_repository.find_by_id(package_id, self._projection(fields))
         if not package:
             return None
-        return {
-            "id": str(package.id),
-            "user_id": package.user_id,
-            "name": package.name,
-            "description": package.description,
-            "exercises": [
-                {
-                    "exercise_id": ex.exercise_id,
-                    "order": ex.order,
-                    "notes": ex.notes,
-                }
-                for ex in package.exercises
-            ],
-            "is_public": package.is_public,
-            "created_at": package.created_at.isoformat(),
-            "updated_at": package.updated_at.isoformat(),
+        return (await self._format_packages([package], expand_exercises, fields))[0]
+
+    async def get_packages_by_ids(
+        self,
+        package_ids: List[str],
+        user_id: str,
+        expand_exercises: bool = False,
+        fields: Optional[List[str]] = None,
+    ) -> List[dict]:
+        """Get several packages in one query, skipping private packages of other users"""
+        packages = {
+            self._package_id(pkg): pkg
+            for pkg in await self.package_repository.find_visible_by_ids(
+                package_ids, user_id, self._projection(fields)
+            )
         }
+        return await self._format_packages(
+            [packages[package_id] for package_id in package_ids if package_id in packages],
+            expand_exercises,
+            fields,
+        )
 
-    async def get_public_packages(self) -> List[dict]:
+    async def get_public_packages(
+        self, expand_exercises: bool = False, fields: Optional[List[str]] = None
+    ) -> List[dict]:
         """Get all public packages"""
-        packages = await self.package_repository.find_public()
-        return [
-            {
-                "id": str(pkg.id),
-                "user_id": pkg.user_id,
-                "name": pkg.name,
-                "description": pkg.description,
-                "exercises": [
-                    {
-                        "exercise_id": ex.exercise_id,
-                        "order": ex.order,
-                        "notes": ex.notes,
-                    }
-                    for ex in pkg.exercises
-                ],
-                "is_public": pkg.is_public,
-                "created_at": pkg.created_at.isoformat(),
-            }
-            for pkg in packages
-        ]
+        packages = await self.package_repository.find_public(self._projection(fields))
+        return await self._format_packages(packages, expand_exercises, fields)
+
+    async def get_changed_since(self, user_id: str, since: Optional[datetime]) -> List[dict]:
+        """The user's packages changed since a sync point"""
+        packages = await self.package_repository.find_updated_since(user_id, since)
+        return [self._format_package(pkg) for pkg in packages]
 
     async def update_package(
         self,
@@ -112,19 +115,18 @@ class WorkoutPackageUseCases:
         description: Optional[str],
         exercises: List[dict],
         is_public: bool,
-    ) -> bool:
-        """Update a workout package"""
+        expected_version: Optional[int] = None,
+    ) -> int:
+        """Update a workout package and return its new version"""
         # Verify ownership
         existing = await self.package_repository.find_by_id(package_id)
         if not existing or existing.user_id != user_id:
             raise ValueError("Package not found or unauthorized")
 
-        exercise_list = [
-            ExerciseInPackage(
-                exercise_id=ex["exercise_id"], order=ex["order"], notes=ex.get("notes")
-            )
-            for ex in exercises
-        ]
+        if expected_version is not None and expected_version != existing.version:
+            raise VersionConflictError(existing.version)
+
+        exercise_list = await self._build_exercises(exercises)
 
         package = WorkoutPackageEntity(
             user_id=user_id,
@@ -134,9 +136,11 @@ class WorkoutPackageUseCases:
             is_public=is_public,
             created_at=existing.created_at,
             updated_at=datetime.utcnow(),
+            version=existing.version,
         )
 
-        return await self.package_repository.update(package_id, package)
+        await self.package_repository.update(package_id, package)
+        return package.version
 
     async def delete_package(self, package_id: str, user_id: str) -> bool:
         """Delete a workout package"""
@@ -145,7 +149,10 @@ class WorkoutPackageUseCases:
         if not existing or existing.user_id != user_id:
             raise ValueError("Package not found or unauthorized")
 
-        return await self.package_repository.delete(package_id)
+        deleted = await self.package_repository.delete(package_id)
+        if deleted:
+            await self.tombstone_repository.record(user_id, "workout_packages", package_id)
+        return deleted
 
     async def copy_package(self, package_id: str, user_id: str) -> str:
         """Copy a public package to user's account"""
@@ -160,8 +167,131 @@ class WorkoutPackageUseCases:
             user_id=user_id,
             name=f"{original.name} (Cópia)",
             description=original.description,
-            exercises=original.exercises,
+            exercises=await self._build_exercises(
+                [ex.model_dump() for ex in original.exercises]
+            ),
             is_public=False,
         )
 
         return await self.package_repository.create(new_package)
+
+    async def backfill_exercise_snapshots(self) -> int:
+        """Embed exercise snapshots into packages saved before they existed"""
+        updated = 0
+        while True:
+            packages = await self.package_repository.find_missing_exercise_snapshots()
+            if not packages:
+                return updated
+            catalog = await self._load_catalog(
+                ex.exercise_id for pkg in packages for ex in pkg.exercises
+            )
+            for pkg in packages:
+                exercises = [
+                    self._snapshot(ex.model_dump(), catalog) for ex in pkg.exercises
+                ]
+                await self.package_repository.set_exercises(str(pkg.id), exercises)
+                updated += 1
+
+    async def _build_exercises(self, exercises: List[dict]) -> List[ExerciseInPackage]:
+        """Build package exercises with catalog snapshots from one batched lookup"""
+        catalog = await self._load_catalog(ex["exercise_id"] for ex in exercises)
+        return [self._snapshot(ex, catalog) for ex in exercises]
+
+    async def _load_catalog(self, exercise_ids) -> Dict[str, ExerciseEntity]:
+        valid_ids = {exercise_id for exercise_id in exercise_ids if ObjectId.is_valid(exercise_id)}
+        if not valid_ids:
+            return {}
+        return {
+            str(ex.id): ex
+            for ex in await self.exercise_repository.find_by_ids(list(valid_ids))
+        }
+
+    def _snapshot(self, ex: dict, catalog: Dict[str, ExerciseEntity]) -> ExerciseInPackage:
+        details = catalog.get(ex["exercise_id"])
+        return ExerciseInPackage(
+            exercise_id=ex["exercise_id"],
+            order=ex["order"],
+            notes=ex.get("notes"),
+            name=details.name if details else None,
+            type=details.type if details else None,
+            category=details.category if details else None,
+        )
+
+    def _projection(self, fields: Optional[List[str]]) -> Optional[dict]:
+        return build_projection(fields, PACKAGE_FIELDS) if fields else None
+
+    def _package_id(self, package) -> str:
+        return package["_id"] if isinstance(package, dict) else str(package.id)
+
+    async def _format_packages(
+        self, packages: list, expand_exercises: bool, fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        """Format packages, optionally hydrating exercise details with one catalog query"""
+        if fields:
+            formatted = [self._format_package_fields(doc, fields) for doc in packages]
+            expand_exercises = expand_exercises and "exercises" in fields
+        else:
+            formatted = [self._format_package(pkg) for pkg in packages]
+        if not expand_exercises:
+            return formatted
+
+        catalog = await self._load_catalog(
+            ex["exercise_id"] for pkg in formatted for ex in pkg["exercises"]
+        )
+
+        for pkg in formatted:
+            for ex in pkg["exercises"]:
+                details = catalog.get(ex["exercise_id"])
+                ex["name"] = details.name if details else None
+                ex["type"] = details.type if details else None
+                ex["muscle_groups"] = details.muscle_groups if details else []
+                ex["equipment"] = details.equipment if details else None
+        return formatted
+
+    def _format_package_fields(self, doc: dict, fields: List[str]) -> dict:
+        """Format only the requested fields from a projected package document"""
+        getters = {
+            "id": lambda: doc["_id"],
+            "user_id": lambda: doc.get("user_id"),
+            "name": lambda: doc.get("name"),
+            "description": lambda: doc.get("description"),
+            "exercises": lambda: [
+                {
+                    "exercise_id": ex.get("exercise_id"),
+                    "order": ex.get("order"),
+                    "notes": ex.get("notes"),
+                    "name": ex.get("name"),
+                    "type": ex.get("type"),
+                    "category": ex.get("category"),
+                }
+                for ex in doc.get("exercises", [])
+            ],
+            "is_public": lambda: doc.get("is_public", False),
+            "created_at": lambda: doc["created_at"].isoformat() if doc.get("created_at") else None,
+            "updated_at": lambda: doc["updated_at"].isoformat() if doc.get("updated_at") else None,
+            "version": lambda: doc.get("version", 0),
+        }
+        return {field: getters[field]() for field in fields}
+
+    def _format_package(self, package: WorkoutPackageEntity) -> dict:
+        return {
+            "id": str(package.id),
+            "user_id": package.user_id,
+            "name": package.name,
+            "description": package.description,
+            "exercises": [
+                {
+                    "exercise_id": ex.exercise_id,
+                    "order": ex.order,
+                    "notes": ex.notes,
+                    "name": ex.name,
+                    "type": ex.type,
+                    "category": ex.category,
+                }
+                for ex in package.exercises
+            ],
+            "is_public": package.is_public,
+            "created_at": package.created_at.isoformat(),
+            "updated_at": package.updated_at.isoformat(),
+            "version": package.version,
+        }
@@ -1,12 +1,19 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
+from collections import defaultdict
 from datetime import datetime
+from bson import ObjectId
 
 from ...domain.entities.workout_session import (
     WorkoutSessionEntity,
     ExerciseLog,
     StrengthSet,
     CardioSet,
+    SessionActivity,
 )
+from ...domain.entities.daily_activity import ACTIVITY_METRICS
+from ...domain.entities.personal_record import best_of, records_from_session
+from ...domain.entities.activity_year import activity_level
+from ...domain.exceptions import VersionConflictError
 from ...infrastructure.repositories.workout_session_repository import (
     WorkoutSessionRepository,
 )
@@ -15,6 +22,45 @@ from ...infrastructure.repositories.workout_package_repository import (
 )
 from ...infrastructure.repositories.exercise_repository import ExerciseRepository
 from ...infrastructure.repositories.user_repository import UserRepository
+from ...infrastructure.repositories.group_membership_repository import (
+    GroupMembershipRepository,
+)
+from ...infrastructure.repositories.daily_activity_repository import (
+    DailyActivityRepository,
+)
+from ...infrastructure.repositories.calendar_snapshot_repository import (
+    CalendarSnapshotRepository,
+)
+from ...infrastructure.repositories.sync_tombstone_repository import (
+    SyncTombstoneRepository,
+)
+from ...infrastructure.repositories.personal_record_repository import (
+    PersonalRecordRepository,
+)
+from ...infrastructure.repositories.activity_year_repository import (
+    ActivityYearRepository,
+)
+from ...infrastructure.repositories.muscle_volume_repository import (
+    MuscleVolumeRepository,
+)
+from ...core.projection import build_projection
+from ...core.timezones import EARLIEST_TIMEZONE, day_bucket, local_day, local_today, week_start
+
+# Response fields selectable with ?fields=, mapped to the document fields they read
+SESSION_FIELDS = {
+    "id": (),
+    "user_id": ("user_id",),
+    "package_id": ("package_id",),
+    "package_name": ("package_name",),
+    "exercises": ("exercises",),
+    "exercise_count": ("exercises",),
+    "start_time": ("start_time",),
+    "end_time": ("end_time",),
+    "duration_minutes": ("duration_minutes",),
+    "is_completed": ("is_completed",),
+    "total_calories": ("exercises", "duration_minutes"),
+    "version": ("version",),
+}
 
 # --- Tabela básica de METs ---
 MET_VALUES = {
@@ -80,11 +126,25 @@ class WorkoutSessionUseCases:
         package_repository: WorkoutPackageRepository,
         exercise_repository: ExerciseRepository,
         user_repository: UserRepository,
+        membership_repository: GroupMembershipRepository,
+        activity_repository: DailyActivityRepository,
+        snapshot_repository: CalendarSnapshotRepository,
+        tombstone_repository: SyncTombstoneRepository,
+        record_repository: PersonalRecordRepository,
+        activity_year_repository: ActivityYearRepository,
+        muscle_volume_repository: MuscleVolumeRepository,
     ):
         self.session_repository = session_repository
         self.package_repository = package_repository
         self.exercise_repository = exercise_repository
         self.user_repository = user_repository
+        self.membership_repository = membership_repository
+        self.activity_repository = activity_repository
+        self.snapshot_repository = snapshot_repository
+        self.tombstone_repository = tombstone_repository
+        self.record_repository = record_repository
+        self.activity_year_repository = activity_year_repository
+        self.muscle_volume_repository = muscle_volume_repository
 
     async def start_session(self, user_id: str, package_id: str) -> str:
         """Start a new workout session"""
@@ -93,22 +153,37 @@ class WorkoutSessionUseCases:
         if not package:
             raise ValueError("Package not found")
 
+        # Packages embed exercise snapshots; only legacy entries need the catalog
+        missing_ids = [
+            ex.exercise_id
+            for ex in package.exercises
+            if not (ex.name and ex.type) and ObjectId.is_valid(ex.exercise_id)
+        ]
+        catalog = {}
+        if missing_ids:
+            catalog = {
+                str(ex.id): ex for ex in await self.exercise_repository.find_by_ids(missing_ids)
+            }
+
         # Build exercise logs with exercise details
         exercise_logs = []
         for pkg_exercise in package.exercises:
-            exercise = await self.exercise_repository.find_by_id(
-                pkg_exercise.exercise_id
-            )
-            if exercise:
-                exercise_logs.append(
-                    ExerciseLog(
-                        exercise_id=str(exercise.id),
-                        exercise_name=exercise.name,
-                        type=exercise.type,
-                        sets=[],
-                        notes=pkg_exercise.notes,
-                    )
+            if pkg_exercise.name and pkg_exercise.type:
+                name, exercise_type = pkg_exercise.name, pkg_exercise.type
+            elif pkg_exercise.exercise_id in catalog:
+                exercise = catalog[pkg_exercise.exercise_id]
+                name, exercise_type = exercise.name, exercise.type
+            else:
+                continue
+            exercise_logs.append(
+                ExerciseLog(
+                    exercise_id=pkg_exercise.exercise_id,
+                    exercise_name=name,
+                    type=exercise_type,
+                    sets=[],
+                    notes=pkg_exercise.notes,
                 )
+            )
 
         session = WorkoutSessionEntity(
             user_id=user_id,
@@ -121,35 +196,192 @@ class WorkoutSessionUseCases:
         return await self.session_repository.create(session)
 
     async def update_session(
-        self, session_id: str, user_id: str, exercises: List[dict]
-    ) -> bool:
-        """Update session with exercise data"""
+        self,
+        session_id: str,
+        user_id: str,
+        exercises: List[dict],
+        expected_version: Optional[int] = None,
+    ) -> int:
+        """Update session with exercise data and return its new version"""
         session = await self.session_repository.find_by_id(session_id)
         if not session or session.user_id != user_id:
             raise ValueError("Session not found or unauthorized")
 
+        if expected_version is not None and expected_version != session.version:
+            raise VersionConflictError(session.version)
+
         # Update exercises
-        updated_exercises = []
-        for ex_data in exercises:
-            sets = []
-            for set_data in ex_data.get("sets", []):
-                if ex_data["type"] == "strength":
-                    sets.append(StrengthSet(**set_data))
-                else:
-                    sets.append(CardioSet(**set_data))
-
-            updated_exercises.append(
-                ExerciseLog(
-                    exercise_id=ex_data["exercise_id"],
-                    exercise_name=ex_data["exercise_name"],
-                    type=ex_data["type"],
-                    sets=sets,
-                    notes=ex_data.get("notes"),
+        session.exercises = [self._build_exercise_log(ex_data) for ex_data in exercises]
+        previous_activity = session.activity
+        session.activity = await self._build_activity(session)
+        if await self.session_repository.update(session_id, session):
+            await self._apply_activity_change(user_id, previous_activity, session.activity)
+            if session.is_completed:
+                await self._resync_records(session)
+        return session.version
+
+    async def add_exercise(self, session_id: str, user_id: str, exercise_data: dict) -> dict:
+        """Append a single exercise to a session"""
+        exercise_log = self._build_exercise_log(exercise_data)
+        session_data = await self.session_repository.push_exercise(session_id, user_id, exercise_log)
+        if not session_data:
+            raise ValueError("Session not found or unauthorized")
+        if session_data.get("is_completed"):
+            await self._resync_activity(session_id)
+        return self._format_exercise(exercise_log)
+
+    async def update_exercise_notes(
+        self, session_id: str, user_id: str, exercise_id: str, notes: Optional[str]
+    ) -> dict:
+        """Update the notes of a single exercise in a session"""
+        if not await self.session_repository.set_exercise_notes(session_id, user_id, exercise_id, notes):
+            raise ValueError("Session or exercise not found or unauthorized")
+        return {"exercise_id": exercise_id, "notes": notes}
+
+    async def remove_exercise(self, session_id: str, user_id: str, exercise_id: str) -> bool:
+        """Remove a single exercise from a session"""
+        session_data = await self.session_repository.pull_exercise(session_id, user_id, exercise_id)
+        if not session_data:
+            raise ValueError("Session or exercise not found or unauthorized")
+        if session_data.get("is_completed"):
+            await self._resync_activity(session_id)
+        return True
+
+    async def add_set(
+        self, session_id: str, user_id: str, exercise_id: str, set_data: dict
+    ) -> dict:
+        """Append a single set to an exercise in a session"""
+        exercise_type, set_entity = self._build_set(set_data)
+        session_data = await self.session_repository.push_set(
+            session_id, user_id, exercise_id, exercise_type, set_entity.model_dump()
+        )
+        if not session_data:
+            raise ValueError("Session or exercise not found or unauthorized")
+        if session_data.get("is_completed"):
+            await self._resync_activity(session_id)
+        set_index = len(session_data["exercises"][0]["sets"]) - 1
+        return {"exercise_id": exercise_id, "set_index": set_index, "set": set_entity.model_dump()}
+
+    async def update_set(
+        self, session_id: str, user_id: str, exercise_id: str, set_index: int, set_data: dict
+    ) -> dict:
+        """Replace a single set of an exercise in a session"""
+        exercise_type, set_entity = self._build_set(set_data)
+        session_data = await self.session_repository.set_set(
+            session_id, user_id, exercise_id, exercise_type, set_index, set_entity.model_dump()
+        )
+        if not session_data:
+            raise ValueError("Session, exercise or set not found or unauthorized")
+        if session_data.get("is_completed"):
+            await self._resync_activity(session_id)
+        return {"exercise_id": exercise_id, "set_index": set_index, "set": set_entity.model_dump()}
+
+    async def remove_set(
+        self, session_id: str, user_id: str, exercise_id: str, set_index: int
+    ) -> bool:
+        """Remove a single set of an exercise in a session"""
+        session_data = await self.session_repository.pull_set(session_id, user_id, exercise_id, set_index)
+        if not session_data:
+            raise ValueError("Session, exercise or set not found or unauthorized")
+        if session_data.get("is_completed"):
+            await self._resync_activity(session_id)
+        return True
+
+    async def apply_set_mutations(self, user_id: str, operations: List[dict]) -> List[dict]:
+        """Replay offline set edits in order, writing each touched session once.
+
+        Operations are dicts with type ("add_set" or "update_set"), session_id,
+        exercise_id, set and, for updates, set_index.
+        """
+        results: List[dict] = [{} for _ in operations]
+        session_ids = list(
+            dict.fromkeys(op["session_id"] for op in operations if ObjectId.is_valid(op["session_id"]))
+        )
+        sessions = {}
+        if session_ids:
+            sessions = {
+                str(s.id): s
+                for s in await self.session_repository.find_by_ids_for_user(session_ids, user_id)
+            }
+
+        touched = defaultdict(list)
+        for position, op in enumerate(operations):
+            session = sessions.get(op["session_id"])
+            exercise = None
+            if session:
+                exercise = next(
+                    (ex for ex in session.exercises if ex.exercise_id == op["exercise_id"]), None
                 )
-            )
+            if not exercise:
+                results[position] = {"error": "Session or exercise not found or unauthorized"}
+                continue
+
+            exercise_type, set_entity = self._build_set(op["set"])
+            if exercise.type != exercise_type:
+                results[position] = {"error": "Set does not match the exercise type"}
+                continue
+
+            if op["type"] == "add_set":
+                exercise.sets.append(set_entity)
+                set_index = len(exercise.sets) - 1
+            else:
+                set_index = op["set_index"]
+                if set_index >= len(exercise.sets):
+                    results[position] = {"error": "Set not found"}
+                    continue
+                exercise.sets[set_index] = set_entity
+
+            results[position] = {
+                "result": {
+                    "exercise_id": op["exercise_id"],
+                    "set_index": set_index,
+                    "set": set_entity.model_dump(),
+                }
+            }
+            touched[op["session_id"]].append(position)
 
-        session.exercises = updated_exercises
-        return await self.session_repository.update(session_id, session)
+        written = await self.session_repository.replace_exercises_many(
+            [sessions[session_id] for session_id in touched]
+        )
+        for session_id, positions in touched.items():
+            if not written[session_id]:
+                for position in positions:
+                    results[position] = {"error": "Session was modified by another request"}
+            elif sessions[session_id].is_completed:
+                await self._resync_activity(session_id)
+
+        return results
+
+    def _build_set(self, set_data: dict) -> Tuple[str, Union[StrengthSet, CardioSet]]:
+        """Build a set entity, inferring the exercise type from its fields"""
+        if "duration_minutes" in set_data:
+            return "cardio", CardioSet(**set_data)
+        return "strength", StrengthSet(**set_data)
+
+    def _build_exercise_log(self, ex_data: dict) -> ExerciseLog:
+        sets = []
+        for set_data in ex_data.get("sets", []):
+            if ex_data["type"] == "strength":
+                sets.append(StrengthSet(**set_data))
+            else:
+                sets.append(CardioSet(**set_data))
+
+        return ExerciseLog(
+            exercise_id=ex_data["exercise_id"],
+            exercise_name=ex_data["exercise_name"],
+            type=ex_data["type"],
+            sets=sets,
+            notes=ex_data.get("notes"),
+        )
+
+    def _format_exercise(self, exercise_log: ExerciseLog) -> dict:
+        return {
+            "exercise_id": exercise_log.exercise_id,
+            "exercise_name": exercise_log.exercise_name,
+            "type": exercise_log.type,
+            "sets": [s.model_dump() for s in exercise_log.sets],
+            "notes": exercise_log.notes,
+        }
 
     async def complete_session(self, session_id: str, user_id: str) -> bool:
         """Complete a workout session"""
@@ -164,7 +396,16 @@ class WorkoutSessionUseCases:
         duration = (session.end_time - session.start_time).total_seconds() / 60
         session.duration_minutes = int(duration)
 
-        return await self.session_repository.update(session_id, session)
+        previous_activity = session.activity
+        session.activity = await self._build_activity(session)
+        session.records_indexed = True
+        updated = await self.session_repository.update(session_id, session)
+        if updated:
+            await self._apply_activity_change(user_id, previous_activity, session.activity)
+            await self._resync_records(session)
+            await self._invalidate_calendars(session)
+
+        return updated
 
     async def delete_session(self, session_id: str, user_id: str) -> bool:
         """Delete a workout session"""
@@ -172,19 +413,276 @@ class WorkoutSessionUseCases:
         if not session or session.user_id != user_id:
             raise ValueError("Session not found or unauthorized")
 
-        return await self.session_repository.delete(session_id)
+        deleted = await self.session_repository.delete(session_id)
+        if deleted:
+            await self.tombstone_repository.record(user_id, "workout_sessions", session_id)
+            await self._apply_activity_change(user_id, session.activity, None)
+            if session.is_completed:
+                held = await self.record_repository.find_exercise_ids_held_by_session(user_id, session_id)
+                await self._rebuild_records(user_id, held)
+                await self._invalidate_calendars(session)
+
+        return deleted
+
+    async def _invalidate_calendars(self, session: WorkoutSessionEntity) -> None:
+        """Drop cached calendar months that list this session"""
+        day = local_day(session.start_time, await self.user_repository.find_timezone(session.user_id))
+        year, month = day.year, day.month
+        if not self.snapshot_repository.is_past_month(year, month, local_today(EARLIEST_TIMEZONE)):
+            return  # a month still running in every zone is never cached
+        await self.snapshot_repository.invalidate("user", [session.user_id], year, month)
+        group_ids = await self.membership_repository.find_group_ids_by_user(session.user_id)
+        await self.snapshot_repository.invalidate("group", group_ids, year, month)
+
+    async def backfill_activity(self) -> int:
+        """Count completed sessions that predate the daily activity rollups, once"""
+        if await self.session_repository.activity_backfilled():
+            return 0
+        backfilled = 0
+        while True:
+            sessions = await self.session_repository.find_completed_without_activity()
+            if not sessions:
+                await self.session_repository.mark_activity_backfilled()
+                return backfilled
+            for session in sessions:
+                session.activity = await self._build_activity(session)
+                # Every worker runs this at startup: only the one that sets it counts it
+                if not await self.session_repository.set_activity(
+                    str(session.id), session.activity, None
+                ):
+                    continue
+                # Membership counters were seeded from completed sessions already
+                await self._apply_activity_change(
+                    session.user_id, None, session.activity, count_workouts=False
+                )
+                backfilled += 1
+
+    async def backfill_activity_years(self) -> int:
+        """Seed the yearly day bitmaps and levels from the daily activity buckets, once"""
+        if not await self.activity_year_repository.needs_backfill():
+            return 0
+        backfilled = 0
+        for bucket in self.activity_repository.iter_with_workouts():
+            await self.activity_year_repository.set_day(
+                bucket.user_id, bucket.day.date(), activity_level(bucket)
+            )
+            backfilled += 1
+        await self.activity_year_repository.mark_backfilled()
+        return backfilled
+
+    async def backfill_personal_records(self) -> int:
+        """Apply completed sessions that predate the personal records index"""
+        backfilled = 0
+        while True:
+            sessions = await self.session_repository.find_completed_without_records()
+            if not sessions:
+                return backfilled
+            # Records only ever move up, so applying a session twice is harmless
+            await self.record_repository.apply_many(
+                [record for s in sessions for record in records_from_session(s).values()]
+            )
+            await self.session_repository.mark_records_indexed([str(s.id) for s in sessions])
+            backfilled += len(sessions)
+
+    async def _resync_records(self, session: WorkoutSessionEntity) -> None:
+        """Bring the personal records in line with a completed session's sets"""
+        # Records this session holds may have gone down, so those are rebuilt from history
+        held = await self.record_repository.find_exercise_ids_held_by_session(
+            session.user_id, str(session.id)
+        )
+        await self._rebuild_records(session.user_id, held)
+        await self.record_repository.apply_many(
+            [r for exercise_id, r in records_from_session(session).items() if exercise_id not in held]
+        )
+
+    async def _rebuild_records(self, user_id: str, exercise_ids: List[str]) -> None:
+        """Recompute some exercises' records from every completed session"""
+        for exercise_id in exercise_ids:
+            sessions = await self.session_repository.find_completed_with_exercise(user_id, exercise_id)
+            await self.record_repository.replace(user_id, exercise_id, best_of(sessions, exercise_id))
 
-    async def get_session(self, session_id: str, user_id: str) -> Optional[dict]:
+    async def _build_activity(self, session: WorkoutSessionEntity) -> Optional[SessionActivity]:
+        """Work out what a session contributes to its day's activity bucket"""
+        if not session.is_completed:
+            return None
+
+        user = await self.user_repository.find_by_id(session.user_id)
+        volume = sum(
+            s.weight * s.reps
+            for ex in session.exercises
+            if ex.type == "strength"
+            for s in ex.sets
+            if isinstance(s, StrengthSet)
+        )
+        return SessionActivity(
+            day=day_bucket(session.start_time, user.timezone if user else None),
+            workouts=1,
+            volume=volume,
+            duration_minutes=session.duration_minutes or 0,
+            calories=calculate_calories(session.model_dump(), user.weight if user else None) or 0,
+        )
+
+    async def _resync_activity(self, session_id: str) -> None:
+        """Recompute a completed session's rollups and records after a partial edit"""
+        # Concurrent edits may read the same previous activity: only the one whose
+        # swap lands applies its delta, the others start over from the new value
+        while True:
+            session = await self.session_repository.find_by_id(session_id)
+            if not session:
+                return
+            previous_activity = session.activity
+            session.activity = await self._build_activity(session)
+            if await self.session_repository.set_activity(
+                session_id, session.activity, previous_activity
+            ):
+                break
+        await self._apply_activity_change(session.user_id, previous_activity, session.activity)
+        if session.is_completed:
+            await self._resync_records(session)
+
+    async def _apply_activity_change(
+        self,
+        user_id: str,
+        previous: Optional[SessionActivity],
+        current: Optional[SessionActivity],
+        count_workouts: bool = True,
+    ) -> None:
+        """Move a session's contribution in the rollups from previous to current"""
+        changes = defaultdict(lambda: defaultdict(int))
+        if previous:
+            for metric in ACTIVITY_METRICS:
+                changes[previous.day][metric] -= getattr(previous, metric)
+        if current:
+            for metric in ACTIVITY_METRICS:
+                changes[current.day][metric] += getattr(current, metric)
+
+        for day, deltas in changes.items():
+            deltas = {metric: value for metric, value in deltas.items() if value}
+            if deltas:
+                bucket = await self.activity_repository.increment(user_id, day, deltas)
+                await self._set_activity_day(user_id, day, activity_level(bucket))
+
+        # Sets may have moved between exercises without changing the day's totals.
+        # The live week is never stored, so only past weeks need a new version.
+        weeks = {week_start(day) for day in changes}
+        if weeks:
+            today = local_today(await self.user_repository.find_timezone(user_id))
+            weeks.discard(week_start(datetime.combine(today, datetime.min.time())))
+            await self.muscle_volume_repository.invalidate(user_id, sorted(weeks))
+
+        # Keep group leaderboard counters in step
+        workouts = (current.workouts if current else 0) - (previous.workouts if previous else 0)
+        if count_workouts and workouts:
+            await self.membership_repository.increment_workout_count(user_id, workouts)
+
+    async def _set_activity_day(self, user_id: str, day: datetime, level: int) -> None:
+        """Write a day's heatmap level and streak bit, until it matches the bucket"""
+        # A concurrent increment's older level may land after ours. Whoever writes
+        # last re-reads after every increment before it, so it settles on the right one.
+        while True:
+            await self.activity_year_repository.set_day(user_id, day.date(), level)
+            bucket = await self.activity_repository.find_one(user_id, day)
+            fresh = activity_level(bucket) if bucket else 0
+            if fresh == level:
+                return
+            level = fresh
+
+    async def get_session(
+        self, session_id: str, user_id: str, fields: Optional[List[str]] = None
+    ) -> Optional[dict]:
         """Get session by ID"""
+        if fields:
+            projection = build_projection(fields, SESSION_FIELDS)
+            projection["user_id"] = 1
+            doc = await self.session_repository.find_by_id(session_id, projection)
+            if not doc or doc["user_id"] != user_id:
+                return None
+            weight = await self._weight_for_fields(user_id, fields)
+            return self._format_session_fields(doc, fields, weight)
+
         session = await self.session_repository.find_by_id(session_id)
         if not session or session.user_id != user_id:
             return None
 
         user = await self.user_repository.find_by_id(user_id) # Buscar usuário para pegar o peso
+        return self._format_session(session, user.weight if user else None)
+
+    async def get_sessions_by_ids(
+        self, session_ids: List[str], user_id: str, fields: Optional[List[str]] = None
+    ) -> List[dict]:
+        """Get several of the user's sessions in one query, in the requested order"""
+        if fields:
+            docs = {
+                doc["_id"]: doc
+                for doc in await self.session_repository.find_by_ids_for_user(
+                    session_ids, user_id, build_projection(fields, SESSION_FIELDS)
+                )
+            }
+            weight = await self._weight_for_fields(user_id, fields) if docs else None
+            return [
+                self._format_session_fields(docs[session_id], fields, weight)
+                for session_id in session_ids
+                if session_id in docs
+            ]
+
+        sessions = {
+            str(s.id): s
+            for s in await self.session_repository.find_by_ids_for_user(session_ids, user_id)
+        }
+        if not sessions:
+            return []
+
+        user = await self.user_repository.find_by_id(user_id)
+        weight = user.weight if user else None
+        return [
+            self._format_session(sessions[session_id], weight)
+            for session_id in session_ids
+            if session_id in sessions
+        ]
+
+    async def get_changed_since(self, user_id: str, since: Optional[datetime]) -> List[dict]:
+        """Sessions changed since a sync point, formatted like get_session"""
+        sessions = await self.session_repository.find_updated_since(user_id, since)
+        if not sessions:
+            return []
+        user = await self.user_repository.find_by_id(user_id)
+        weight = user.weight if user else None
+        return [self._format_session(s, weight) for s in sessions]
+
+    async def _weight_for_fields(self, user_id: str, fields: List[str]) -> Optional[float]:
+        """User weight, only looked up when calories were requested"""
+        if "total_calories" not in fields:
+            return None
+        user = await self.user_repository.find_by_id(user_id)
+        return user.weight if user else None
+
+    def _format_session_fields(
+        self, doc: dict, fields: List[str], weight: Optional[float]
+    ) -> dict:
+        """Format only the requested fields from a projected session document"""
+        getters = {
+            "id": lambda: doc["_id"],
+            "user_id": lambda: doc.get("user_id"),
+            "package_id": lambda: doc.get("package_id"),
+            "package_name": lambda: doc.get("package_name"),
+            "exercises": lambda: [
+                self._format_exercise(ExerciseLog(**ex)) for ex in doc.get("exercises", [])
+            ],
+            "exercise_count": lambda: len(doc.get("exercises", [])),
+            "start_time": lambda: doc["start_time"].isoformat() if doc.get("start_time") else None,
+            "end_time": lambda: doc["end_time"].isoformat() if doc.get("end_time") else None,
+            "duration_minutes": lambda: doc.get("duration_minutes"),
+            "is_completed": lambda: doc.get("is_completed", False),
+            "total_calories": lambda: calculate_calories(doc, weight),
+            "version": lambda: doc.get("version", 0),
+        }
+        return {field: getters[field]() for field in fields}
+
+    def _format_session(self, session: WorkoutSessionEntity, weight: Optional[float]) -> dict:
         session_dict = session.model_dump() # Converter Pydantic model para dict
 
         # Calcular calorias
-        total_calories = calculate_calories(session_dict, user.weight if user else None)
+        total_calories = calculate_calories(session_dict, weight)
 
         # Formatar resposta
         return {
@@ -192,27 +690,26 @@ class WorkoutSessionUseCases:
             "user_id": session.user_id,
             "package_id": session.package_id,
             "package_name": session.package_name,
-            "exercises": [
-                {
-                    "exercise_id": ex.exercise_id,
-                    "exercise_name": ex.exercise_name,
-                    "type": ex.type,
-                    "sets": [s.model_dump() for s in ex.sets],
-                    "notes": ex.notes,
-                }
-                for ex in session.exercises
-            ],
+            "exercises": [self._format_exercise(ex) for ex in session.exercises],
             "start_time": session.start_time.isoformat(),
             "end_time": session.end_time.isoformat() if session.end_time else None,
             "duration_minutes": session.duration_minutes,
             "is_completed": session.is_completed,
-            "total_calories": total_calories # Adicionar calorias
+            "total_calories": total_calories, # Adicionar calorias
+            "version": session.version,
         }
 
     async def get_user_sessions(
-        self, user_id: str, limit: int = 50, skip: int = 0
+        self, user_id: str, limit: int = 50, skip: int = 0, fields: Optional[List[str]] = None
     ) -> List[dict]:
         """Get all sessions for a user"""
+        if fields:
+            docs = await self.session_repository.find_by_user(
+                user_id, limit, skip, build_projection(fields, SESSION_FIELDS)
+            )
+            weight = await self._weight_for_fields(user_id, fields)
+            return [self._format_session_fields(doc, fields, weight) for doc in docs]
+
         sessions = await self.session_repository.find_by_user(user_id, limit, skip)
         user = await self.user_repository.find_by_id(user_id) # Buscar usuário uma vez
         weight = user.weight if user else None
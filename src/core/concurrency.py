@@ -0,0 +1,16 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List
+
+
+def run_in_thread(call: Callable[[], Awaitable[Any]]) -> Awaitable[Any]:
+    """Run a coroutine factory to completion on a worker thread"""
+    return asyncio.to_thread(lambda: asyncio.run(call()))
+
+
+async def gather_in_threads(*calls: Callable[[], Awaitable[Any]]) -> List[Any]:
+    """Run coroutine factories concurrently, each on a worker thread.
+
+    Repository methods are async but block on PyMongo, so a plain
+    asyncio.gather would still run them one after another.
+    """
+    return await asyncio.gather(*(run_in_thread(call) for call in calls))
@@ -19,6 +19,21 @@ class Settings(BaseSettings):
     # Admin
     ADMIN_SECRET_KEY: str
     
+    # Batch requests
+    BATCH_MAX_REQUESTS: int = 20
+    BATCH_TIMEOUT_SECONDS: float = 10.0
+    
+    # Delta sync
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+    SYNC_OVERLAP_SECONDS: int = 5
+    MUTATION_MAX_OPERATIONS: int = 200
+    IDEMPOTENCY_TTL_HOURS: int = 24
+    
+    # Water log write-behind buffer (per worker)
+    WATER_BUFFER_ENABLED: bool = False
+    WATER_BUFFER_MAX_SIZE: int = 100
+    WATER_BUFFER_MAX_SECONDS: float = 5.0
+    
     # CORS
     CORS_ORIGINS: list = [
         "https://atlas.btreedevs.com.br",
@@ -0,0 +1,41 @@
+from typing import List, Sequence
+
+
+def lttb_indices(xs: Sequence[float], ys: Sequence[float], max_points: int) -> List[int]:
+    """Indices kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, for every bucket in between, the
+    point forming the largest triangle with the previous pick and the next
+    bucket's average, so peaks and dips survive. xs must be sorted.
+    """
+    n = len(xs)
+    if max_points >= n or max_points < 3:
+        return list(range(n))
+
+    picked = [0]
+    bucket_size = (n - 2) / (max_points - 2)
+    a = 0
+    for i in range(max_points - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+
+        # Average of the next bucket (the last point for the final bucket)
+        next_start, next_end = end, min(int((i + 2) * bucket_size) + 1, n)
+        if next_start >= n - 1:
+            next_start, next_end = n - 1, n
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs(
+                (xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a])
+            )
+            if area > best_area:
+                best, best_area = j, area
+        picked.append(best)
+        a = best
+
+    picked.append(n - 1)
+    return picked
@@ -0,0 +1,10 @@
+from typing import Dict, Iterable, Sequence
+
+
+def build_projection(fields: Iterable[str], sources: Dict[str, Sequence[str]]) -> dict:
+    """Mongo projection covering the document fields behind the requested response fields"""
+    projection = {"_id": 1}
+    for field in fields:
+        for source in sources[field]:
+            projection[source] = 1
+    return projection
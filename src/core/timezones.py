@@ -0,0 +1,62 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Stored datetimes are naive UTC; users pick an IANA zone for day boundaries
+DEFAULT_TIMEZONE = "UTC"
+
+# Earliest and latest zones on Earth: a month has ended somewhere once it has
+# ended in the earliest, and everywhere once it has ended in the latest
+EARLIEST_TIMEZONE = "Etc/GMT-14"
+LATEST_TIMEZONE = "Etc/GMT+12"
+
+
+def is_valid_timezone(name: str) -> bool:
+    """Whether the name is a known IANA timezone"""
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def get_zone(name: Optional[str]) -> ZoneInfo:
+    """Resolve a timezone name, falling back to UTC"""
+    if name and is_valid_timezone(name):
+        return ZoneInfo(name)
+    return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def to_local(moment: datetime, tz: Optional[str]) -> datetime:
+    """Naive UTC datetime to naive local wall time"""
+    return moment.replace(tzinfo=timezone.utc).astimezone(get_zone(tz)).replace(tzinfo=None)
+
+
+def to_utc(local: datetime, tz: Optional[str]) -> datetime:
+    """Naive local wall time to naive UTC datetime"""
+    return local.replace(tzinfo=get_zone(tz)).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def local_day(moment: datetime, tz: Optional[str]) -> date:
+    """Calendar day a naive UTC datetime falls on for the user"""
+    return to_local(moment, tz).date()
+
+
+def local_today(tz: Optional[str]) -> date:
+    """Today's date in the given timezone"""
+    return local_day(datetime.utcnow(), tz)
+
+
+def day_bucket(moment: datetime, tz: Optional[str]) -> datetime:
+    """Key of the daily bucket a moment belongs to: local midnight, stored naive"""
+    return datetime.combine(local_day(moment, tz), datetime.min.time())
+
+
+def week_start(day: datetime) -> datetime:
+    """Key of the weekly bucket a daily bucket belongs to: its Monday"""
+    return day - timedelta(days=day.weekday())
+
+
+def local_midnight_utc(day: date, tz: Optional[str]) -> datetime:
+    """UTC instant at which a local calendar day starts"""
+    return to_utc(datetime.combine(day, datetime.min.time()), tz)
@@ -0,0 +1,69 @@
+import threading
+import time
+from typing import Callable, List
+
+
+class WriteBuffer:
+    """In-process buffer of pending documents, drained in batches.
+
+    Repository calls may run on worker threads (see gather_in_threads),
+    so every access goes through a lock. Drained documents stay visible
+    to pending() until the batch is acknowledged, so readers never miss
+    a write that is halfway into the database.
+    """
+
+    def __init__(self, max_size: int = 100, max_seconds: float = 5.0):
+        self.max_size = max_size
+        self.max_seconds = max_seconds
+        self._docs: List[dict] = []
+        self._in_flight: List[dict] = []
+        self._oldest: float = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, doc: dict) -> bool:
+        """Queue a document; True when the buffer is due for a flush"""
+        with self._lock:
+            if not self._docs:
+                self._oldest = time.monotonic()
+            self._docs.append(doc)
+            return self._due()
+
+    def is_due(self) -> bool:
+        """Whether the size or age threshold has been reached"""
+        with self._lock:
+            return self._due()
+
+    def drain(self) -> List[dict]:
+        """Take every queued document out for writing"""
+        with self._lock:
+            batch, self._docs = self._docs, []
+            self._in_flight.extend(batch)
+            return batch
+
+    def ack(self, batch: List[dict]) -> None:
+        """Forget a batch once it has been written"""
+        written = {id(doc) for doc in batch}
+        with self._lock:
+            self._in_flight = [doc for doc in self._in_flight if id(doc) not in written]
+
+    def restore(self, batch: List[dict]) -> None:
+        """Requeue a batch whose write failed, ahead of newer documents"""
+        self.ack(batch)
+        if not batch:
+            return
+        with self._lock:
+            self._docs = batch + self._docs
+            self._oldest = time.monotonic()
+
+    def pending(self, predicate: Callable[[dict], bool]) -> List[dict]:
+        """Snapshot of queued and in-flight documents matching the predicate"""
+        with self._lock:
+            return [doc for doc in self._in_flight + self._docs if predicate(doc)]
+
+    def _due(self) -> bool:
+        if not self._docs:
+            return False
+        return (
+            len(self._docs) >= self.max_size
+            or time.monotonic() - self._oldest >= self.max_seconds
+        )
@@ -0,0 +1,111 @@
+from calendar import isleap
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set
+from pydantic import BaseModel, Field
+from .user import PyObjectId
+from .daily_activity import DailyActivityEntity
+
+# Days of the year are bits spread over small integer words, so single days can
+# be flipped atomically with $bit; 12 words of 32 bits cover a leap year
+DAY_WORD_BITS = 32
+
+# Heatmap levels take 3 bits per day, packed 10 days to a word (37 words)
+LEVEL_BITS = 3
+LEVELS_PER_WORD = 10
+MAX_LEVEL = 4
+
+
+def day_position(day: date) -> tuple:
+    """(word, bit) of a day within its year's bitmap"""
+    index = day.timetuple().tm_yday - 1
+    return index // DAY_WORD_BITS, index % DAY_WORD_BITS
+
+
+def level_position(day: date) -> tuple:
+    """(word, shift) of a day's level within its year's packed levels"""
+    index = day.timetuple().tm_yday - 1
+    return index // LEVELS_PER_WORD, (index % LEVELS_PER_WORD) * LEVEL_BITS
+
+
+def activity_level(bucket: DailyActivityEntity) -> int:
+    """Heatmap level of a day: 0 without workouts, then one step per 30 minutes trained"""
+    if bucket.workouts <= 0:
+        return 0
+    return min(1 + bucket.duration_minutes // 30, MAX_LEVEL)
+
+
+class ActivityYearEntity(BaseModel):
+    """Which days of one year a user completed a workout on"""
+
+    id: Optional[PyObjectId] = Field(default=None, alias="_id")
+    user_id: str
+    year: int
+    days: Dict[str, int] = {}  # word index -> bits
+    levels: Dict[str, int] = {}  # word index -> packed 3-bit levels
+
+    model_config = {
+        "populate_by_name": True,
+        "arbitrary_types_allowed": True,
+        "json_encoders": {PyObjectId: str},
+    }
+
+    def active_days(self) -> List[date]:
+        """Days with a workout, in order"""
+        first = date(self.year, 1, 1)
+        found = []
+        for word_index in sorted(self.days, key=int):
+            bits = self.days[word_index]
+            base = int(word_index) * DAY_WORD_BITS
+            for bit in range(DAY_WORD_BITS):
+                if bits >> bit & 1:
+                    found.append(first + timedelta(days=base + bit))
+        return found
+
+
+    def level_string(self) -> str:
+        """One digit per day of the year, 0 to MAX_LEVEL"""
+        day_count = 366 if isleap(self.year) else 365
+        mask = (1 << LEVEL_BITS) - 1
+        digits = []
+        for index in range(day_count):
+            word = self.levels.get(str(index // LEVELS_PER_WORD), 0)
+            digits.append(str(word >> (index % LEVELS_PER_WORD) * LEVEL_BITS & mask))
+        return "".join(digits)
+
+
+def compute_streaks(active: Set[date], today: date) -> Dict[str, int]:
+    """Current and longest runs of consecutive active days and weeks.
+
+    A current streak stays alive until the period after the last active one
+    ends, so it isn't broken just because today's workout hasn't happened yet.
+    """
+    weeks = {d - timedelta(days=d.weekday()) for d in active}
+    this_week = today - timedelta(days=today.weekday())
+    return {
+        "current_streak": _current_run(active, today, timedelta(days=1)),
+        "longest_streak": _longest_run(active, timedelta(days=1)),
+        "current_week_streak": _current_run(weeks, this_week, timedelta(weeks=1)),
+        "longest_week_streak": _longest_run(weeks, timedelta(weeks=1)),
+    }
+
+
+def _current_run(periods: Set[date], latest: date, step: timedelta) -> int:
+    cursor = latest if latest in periods else latest - step
+    run = 0
+    while cursor in periods:
+        run += 1
+        cursor -= step
+    return run
+
+
+def _longest_run(periods: Set[date], step: timedelta) -> int:
+    longest = 0
+    for start in periods:
+        if start - step in periods:
+            continue  # not the first period of a run
+        run, cursor = 0, start
+        while cursor in periods:
+            run += 1
+            cursor += step
+        longest = max(longest, run)
+    return longest
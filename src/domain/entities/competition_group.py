@@ -32,21 +32,15 @@ class PyObjectId(ObjectId):
         return handler(core_schema.str_schema())
 
 
-class GroupMember(BaseModel):
-    user_id: str
-    username: str
-    joined_at: datetime = Field(default_factory=datetime.utcnow)
-    workout_count: int = 0
-
-
 class CompetitionGroupEntity(BaseModel):
     id: Optional[PyObjectId] = Field(default=None, alias="_id")
     name: str
     description: Optional[str] = None
     owner_id: str
-    members: list[GroupMember] = []
+    member_count: int = 0  # members live in the group_memberships collection
     invite_code: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    version: int = 0
 
     model_config = {
         "populate_by_name": True,
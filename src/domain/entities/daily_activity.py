@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+from .user import PyObjectId
+
+# Summable metrics kept in each daily bucket
+ACTIVITY_METRICS = ("workouts", "volume", "duration_minutes", "calories")
+
+
+class DailyActivityEntity(BaseModel):
+    """Per-user, per-day rollup of completed workouts and water intake"""
+
+    id: Optional[PyObjectId] = Field(default=None, alias="_id")
+    user_id: str
+    day: datetime  # the user's local calendar day, stored as naive midnight
+    workouts: int = 0
+    volume: float = 0
+    duration_minutes: int = 0
+    calories: float = 0
+    water_ml: int = 0  # not in ACTIVITY_METRICS: water doesn't count for groups
+
+    model_config = {
+        "populate_by_name": True,
+        "arbitrary_types_allowed": True,
+        "json_encoders": {PyObjectId: str},
+    }
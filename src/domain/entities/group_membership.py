@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+from .user import PyObjectId
+
+
+class GroupMembershipEntity(BaseModel):
+    id: Optional[PyObjectId] = Field(default=None, alias="_id")
+    group_id: str
+    user_id: str
+    username: str
+    joined_at: datetime = Field(default_factory=datetime.utcnow)
+    workout_count: int = 0  # all-time completed workouts, maintained as a counter
+
+    model_config = {
+        "populate_by_name": True,
+        "arbitrary_types_allowed": True,
+        "json_encoders": {PyObjectId: str},
+    }
@@ -0,0 +1,101 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from pydantic import BaseModel, Field
+from .user import PyObjectId
+from .workout_session import StrengthSet, WorkoutSessionEntity
+
+# Kinds of record kept per exercise, each a single best set
+RECORD_KINDS = ("best_weight", "best_e1rm", "best_volume")
+
+
+def estimate_one_rep_max(weight: float, reps: int) -> float:
+    """Epley estimate of the one-rep max for a set"""
+    if reps <= 1:
+        return weight
+    return round(weight * (1 + reps / 30), 1)
+
+
+class RecordSet(BaseModel):
+    """The set that holds a record"""
+    value: float
+    weight: float
+    reps: int
+    session_id: str
+    date: datetime
+
+
+class PersonalRecordEntity(BaseModel):
+    """A user's best sets for one exercise"""
+
+    id: Optional[PyObjectId] = Field(default=None, alias="_id")
+    user_id: str
+    exercise_id: str
+    exercise_name: str
+    best_weight: Optional[RecordSet] = None
+    best_e1rm: Optional[RecordSet] = None
+    best_volume: Optional[RecordSet] = None
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = {
+        "populate_by_name": True,
+        "arbitrary_types_allowed": True,
+        "json_encoders": {PyObjectId: str},
+    }
+
+    def merge(self, other: "PersonalRecordEntity") -> None:
+        """Keep the better set of each kind; ties go to the earlier set"""
+        for kind in RECORD_KINDS:
+            mine, theirs = getattr(self, kind), getattr(other, kind)
+            if theirs and (not mine or theirs.value > mine.value):
+                setattr(self, kind, theirs)
+
+
+def records_from_session(session: WorkoutSessionEntity) -> Dict[str, PersonalRecordEntity]:
+    """Best strength sets of a completed session, per exercise"""
+    records: Dict[str, PersonalRecordEntity] = {}
+    for exercise in session.exercises:
+        if exercise.type != "strength":
+            continue
+        for s in exercise.sets:
+            if not isinstance(s, StrengthSet) or s.reps <= 0:
+                continue
+            values = {
+                "best_weight": s.weight,
+                "best_e1rm": estimate_one_rep_max(s.weight, s.reps),
+                "best_volume": s.weight * s.reps,
+            }
+            candidate = PersonalRecordEntity(
+                user_id=session.user_id,
+                exercise_id=exercise.exercise_id,
+                exercise_name=exercise.exercise_name,
+                **{
+                    kind: RecordSet(
+                        value=value,
+                        weight=s.weight,
+                        reps=s.reps,
+                        session_id=str(session.id),
+                        date=session.start_time,
+                    )
+                    for kind, value in values.items()
+                },
+            )
+            if exercise.exercise_id in records:
+                records[exercise.exercise_id].merge(candidate)
+            else:
+                records[exercise.exercise_id] = candidate
+    return records
+
+
+def best_of(sessions: Iterable[WorkoutSessionEntity], exercise_id: str) -> Optional[PersonalRecordEntity]:
+    """Records of one exercise across several sessions, oldest first"""
+    best = None
+    for session in sorted(sessions, key=lambda s: s.start_time):
+        record = records_from_session(session).get(exercise_id)
+        if not record:
+            continue
+        if best:
+            best.merge(record)
+            best.exercise_name = record.exercise_name
+        else:
+            best = record
+    return best
@@ -12,6 +12,7 @@ class ReminderEntity(BaseModel):
     frequency_details: Optional[Union[List[int], int]] = None # List[0-6] for weekly, int(1-31) for monthly
     last_completed_date: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     model_config = {
         "populate_by_name": True,
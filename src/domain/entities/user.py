@@ -43,6 +43,7 @@ class UserEntity(BaseModel):
     weight: Optional[float] = None
     gender: Optional[str] = None
     birth_date: Optional[datetime] = None
+    timezone: str = "UTC"  # IANA name; sets where the user's days start
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -40,6 +40,10 @@ class ExerciseInPackage(BaseModel):
     exercise_id: str
     order: int
     notes: Optional[str] = None
+    # Snapshot of the catalog entry, refreshed when the exercise changes
+    name: Optional[str] = None
+    type: Optional[str] = None
+    category: Optional[str] = None
 
 
 class WorkoutPackageEntity(BaseModel):
@@ -51,6 +55,7 @@ class WorkoutPackageEntity(BaseModel):
     is_public: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    version: int = 0
 
     model_config = {
         "populate_by_name": True,
@@ -59,6 +59,15 @@ class ExerciseLog(BaseModel):
     notes: Optional[str] = None
 
 
+class SessionActivity(BaseModel):
+    """Contribution of a completed session to the daily activity rollups"""
+    day: datetime
+    workouts: int = 0
+    volume: float = 0
+    duration_minutes: int = 0
+    calories: float = 0
+
+
 class WorkoutSessionEntity(BaseModel):
     id: Optional[PyObjectId] = Field(default_factory=PyObjectId, alias="_id")
     user_id: str
@@ -70,6 +79,10 @@ class WorkoutSessionEntity(BaseModel):
     duration_minutes: Optional[int] = None
     is_completed: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    version: int = 0
+    activity: Optional[SessionActivity] = None  # what this session added to daily_activity
+    records_indexed: bool = False  # whether its sets were applied to personal_records
 
     model_config = {
         "populate_by_name": True,
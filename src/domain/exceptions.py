@@ -0,0 +1,6 @@
+class VersionConflictError(Exception):
+    """Raised when a document was modified since it was read"""
+
+    def __init__(self, current_version: int):
+        self.current_version = current_version
+        super().__init__("Resource was modified by another request")
@@ -0,0 +1,62 @@
+from typing import List, Optional
+from bson.int64 import Int64
+from pymongo.database import Database
+from datetime import date
+from ...domain.entities.activity_year import (
+    ActivityYearEntity,
+    LEVEL_BITS,
+    day_position,
+    level_position,
+)
+
+
+class ActivityYearRepository:
+    """Per-user, per-year bitmaps of workout days and their heatmap levels"""
+
+    def __init__(self, db: Database):
+        self.collection = db["activity_years"]
+        self._create_indexes()
+
+    def _create_indexes(self):
+        """Create database indexes"""
+        self.collection.create_index([("user_id", 1), ("year", 1)], unique=True)
+
+    async def set_day(self, user_id: str, day: date, level: int) -> None:
+        """Set one day's level and workout bit atomically, creating the year if needed"""
+        word, bit = day_position(day)
+        mask = 1 << bit
+        day_operation = {"or": Int64(mask)} if level > 0 else {"and": Int64(~mask)}
+
+        level_word, shift = level_position(day)
+        level_mask = ((1 << LEVEL_BITS) - 1) << shift
+        self.collection.update_one(
+            {"user_id": user_id, "year": day.year},
+            {
+                "$bit": {
+                    f"days.{word}": day_operation,
+                    # Clear the day's 3 bits, then write the new level
+                    f"levels.{level_word}": {"and": Int64(~level_mask), "or": Int64(level << shift)},
+                }
+            },
+            upsert=True,
+        )
+
+    async def find_one(self, user_id: str, year: int) -> Optional[ActivityYearEntity]:
+        """One year of a user"""
+        doc = self.collection.find_one({"user_id": user_id, "year": year})
+        return ActivityYearEntity(**doc) if doc else None
+
+    async def find_by_user(self, user_id: str) -> List[ActivityYearEntity]:
+        """Every year of a user, oldest first"""
+        cursor = self.collection.find({"user_id": user_id}).sort("year", 1)
+        return [ActivityYearEntity(**doc) for doc in cursor]
+
+    async def needs_backfill(self) -> bool:
+        """Whether nothing was written yet, or some year predates the levels"""
+        if self.collection.find_one({}, {"_id": 1}) is None:
+            return True
+        return self.collection.find_one({"levels": {"$exists": False}}, {"_id": 1}) is not None
+
+    async def mark_backfilled(self) -> None:
+        """Give years left without levels an empty set, so the backfill runs once"""
+        self.collection.update_many({"levels": {"$exists": False}}, {"$set": {"levels": {}}})
@@ -0,0 +1,96 @@
+from typing import Dict, List, Optional
+from pymongo.database import Database
+from datetime import date, datetime
+from ...core.cache import TTLCache
+
+# Per-worker tier in front of the persisted snapshots. Invalidation only clears
+# this worker's copy, so other workers may serve a stale month for up to ttl.
+_memory_cache = TTLCache(maxsize=2048, ttl=300)
+
+
+class CalendarSnapshotRepository:
+    """Calendar results of fully past months, keyed by scope ("user" or "group")"""
+
+    def __init__(self, db: Database):
+        self.collection = db["calendar_snapshots"]
+        # Invalidation bumps the owner's generation; snapshots keep the one read before
+        # computing, so a month saved after an invalidation it raced with is ignored
+        self.generations = db["calendar_snapshot_generations"]
+        self._create_indexes()
+
+    def _create_indexes(self):
+        """Create database indexes"""
+        self.collection.create_index(
+            [("scope", 1), ("owner_id", 1), ("year", 1), ("month", 1)], unique=True
+        )
+        self.generations.create_index([("scope", 1), ("owner_id", 1)], unique=True)
+
+    def is_past_month(self, year: int, month: int, today: Optional[date] = None) -> bool:
+        """Only months that have fully ended (by the caller's local date) are cached"""
+        now = today or datetime.utcnow().date()
+        return (year, month) < (now.year, now.month)
+
+    async def find(
+        self, scope: str, owner_id: str, year: int, month: int
+    ) -> Optional[Dict[str, List[Dict]]]:
+        """Find a cached month, checking memory before the database"""
+        key = (scope, owner_id, year, month)
+        data = _memory_cache.get(key)
+        if data is not None:
+            return data
+
+        snapshot = self.collection.find_one(
+            {"scope": scope, "owner_id": owner_id, "year": year, "month": month},
+            {"data": 1, "generation": 1},
+        )
+        if not snapshot or snapshot.get("generation", 0) != await self.generation(scope, owner_id):
+            return None
+        _memory_cache.set(key, snapshot["data"])
+        return snapshot["data"]
+
+    async def generation(self, scope: str, owner_id: str) -> int:
+        """Current generation of an owner's snapshots, to read before computing a month"""
+        doc = self.generations.find_one({"scope": scope, "owner_id": owner_id}, {"generation": 1})
+        return doc["generation"] if doc else 0
+
+    async def save(
+        self,
+        scope: str,
+        owner_id: str,
+        year: int,
+        month: int,
+        data: Dict[str, List[Dict]],
+        generation: int,
+    ) -> None:
+        """Store a month computed at the given generation"""
+        self.collection.update_one(
+            {"scope": scope, "owner_id": owner_id, "year": year, "month": month},
+            {"$set": {"data": data, "generation": generation, "created_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        if generation == await self.generation(scope, owner_id):
+            _memory_cache.set((scope, owner_id, year, month), data)
+
+    async def _bump(self, scope: str, owner_ids: List[str]) -> None:
+        """Move owners to a new generation, orphaning snapshots still being computed"""
+        for owner_id in owner_ids:
+            self.generations.update_one(
+                {"scope": scope, "owner_id": owner_id}, {"$inc": {"generation": 1}}, upsert=True
+            )
+
+    async def invalidate(self, scope: str, owner_ids: List[str], year: int, month: int) -> None:
+        """Drop one month for several owners"""
+        if not owner_ids:
+            return
+        await self._bump(scope, owner_ids)
+        for owner_id in owner_ids:
+            _memory_cache.delete((scope, owner_id, year, month))
+        self.collection.delete_many(
+            {"scope": scope, "owner_id": {"$in": owner_ids}, "year": year, "month": month}
+        )
+
+    async def invalidate_owner(self, scope: str, owner_id: str) -> None:
+        """Drop every month of one owner"""
+        await self._bump(scope, [owner_id])
+        _memory_cache.delete_where(lambda key: key[0] == scope and key[1] == owner_id)
+        self.collection.delete_many({"scope": scope, "owner_id": owner_id})
@@ -1,8 +1,9 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
 from pymongo.database import Database
 from bson import ObjectId
 import secrets
-from ...domain.entities.competition_group import CompetitionGroupEntity, GroupMember
+from ...domain.entities.competition_group import CompetitionGroupEntity
+from ...domain.exceptions import VersionConflictError
 
 
 class CompetitionGroupRepository:
@@ -14,7 +15,6 @@ class CompetitionGroupRepository:
         """Create database indexes"""
         self.collection.create_index("owner_id")
         self.collection.create_index("invite_code", unique=True)
-        self.collection.create_index("members.user_id")
 
     def _generate_invite_code(self) -> str:
         """Generate a unique invite code"""
@@ -34,38 +34,81 @@ class CompetitionGroupRepository:
         result = self.collection.insert_one(group_dict)
         return str(result.inserted_id)
 
-    async def find_by_id(self, group_id: str) -> Optional[CompetitionGroupEntity]:
-        """Find group by ID"""
-        group_data = self.collection.find_one({"_id": ObjectId(group_id)})
+    async def find_by_id(
+        self, group_id: str, projection: Optional[dict] = None
+    ) -> Optional[Union[CompetitionGroupEntity, dict]]:
+        """Find group by ID; with a projection the raw partial document is returned"""
+        group_data = self.collection.find_one(
+            {"_id": ObjectId(group_id)}, projection or {"members": 0}
+        )
         if group_data:
-            return CompetitionGroupEntity(**group_data)
+            return self._to_result(group_data, projection)
         return None
 
+    async def find_by_ids(
+        self, group_ids: List[str], projection: Optional[dict] = None
+    ) -> List[Union[CompetitionGroupEntity, dict]]:
+        """Find groups by a list of IDs"""
+        cursor = self.collection.find(
+            {"_id": {"$in": [ObjectId(group_id) for group_id in group_ids]}},
+            projection or {"members": 0},
+        )
+        return [self._to_result(doc, projection) for doc in cursor]
+
+    def _to_result(self, doc: dict, projection: Optional[dict]) -> Union[CompetitionGroupEntity, dict]:
+        if projection:
+            doc["_id"] = str(doc["_id"])
+            return doc
+        return CompetitionGroupEntity(**doc)
+
     async def find_by_invite_code(
         self, invite_code: str
     ) -> Optional[CompetitionGroupEntity]:
         """Find group by invite code"""
-        group_data = self.collection.find_one({"invite_code": invite_code})
+        group_data = self.collection.find_one({"invite_code": invite_code}, {"members": 0})
         if group_data:
             return CompetitionGroupEntity(**group_data)
         return None
 
-    async def find_by_user(self, user_id: str) -> List[CompetitionGroupEntity]:
-        """Find all groups where user is a member"""
-        groups = []
-        cursor = self.collection.find({"members.user_id": user_id})
-        for doc in cursor:
-            groups.append(CompetitionGroupEntity(**doc))
-        return groups
+    async def find_embedded_members(self) -> List[Tuple[str, List[dict]]]:
+        """Find groups that still embed their members (pre-memberships layout)"""
+        cursor = self.collection.find(
+            {"members": {"$exists": True}}, {"members": 1}
+        )
+        return [(str(doc["_id"]), doc["members"]) for doc in cursor]
 
-    async def update(self, group_id: str, group: CompetitionGroupEntity) -> bool:
-        """Update a group"""
-        group_dict = group.model_dump(by_alias=True, exclude={"id"})
+    async def drop_embedded_members(self, group_id: str, member_count: int) -> bool:
+        """Remove the embedded members array once it has been migrated"""
         result = self.collection.update_one(
-            {"_id": ObjectId(group_id)}, {"$set": group_dict}
+            {"_id": ObjectId(group_id)},
+            {"$unset": {"members": ""}, "$set": {"member_count": member_count}},
         )
         return result.modified_count > 0
 
+    async def increment_member_count(self, group_id: str, amount: int = 1) -> bool:
+        """Adjust the member counter of a group"""
+        result = self.collection.update_one(
+            {"_id": ObjectId(group_id)}, {"$inc": {"member_count": amount}}
+        )
+        return result.modified_count > 0
+
+    async def update(self, group_id: str, group: CompetitionGroupEntity) -> bool:
+        """Update a group if its version is unchanged since it was read"""
+        group_dict = group.model_dump(by_alias=True, exclude={"id", "version"})
+        # Documents written before versioning have no version field and count as 0
+        expected_version = group.version if group.version else {"$in": [0, None]}
+        result = self.collection.update_one(
+            {"_id": ObjectId(group_id), "version": expected_version},
+            {"$set": group_dict, "$inc": {"version": 1}},
+        )
+        if result.matched_count == 0:
+            current = self.collection.find_one({"_id": ObjectId(group_id)}, {"version": 1})
+            if current:
+                raise VersionConflictError(current.get("version", 0))
+            return False
+        group.version += 1
+        return True
+
     async def delete(self, group_id: str) -> bool:
         """Delete a group"""
         result = self.collection.delete_one({"_id": ObjectId(group_id)})
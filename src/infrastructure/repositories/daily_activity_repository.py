@@ -0,0 +1,72 @@
+from typing import Dict, Iterator, List, Optional
+from pymongo import ReturnDocument
+from pymongo.database import Database
+from datetime import datetime
+from ...domain.entities.daily_activity import DailyActivityEntity, ACTIVITY_METRICS
+
+
+class DailyActivityRepository:
+    def __init__(self, db: Database):
+        self.collection = db["daily_activity"]
+        self._create_indexes()
+
+    def _create_indexes(self):
+        """Create database indexes"""
+        self.collection.create_index([("user_id", 1), ("day", 1)], unique=True)
+
+    async def increment(self, user_id: str, day: datetime, changes: Dict[str, float]) -> DailyActivityEntity:
+        """Add the given amounts to a user's bucket for a day, creating it if needed"""
+        doc = self.collection.find_one_and_update(
+            {"user_id": user_id, "day": day},
+            {"$inc": changes},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return DailyActivityEntity(**doc)
+
+    async def find_one(self, user_id: str, day: datetime) -> Optional[DailyActivityEntity]:
+        """A user's bucket for one day"""
+        doc = self.collection.find_one({"user_id": user_id, "day": day})
+        return DailyActivityEntity(**doc) if doc else None
+
+    def iter_with_workouts(self) -> Iterator[DailyActivityEntity]:
+        """Every bucket with at least one workout, for one-off backfills"""
+        for doc in self.collection.find({"workouts": {"$gt": 0}}):
+            yield DailyActivityEntity(**doc)
+
+    async def find_by_user_and_date_range(
+        self, user_id: str, start_day: datetime, end_day: datetime
+    ) -> List[DailyActivityEntity]:
+        """Find a user's buckets between two days (inclusive)"""
+        buckets = []
+        cursor = self.collection.find(
+            {"user_id": user_id, "day": {"$gte": start_day, "$lte": end_day}}
+        ).sort("day", 1)
+        for doc in cursor:
+            buckets.append(DailyActivityEntity(**doc))
+        return buckets
+
+    async def sum_by_users(
+        self,
+        user_ids: List[str],
+        start_day: Optional[datetime] = None,
+        end_day: Optional[datetime] = None,
+    ) -> Dict[str, Dict[str, float]]:
+        """Sum every metric per user over an optional range of days"""
+        match: dict = {"user_id": {"$in": user_ids}}
+        if start_day or end_day:
+            match["day"] = {}
+            if start_day:
+                match["day"]["$gte"] = start_day
+            if end_day:
+                match["day"]["$lte"] = end_day
+
+        group: dict = {"_id": "$user_id"}
+        for metric in ACTIVITY_METRICS:
+            group[metric] = {"$sum": f"${metric}"}
+
+        totals = {}
+        for doc in self.collection.aggregate([{"$match": match}, {"$group": group}]):
+            user_id = doc.pop("_id")
+            totals[user_id] = doc
+        return totals
@@ -1,11 +1,19 @@
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pymongo.database import Database
+from bson import ObjectId
+from ...core.cache import TTLCache
 from ...domain.entities.exercise import ExerciseEntity
 
+# Per-worker copy of the catalog's classification, for joining sets in memory.
+# Keyed by catalog version, which every write bumps, so no worker keeps using
+# a classification older than the version it reads.
+_catalog_cache = TTLCache(maxsize=1, ttl=300)
+
 
 class ExerciseRepository:
     def __init__(self, db: Database):
         self.collection = db["exercises"]
+        self.versions = db["catalog_versions"]
         self._create_indexes()
 
     def _create_indexes(self):
@@ -17,6 +25,7 @@ class ExerciseRepository:
         """Create a new exercise"""
         exercise_dict = exercise.model_dump(by_alias=True, exclude={"id"})
         result = self.collection.insert_one(exercise_dict)
+        self._bump_catalog_version()
         return str(result.inserted_id)
 
     async def find_all(self) -> List[ExerciseEntity]:
@@ -28,12 +37,53 @@ class ExerciseRepository:
 
     async def find_by_id(self, exercise_id: str) -> Optional[ExerciseEntity]:
         """Find exercise by ID"""
-        from bson import ObjectId
         exercise_data = self.collection.find_one({"_id": ObjectId(exercise_id)})
         if exercise_data:
             return ExerciseEntity(**exercise_data)
         return None
 
+    async def find_by_ids(self, exercise_ids: List[str]) -> List[ExerciseEntity]:
+        """Find exercises by a list of IDs"""
+        exercises = []
+        cursor = self.collection.find(
+            {"_id": {"$in": [ObjectId(exercise_id) for exercise_id in exercise_ids]}}
+        )
+        for doc in cursor:
+            exercises.append(ExerciseEntity(**doc))
+        return exercises
+
+    async def update(self, exercise_id: str, exercise: ExerciseEntity) -> bool:
+        """Update an exercise, keeping its original created_at"""
+        exercise_dict = exercise.model_dump(by_alias=True, exclude={"id", "created_at"})
+        result = self.collection.update_one(
+            {"_id": ObjectId(exercise_id)}, {"$set": exercise_dict}
+        )
+        self._bump_catalog_version()
+        return result.matched_count > 0
+
+    def _bump_catalog_version(self) -> None:
+        """Mark every copy of the catalog, and anything derived from it, as outdated"""
+        self.versions.update_one({"_id": "exercises"}, {"$inc": {"version": 1}}, upsert=True)
+
+    async def catalog_version(self) -> int:
+        """Current catalog version, to read before get_catalog"""
+        doc = self.versions.find_one({"_id": "exercises"})
+        return doc["version"] if doc else 0
+
+    async def get_catalog(self, version: int) -> Dict[str, dict]:
+        """exercise_id -> muscle_groups and category of every exercise, cached per version"""
+        catalog = _catalog_cache.get(version)
+        if catalog is None:
+            catalog = {
+                str(doc["_id"]): {
+                    "muscle_groups": doc.get("muscle_groups") or [],
+                    "category": doc.get("category"),
+                }
+                for doc in self.collection.find({}, {"muscle_groups": 1, "category": 1})
+            }
+            _catalog_cache.set(version, catalog)
+        return catalog
+
     async def find_by_category(self, category: str) -> List[ExerciseEntity]:
         """Find exercises by category"""
         exercises = []
@@ -0,0 +1,87 @@
+from typing import List, Optional
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
+from ...domain.entities.group_membership import GroupMembershipEntity
+
+
+class GroupMembershipRepository:
+    def __init__(self, db: Database):
+        self.collection = db["group_memberships"]
+        self._create_indexes()
+
+    def _create_indexes(self):
+        """Create database indexes"""
+        self.collection.create_index("user_id")
+        self.collection.create_index([("group_id", 1), ("workout_count", -1)])
+        # Tie-break on _id so leaderboard pages are stable without an in-memory sort
+        self.collection.create_index([("group_id", 1), ("workout_count", -1), ("_id", 1)])
+        self.collection.create_index([("group_id", 1), ("user_id", 1)], unique=True)
+
+    async def create(self, membership: GroupMembershipEntity) -> Optional[str]:
+        """Create a membership; returns None if the user is already a member"""
+        membership_dict = membership.model_dump(by_alias=True, exclude={"id"})
+        try:
+            result = self.collection.insert_one(membership_dict)
+        except DuplicateKeyError:
+            return None
+        return str(result.inserted_id)
+
+    async def find_one(self, group_id: str, user_id: str) -> Optional[GroupMembershipEntity]:
+        """Find a user's membership in a group"""
+        membership_data = self.collection.find_one({"group_id": group_id, "user_id": user_id})
+        if membership_data:
+            return GroupMembershipEntity(**membership_data)
+        return None
+
+    async def find_by_group(self, group_id: str) -> List[GroupMembershipEntity]:
+        """Find all memberships of a group, ordered by workout count"""
+        memberships = []
+        cursor = self.collection.find({"group_id": group_id}).sort("workout_count", -1)
+        for doc in cursor:
+            memberships.append(GroupMembershipEntity(**doc))
+        return memberships
+
+    async def find_page_by_group(
+        self, group_id: str, skip: int = 0, limit: int = 50
+    ) -> List[GroupMembershipEntity]:
+        """Find one page of a group's memberships in leaderboard order"""
+        memberships = []
+        cursor = (
+            self.collection.find({"group_id": group_id})
+            .sort([("workout_count", -1), ("_id", 1)])
+            .skip(skip)
+            .limit(limit)
+        )
+        for doc in cursor:
+            memberships.append(GroupMembershipEntity(**doc))
+        return memberships
+
+    async def count_ahead(self, group_id: str, workout_count: int) -> int:
+        """Count the members of a group with strictly more workouts"""
+        # Answered by a count scan over the (group_id, workout_count) index
+        return self.collection.count_documents(
+            {"group_id": group_id, "workout_count": {"$gt": workout_count}}
+        )
+
+    async def find_group_ids_by_user(self, user_id: str) -> List[str]:
+        """Find the IDs of all groups a user belongs to"""
+        cursor = self.collection.find({"user_id": user_id}, {"group_id": 1, "_id": 0})
+        return [doc["group_id"] for doc in cursor]
+
+    async def count_by_group(self, group_id: str) -> int:
+        """Count the members of a group"""
+        return self.collection.count_documents({"group_id": group_id})
+
+    async def increment_workout_count(self, user_id: str, amount: int = 1) -> None:
+        """Adjust the workout counter of every membership of a user"""
+        self.collection.update_many({"user_id": user_id}, {"$inc": {"workout_count": amount}})
+
+    async def delete(self, group_id: str, user_id: str) -> bool:
+        """Delete a user's membership in a group"""
+        result = self.collection.delete_one({"group_id": group_id, "user_id": user_id})
+        return result.deleted_count > 0
+
+    async def delete_by_group(self, group_id: str) -> int:
+        """Delete all memberships of a group"""
+        result = self.collection.delete_many({"group_id": group_id})
+        return result.deleted_count
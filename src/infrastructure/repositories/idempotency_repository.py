@@ -0,0 +1,104 @@
+from typing import Dict, List, Optional
+from pymongo import UpdateOne
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from datetime import datetime
+from ...core.config import settings
+
+
+class IdempotencyRepository:
+    """Claims on client idempotency keys and the responses stored under them.
+
+    A key is claimed before the write it guards, so two concurrent retries
+    cannot both apply it. Claims without a response are still in progress.
+    """
+
+    def __init__(self, db: Database):
+        self.collection = db["idempotency_keys"]
+        self._create_indexes()
+
+    def _create_indexes(self):
+        """Create database indexes"""
+        self.collection.create_index(
+            [("user_id", 1), ("scope", 1), ("key", 1)], unique=True
+        )
+        self.collection.create_index(
+            "created_at", expireAfterSeconds=settings.IDEMPOTENCY_TTL_HOURS * 60 * 60
+        )
+
+    def _claim_doc(
+        self, user_id: str, scope: str, key: str, fingerprint: Optional[str] = None
+    ) -> dict:
+        return {
+            "user_id": user_id,
+            "scope": scope,
+            "key": key,
+            "fingerprint": fingerprint,
+            "response": None,
+            "created_at": datetime.utcnow(),
+        }
+
+    async def claim(
+        self, user_id: str, scope: str, key: str, fingerprint: Optional[str] = None
+    ) -> Optional[dict]:
+        """Claim a key; returns the existing claim if it was already taken"""
+        try:
+            self.collection.insert_one(self._claim_doc(user_id, scope, key, fingerprint))
+            return None
+        except DuplicateKeyError:
+            return self.collection.find_one(
+                {"user_id": user_id, "scope": scope, "key": key}
+            )
+
+    async def claim_many(self, user_id: str, scope: str, keys: List[str]) -> Dict[str, dict]:
+        """Claim several keys; returns the existing claims of those already taken"""
+        if not keys:
+            return {}
+        try:
+            self.collection.insert_many(
+                [self._claim_doc(user_id, scope, key) for key in keys], ordered=False
+            )
+            return {}
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != 11000 for error in errors):
+                raise
+            taken_keys = [keys[error["index"]] for error in errors]
+
+        cursor = self.collection.find(
+            {"user_id": user_id, "scope": scope, "key": {"$in": taken_keys}}
+        )
+        return {doc["key"]: doc for doc in cursor}
+
+    async def complete(self, user_id: str, scope: str, key: str, response: dict) -> None:
+        """Store the response of a claimed key"""
+        self.collection.update_one(
+            {"user_id": user_id, "scope": scope, "key": key},
+            {"$set": {"response": response}},
+        )
+
+    async def complete_many(self, user_id: str, scope: str, responses: Dict[str, dict]) -> None:
+        """Store the responses of several claimed keys"""
+        if not responses:
+            return
+        self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"user_id": user_id, "scope": scope, "key": key},
+                    {"$set": {"response": response}},
+                )
+                for key, response in responses.items()
+            ],
+            ordered=False,
+        )
+
+    async def release(self, user_id: str, scope: str, key: str) -> None:
+        """Drop a claim whose write failed so a retry can apply it"""
+        self.collection.delete_one({"user_id": user_id, "scope": scope, "key": key})
+
+    async def release_many(self, user_id: str, scope: str, keys: List[str]) -> None:
+        """Drop claims whose write failed so a retry can apply them"""
+        if keys:
+            self.collection.delete_many(
+                {"user_id": user_id, "scope": scope, "key": {"$in": keys}}
+            )
@@ -0,0 +1,103 @@
+from typing import Dict, List, Tuple
+from pymongo import UpdateOne
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime
+
+
+class MuscleVolumeRepository:
+    """Weekly volume by muscle group and category of fully past weeks"""
+
+    def __init__(self, db: Database):
+        self.collection = db["muscle_volume_weeks"]
+        # Invalidating a week bumps its version, and a week is only saved over the
+        # version read before computing it. A timezone change bumps the user's
+        # generation instead; weeks keep the generation and catalog version read
+        # before computing, and are ignored once either moved.
+        self.generations = db["muscle_volume_generations"]
+        self._create_indexes()
+
+    def _create_indexes(self):
+        """Create database indexes"""
+        self.collection.create_index([("user_id", 1), ("week_start", 1)], unique=True)
+        self.generations.create_index("user_id", unique=True)
+
+    async def generation(self, user_id: str) -> int:
+        """Current generation of a user's weeks, to read before computing any"""
+        doc = self.generations.find_one({"user_id": user_id}, {"generation": 1})
+        return doc["generation"] if doc else 0
+
+    async def find_weeks(
+        self, user_id: str, week_starts: List[datetime], generation: int, catalog_version: int
+    ) -> Tuple[Dict[datetime, dict], Dict[datetime, int]]:
+        """Stored weeks among the given ones that are still current, and the version of each"""
+        stored, versions = {}, {week: 0 for week in week_starts}
+        cursor = self.collection.find(
+            {"user_id": user_id, "week_start": {"$in": week_starts}},
+            {"_id": 0, "week_start": 1, "version": 1, "generation": 1, "catalog_version": 1,
+             "by_muscle_group": 1, "by_category": 1},
+        )
+        for doc in cursor:
+            week = doc["week_start"]
+            versions[week] = doc.get("version", 0)
+            if (
+                "by_muscle_group" in doc
+                and doc.get("generation") == generation
+                and doc.get("catalog_version") == catalog_version
+            ):
+                stored[week] = {"by_muscle_group": doc["by_muscle_group"], "by_category": doc["by_category"]}
+        return stored, versions
+
+    async def save_many(
+        self,
+        user_id: str,
+        weeks: Dict[datetime, dict],
+        versions: Dict[datetime, int],
+        generation: int,
+        catalog_version: int,
+    ) -> None:
+        """Store weeks computed at the versions, generation and catalog version read before"""
+        for week_start, data in weeks.items():
+            version = versions.get(week_start, 0)
+            try:
+                self.collection.update_one(
+                    {
+                        "user_id": user_id,
+                        "week_start": week_start,
+                        # Weeks never invalidated may have no version yet
+                        "version": version if version else {"$in": [0, None]},
+                    },
+                    {
+                        "$set": {
+                            **data,
+                            "version": version,
+                            "generation": generation,
+                            "catalog_version": catalog_version,
+                            "created_at": datetime.utcnow(),
+                        }
+                    },
+                    upsert=True,
+                )
+            except DuplicateKeyError:
+                # The week moved to a newer version while it was computed
+                continue
+
+    async def invalidate(self, user_id: str, week_starts: List[datetime]) -> None:
+        """Drop some weeks of a user, moving each to a new version"""
+        if not week_starts:
+            return
+        self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"user_id": user_id, "week_start": week},
+                    {"$inc": {"version": 1}, "$unset": {"by_muscle_group": "", "by_category": ""}},
+                    upsert=True,
+                )
+                for week in week_starts
+            ]
+        )
+
+    async def invalidate_user(self, user_id: str) -> None:
+        """Drop every week of a user, e.g. after a timezone change moved week boundaries"""
+        self.generations.update_one({"user_id": user_id}, {"$inc": {"generation": 1}}, upsert=True)
+        self.collection.delete_many({"user_id": user_id})
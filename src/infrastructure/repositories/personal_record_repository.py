@@ -0,0 +1,77 @@
+from typing import List, Optional
+from pymongo import UpdateOne
+from pymongo.database import Database
+from datetime import datetime
+from ...domain.entities.personal_record import PersonalRecordEntity, RECORD_KINDS
+
+
+class PersonalRecordRepository:
+    """One document per user and exercise with the best sets so far"""
+
+    def __init__(self, db: Database):
+        self.collection = db["personal_records"]
+        self._create_indexes()
+
+    def _create_indexes(self):
+        """Create database indexes"""
+        self.collection.create_index([("user_id", 1), ("exercise_id", 1)], unique=True)
+
+    async def apply_many(self, records: List[PersonalRecordEntity]) -> None:
+        """Raise each stored record to the given sets where they beat it, in one round trip"""
+        if not records:
+            return
+        now = datetime.utcnow()
+        operations = []
+        for record in records:
+            key = {"user_id": record.user_id, "exercise_id": record.exercise_id}
+            operations.append(
+                UpdateOne(
+                    key,
+                    {"$set": {"exercise_name": record.exercise_name}, "$setOnInsert": {"updated_at": now}},
+                    upsert=True,
+                )
+            )
+            # Conditional writes keep concurrent completions from lowering a record
+            for kind in RECORD_KINDS:
+                candidate = getattr(record, kind)
+                if candidate:
+                    operations.append(
+                        UpdateOne(
+                            {**key, "$or": [{kind: None}, {f"{kind}.value": {"$lt": candidate.value}}]},
+                            {"$set": {kind: candidate.model_dump(), "updated_at": now}},
+                        )
+                    )
+        # Ordered, so each upsert lands before the updates that depend on it
+        self.collection.bulk_write(operations, ordered=True)
+
+    async def replace(
+        self, user_id: str, exercise_id: str, record: Optional[PersonalRecordEntity]
+    ) -> None:
+        """Overwrite one exercise's records after a rebuild; None removes them"""
+        key = {"user_id": user_id, "exercise_id": exercise_id}
+        if not record:
+            self.collection.delete_one(key)
+            return
+        record.updated_at = datetime.utcnow()
+        self.collection.replace_one(key, record.model_dump(by_alias=True, exclude={"id"}), upsert=True)
+
+    async def find_by_user(self, user_id: str) -> List[PersonalRecordEntity]:
+        """Every record of a user, by exercise name"""
+        cursor = self.collection.find({"user_id": user_id}).sort("exercise_name", 1)
+        return [PersonalRecordEntity(**doc) for doc in cursor]
+
+    async def find_one(self, user_id: str, exercise_id: str) -> Optional[PersonalRecordEntity]:
+        """Records of one exercise"""
+        doc = self.collection.find_one({"user_id": user_id, "exercise_id": exercise_id})
+        return PersonalRecordEntity(**doc) if doc else None
+
+    async def find_exercise_ids_held_by_session(self, user_id: str, session_id: str) -> List[str]:
+        """Exercises where some record comes from the given session"""
+        cursor = self.collection.find(
+            {
+                "user_id": user_id,
+                "$or": [{f"{kind}.session_id": session_id} for kind in RECORD_KINDS],
+            },
+            {"exercise_id": 1},
+        )
+        return [doc["exercise_id"] for doc in cursor]
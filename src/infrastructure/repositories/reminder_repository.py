@@ -1,4 +1,5 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import UpdateOne
 from pymongo.database import Database
 from bson import ObjectId
 from ...domain.entities.reminder import ReminderEntity
@@ -9,6 +10,7 @@ class ReminderRepository:
     def __init__(self, db: Database):
         self.collection = db["reminders"]
         self.collection.create_index([("user_id", 1), ("created_at", -1)])
+        self.collection.create_index([("user_id", 1), ("updated_at", 1)])
 
     async def create(self, reminder: ReminderEntity) -> str:
         reminder_dict = reminder.model_dump(by_alias=True, exclude={"id"})
@@ -22,12 +24,42 @@ class ReminderRepository:
             reminders.append(ReminderEntity(**doc))
         return reminders
 
+    async def find_updated_since(
+        self, user_id: str, since: Optional[datetime]
+    ) -> List[ReminderEntity]:
+        query = {"user_id": user_id}
+        if since:
+            query["updated_at"] = {"$gte": since}
+        return [ReminderEntity(**doc) for doc in self.collection.find(query)]
+
     async def find_by_id(self, reminder_id: str) -> Optional[ReminderEntity]:
         reminder_data = self.collection.find_one({"_id": ObjectId(reminder_id)})
         if reminder_data:
             return ReminderEntity(**reminder_data)
         return None
 
+    async def find_by_ids_for_user(self, reminder_ids: List[str], user_id: str) -> List[ReminderEntity]:
+        cursor = self.collection.find(
+            {"_id": {"$in": [ObjectId(reminder_id) for reminder_id in reminder_ids]}, "user_id": user_id}
+        )
+        return [ReminderEntity(**doc) for doc in cursor]
+
+    async def set_completion_many(self, completions: List[Tuple[str, Optional[datetime]]]) -> None:
+        """Set last_completed_date on several reminders in one round trip"""
+        if not completions:
+            return
+        now = datetime.utcnow()
+        self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": ObjectId(reminder_id)},
+                    {"$set": {"last_completed_date": completed_at, "updated_at": now}},
+                )
+                for reminder_id, completed_at in completions
+            ],
+            ordered=False,
+        )
+
     async def delete(self, reminder_id: str) -> bool:
         result = self.collection.delete_one({"_id": ObjectId(reminder_id)})
         return result.deleted_count > 0
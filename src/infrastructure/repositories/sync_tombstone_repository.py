@@ -0,0 +1,42 @@
+from typing import Dict, List
+from pymongo.database import Database
+from datetime import datetime
+from ...core.config import settings
+
+
+class SyncTombstoneRepository:
+    """Records of deleted documents, kept so clients can sync deletions"""
+
+    def __init__(self, db: Database):
+        self.collection = db["sync_tombstones"]
+        self._create_indexes()
+
+    def _create_indexes(self):
+        """Create database indexes"""
+        self.collection.create_index([("user_id", 1), ("deleted_at", 1)])
+        self.collection.create_index(
+            "deleted_at",
+            expireAfterSeconds=settings.SYNC_TOMBSTONE_RETENTION_DAYS * 24 * 60 * 60,
+        )
+
+    async def record(self, user_id: str, collection: str, doc_id: str) -> None:
+        """Record that a document of a user was deleted"""
+        self.collection.insert_one(
+            {
+                "user_id": user_id,
+                "collection": collection,
+                "doc_id": doc_id,
+                "deleted_at": datetime.utcnow(),
+            }
+        )
+
+    async def find_since(self, user_id: str, since: datetime) -> Dict[str, List[str]]:
+        """IDs deleted since a point in time, grouped by collection"""
+        deleted: Dict[str, List[str]] = {}
+        cursor = self.collection.find(
+            {"user_id": user_id, "deleted_at": {"$gte": since}},
+            {"collection": 1, "doc_id": 1},
+        )
+        for doc in cursor:
+            deleted.setdefault(doc["collection"], []).append(doc["doc_id"])
+        return deleted
@@ -1,7 +1,8 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from bson import ObjectId
 from pymongo.database import Database
 from ...domain.entities.user import UserEntity
+from ...core.timezones import DEFAULT_TIMEZONE
 
 
 class UserRepository:
@@ -42,6 +43,19 @@ class UserRepository:
             return UserEntity(**user_data)
         return None
     
+    async def find_timezone(self, user_id: str) -> str:
+        """A user's timezone, without loading the whole document"""
+        user_data = self.collection.find_one({"_id": ObjectId(user_id)}, {"timezone": 1})
+        return (user_data or {}).get("timezone") or DEFAULT_TIMEZONE
+
+    async def find_timezones(self, user_ids: List[str]) -> Dict[str, str]:
+        """Timezones of several users in one query"""
+        cursor = self.collection.find(
+            {"_id": {"$in": [ObjectId(i) for i in user_ids]}}, {"timezone": 1}
+        )
+        found = {str(doc["_id"]): doc.get("timezone") or DEFAULT_TIMEZONE for doc in cursor}
+        return {user_id: found.get(user_id, DEFAULT_TIMEZONE) for user_id in user_ids}
+
     async def update(self, user_id: str, data_to_update: Dict[str, Any]) -> bool:
         """Update user data"""
         result = self.collection.update_one(
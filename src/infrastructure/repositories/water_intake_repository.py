@@ -1,31 +1,149 @@
-from typing import List
+from typing import List, Optional
+from pymongo import InsertOne
 from pymongo.database import Database
+from pymongo.errors import BulkWriteError, PyMongoError
+from bson import ObjectId
 from datetime import datetime
+from ...core.config import settings
+from ...core.write_buffer import WriteBuffer
 from ...domain.entities.water_intake import WaterIntakeEntity
 
+# Per-worker write-behind buffer, only used when WATER_BUFFER_ENABLED is set
+_write_buffer = WriteBuffer(
+    max_size=settings.WATER_BUFFER_MAX_SIZE,
+    max_seconds=settings.WATER_BUFFER_MAX_SECONDS,
+)
+
 class WaterIntakeRepository:
     def __init__(self, db: Database):
         self.collection = db["water_intake"]
+        self.backfills = db["backfills"]
         self._create_indexes()
 
     def _create_indexes(self):
         self.collection.create_index([("user_id", 1), ("created_at", -1)])
+        # Only entries waiting to be counted, so the startup backfill never scans the rest
+        self.collection.create_index("counted", partialFilterExpression={"counted": False})
+
+    # Entries are stored with counted=False and only added to the daily water
+    # counters once stored, by whoever claims them first (see claim_uncounted)
 
     async def create(self, intake: WaterIntakeEntity) -> str:
-        intake_dict = intake.model_dump(by_alias=True, exclude={"id"})
+        """Insert an entry, or queue it when the write-behind buffer is enabled"""
+        intake_dict = {**intake.model_dump(by_alias=True, exclude={"id"}), "counted": False}
+        if settings.WATER_BUFFER_ENABLED:
+            intake_dict["_id"] = ObjectId()
+            _write_buffer.add(intake_dict)
+            return str(intake_dict["_id"])
         result = self.collection.insert_one(intake_dict)
         return str(result.inserted_id)
 
+    async def flush(self) -> List[str]:
+        """Write buffered entries with a single insert_many and return the stored ids"""
+        batch = _write_buffer.drain()
+        if not batch:
+            return []
+        try:
+            self.collection.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # A retried batch may already be partly stored; only duplicates are safe to drop
+            if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                _write_buffer.restore(batch)
+                print(f"Water buffer flush failed, {len(batch)} entries requeued: {e}")
+                return []
+        except PyMongoError as e:
+            _write_buffer.restore(batch)
+            print(f"Water buffer flush failed, {len(batch)} entries requeued: {e}")
+            return []
+        _write_buffer.ack(batch)
+        return [str(doc["_id"]) for doc in batch]
+
+    async def flush_if_due(self) -> List[str]:
+        """Flush only when the size or age threshold has been reached"""
+        if not _write_buffer.is_due():
+            return []
+        return await self.flush()
+
+    def _buffered(self, user_id: str, start_date: Optional[datetime], end_date: Optional[datetime] = None) -> List[dict]:
+        """Buffered entries of a user, so reads see writes not flushed yet"""
+        if not settings.WATER_BUFFER_ENABLED:
+            return []
+        return _write_buffer.pending(
+            lambda doc: doc["user_id"] == user_id
+            and (start_date is None or doc["created_at"] >= start_date)
+            and (end_date is None or doc["created_at"] <= end_date)
+        )
+
+    async def find_buffered(self, user_id: str, since: Optional[datetime]) -> List[WaterIntakeEntity]:
+        """Entries of a user still in the buffer, so not in the daily counters yet"""
+        return [WaterIntakeEntity(**doc) for doc in self._buffered(user_id, since)]
+
+    @staticmethod
+    def _merge(docs: List[dict], buffered: List[dict]) -> List[dict]:
+        # An in-flight batch can be stored and still buffered, so dedupe by _id
+        seen = {doc["_id"] for doc in docs}
+        return docs + [doc for doc in buffered if doc["_id"] not in seen]
+
+    async def create_many(self, intakes: List[WaterIntakeEntity]) -> List[str]:
+        """Insert several entries in one round trip, keeping their order"""
+        docs = [
+            {"_id": ObjectId(), **item.model_dump(by_alias=True, exclude={"id"}), "counted": False}
+            for item in intakes
+        ]
+        if docs:
+            self.collection.bulk_write([InsertOne(doc) for doc in docs])
+        return [str(doc["_id"]) for doc in docs]
+
     async def find_by_user_and_date_range(
         self, user_id: str, start_date: datetime, end_date: datetime
     ) -> List[WaterIntakeEntity]:
-        intakes = []
-        cursor = self.collection.find(
-            {
-                "user_id": user_id,
-                "created_at": {"$gte": start_date, "$lte": end_date},
-            }
-        ).sort("created_at", 1)
-        for doc in cursor:
-            intakes.append(WaterIntakeEntity(**doc))
-        return intakes
\ No newline at end of file
+        docs = list(
+            self.collection.find(
+                {
+                    "user_id": user_id,
+                    "created_at": {"$gte": start_date, "$lte": end_date},
+                }
+            ).sort("created_at", 1)
+        )
+        buffered = self._buffered(user_id, start_date, end_date)
+        if buffered:
+            docs = sorted(self._merge(docs, buffered), key=lambda doc: doc["created_at"])
+        return [WaterIntakeEntity(**doc) for doc in docs]
+
+    async def find_created_since(
+        self, user_id: str, since: Optional[datetime]
+    ) -> List[WaterIntakeEntity]:
+        # Entries are append-only, so created_at doubles as the change marker
+        query = {"user_id": user_id}
+        if since:
+            query["created_at"] = {"$gte": since}
+        docs = self._merge(list(self.collection.find(query)), self._buffered(user_id, since))
+        return [WaterIntakeEntity(**doc) for doc in docs]
+
+    async def mark_legacy_uncounted(self) -> None:
+        """Give entries older than the counted flag counted=False, once"""
+        if self.backfills.find_one({"_id": "water_intake.counted"}) is not None:
+            return
+        self.collection.update_many({"counted": {"$exists": False}}, {"$set": {"counted": False}})
+        self.backfills.update_one(
+            {"_id": "water_intake.counted"}, {"$set": {"done_at": datetime.utcnow()}}, upsert=True
+        )
+
+    async def find_uncounted_ids(self, limit: int = 1000) -> List[str]:
+        """Stored entries not yet added to the daily water counters"""
+        cursor = self.collection.find({"counted": False}, {"_id": 1}).limit(limit)
+        return [str(doc["_id"]) for doc in cursor]
+
+    async def claim_uncounted(self, intake_ids: List[str]) -> List[WaterIntakeEntity]:
+        """Flag stored entries as counted and return those this call flagged"""
+        if not intake_ids:
+            return []
+        # A claim token tells this caller's entries apart from ones flagged concurrently
+        claim = ObjectId()
+        ids = [ObjectId(i) for i in intake_ids]
+        self.collection.update_many(
+            {"_id": {"$in": ids}, "counted": {"$in": [False, None]}},
+            {"$set": {"counted": True, "count_claim": claim}},
+        )
+        cursor = self.collection.find({"_id": {"$in": ids}, "count_claim": claim})
+        return [WaterIntakeEntity(**doc) for doc in cursor]
@@ -1,5 +1,7 @@
-from typing import List
+from typing import List, Optional
+from pymongo import InsertOne
 from pymongo.database import Database
+from bson import ObjectId
 from datetime import datetime
 from ...domain.entities.weight_history import WeightHistoryEntity
 
@@ -16,6 +18,16 @@ class WeightHistoryRepository:
         result = self.collection.insert_one(entry_dict)
         return str(result.inserted_id)
 
+    async def create_many(self, entries: List[WeightHistoryEntity]) -> List[str]:
+        """Insert several entries in one round trip, keeping their order"""
+        docs = [
+            {"_id": ObjectId(), **item.model_dump(by_alias=True, exclude={"id"})}
+            for item in entries
+        ]
+        if docs:
+            self.collection.bulk_write([InsertOne(doc) for doc in docs])
+        return [str(doc["_id"]) for doc in docs]
+
     async def find_by_user_and_date_range(
         self, user_id: str, start_date: datetime, end_date: datetime
     ) -> List[WeightHistoryEntity]:
@@ -28,4 +40,13 @@ class WeightHistoryRepository:
         ).sort("created_at", 1)
         for doc in cursor:
             entries.append(WeightHistoryEntity(**doc))
-        return entries
\ No newline at end of file
+        return entries
+
+    async def find_created_since(
+        self, user_id: str, since: Optional[datetime]
+    ) -> List[WeightHistoryEntity]:
+        # Entries are append-only, so created_at doubles as the change marker
+        query = {"user_id": user_id}
+        if since:
+            query["created_at"] = {"$gte": since}
+        return [WeightHistoryEntity(**doc) for doc in self.collection.find(query)]
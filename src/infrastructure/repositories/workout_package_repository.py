@@ -1,7 +1,9 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from pymongo.database import Database
 from bson import ObjectId
-from ...domain.entities.workout_package import WorkoutPackageEntity
+from datetime import datetime
+from ...domain.entities.workout_package import WorkoutPackageEntity, ExerciseInPackage
+from ...domain.exceptions import VersionConflictError
 
 
 class WorkoutPackageRepository:
@@ -13,6 +15,8 @@ class WorkoutPackageRepository:
         """Create database indexes"""
         self.collection.create_index("user_id")
         self.collection.create_index("is_public")
+        self.collection.create_index("exercises.exercise_id")
+        self.collection.create_index([("user_id", 1), ("updated_at", 1)])
 
     async def create(self, package: WorkoutPackageEntity) -> str:
         """Create a new workout package"""
@@ -20,38 +24,118 @@ class WorkoutPackageRepository:
         result = self.collection.insert_one(package_dict)
         return str(result.inserted_id)
 
-    async def find_by_id(self, package_id: str) -> Optional[WorkoutPackageEntity]:
-        """Find package by ID"""
-        package_data = self.collection.find_one({"_id": ObjectId(package_id)})
+    async def find_by_id(
+        self, package_id: str, projection: Optional[dict] = None
+    ) -> Optional[Union[WorkoutPackageEntity, dict]]:
+        """Find package by ID; with a projection the raw partial document is returned"""
+        package_data = self.collection.find_one({"_id": ObjectId(package_id)}, projection)
         if package_data:
-            package_data["_id"] = str(package_data["_id"])  # CONVERTE PARA STR
-            return WorkoutPackageEntity(**package_data)
+            return self._to_result(package_data, projection)
         return None
 
-    async def find_by_user(self, user_id: str) -> List[WorkoutPackageEntity]:
+    async def find_by_user(
+        self, user_id: str, projection: Optional[dict] = None
+    ) -> List[Union[WorkoutPackageEntity, dict]]:
         """Find all packages by user"""
-        packages = []
-        for doc in self.collection.find({"user_id": user_id}):
-            doc["_id"] = str(doc["_id"])  # CONVERTE PARA STR
-            packages.append(WorkoutPackageEntity(**doc))
-        return packages
+        cursor = self.collection.find({"user_id": user_id}, projection)
+        return [self._to_result(doc, projection) for doc in cursor]
+
+    async def find_visible_by_ids(
+        self, package_ids: List[str], user_id: str, projection: Optional[dict] = None
+    ) -> List[Union[WorkoutPackageEntity, dict]]:
+        """Find packages by IDs that are owned by the user or public"""
+        cursor = self.collection.find(
+            {
+                "_id": {"$in": [ObjectId(package_id) for package_id in package_ids]},
+                "$or": [{"user_id": user_id}, {"is_public": True}],
+            },
+            projection,
+        )
+        return [self._to_result(doc, projection) for doc in cursor]
 
-    async def find_public(self) -> List[WorkoutPackageEntity]:
+    async def find_updated_since(
+        self, user_id: str, since: Optional[datetime]
+    ) -> List[WorkoutPackageEntity]:
+        """Find packages of a user changed since a point in time, or all of them"""
+        query = {"user_id": user_id}
+        if since:
+            query["updated_at"] = {"$gte": since}
+        return [self._to_result(doc, None) for doc in self.collection.find(query)]
+
+    async def find_public(
+        self, projection: Optional[dict] = None
+    ) -> List[Union[WorkoutPackageEntity, dict]]:
         """Find all public packages"""
-        packages = []
-        for doc in self.collection.find({"is_public": True}):
-            doc["_id"] = str(doc["_id"])  # CONVERTE PARA STR
-            packages.append(WorkoutPackageEntity(**doc))
-        return packages
+        cursor = self.collection.find({"is_public": True}, projection)
+        return [self._to_result(doc, projection) for doc in cursor]
+
+    def _to_result(self, doc: dict, projection: Optional[dict]) -> Union[WorkoutPackageEntity, dict]:
+        doc["_id"] = str(doc["_id"])  # CONVERTE PARA STR
+        if projection:
+            return doc
+        return WorkoutPackageEntity(**doc)
 
     async def update(self, package_id: str, package: WorkoutPackageEntity) -> bool:
-        """Update a package"""
-        package_dict = package.model_dump(by_alias=True, exclude={"id"})
+        """Update a package if its version is unchanged since it was read"""
+        package_dict = package.model_dump(by_alias=True, exclude={"id", "version"})
+        # Documents written before versioning have no version field and count as 0
+        expected_version = package.version if package.version else {"$in": [0, None]}
         result = self.collection.update_one(
-            {"_id": ObjectId(package_id)}, {"$set": package_dict}
+            {"_id": ObjectId(package_id), "version": expected_version},
+            {"$set": package_dict, "$inc": {"version": 1}},
+        )
+        if result.matched_count == 0:
+            current = self.collection.find_one({"_id": ObjectId(package_id)}, {"version": 1})
+            if current:
+                raise VersionConflictError(current.get("version", 0))
+            return False
+        package.version += 1
+        return True
+
+    async def set_exercises(self, package_id: str, exercises: List[ExerciseInPackage]) -> bool:
+        """Rewrite the exercise snapshots of a package without bumping its version"""
+        result = self.collection.update_one(
+            {"_id": ObjectId(package_id)},
+            {
+                "$set": {
+                    "exercises": [ex.model_dump() for ex in exercises],
+                    "updated_at": datetime.utcnow(),
+                }
+            },
         )
         return result.modified_count > 0
 
+    async def find_missing_exercise_snapshots(
+        self, limit: int = 500
+    ) -> List[WorkoutPackageEntity]:
+        """Find packages saved before exercise snapshots existed"""
+        packages = []
+        cursor = self.collection.find(
+            {"exercises": {"$elemMatch": {"name": {"$exists": False}}}}
+        ).limit(limit)
+        for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            packages.append(WorkoutPackageEntity(**doc))
+        return packages
+
+    async def refresh_exercise_snapshot(
+        self, exercise_id: str, name: str, type: str, category: str
+    ) -> int:
+        """Update the snapshot of one exercise in every package that uses it"""
+        result = self.collection.update_many(
+            {"exercises.exercise_id": exercise_id},
+            {
+                "$set": {
+                    "exercises.$[ex].name": name,
+                    "exercises.$[ex].type": type,
+                    "exercises.$[ex].category": category,
+                    "updated_at": datetime.utcnow(),
+                }
+            },
+            array_filters=[{"ex.exercise_id": exercise_id}],
+        )
+        return result.modified_count
+
     async def delete(self, package_id: str) -> bool:
         """Delete a package"""
         result = self.collection.delete_one({"_id": ObjectId(package_id)})
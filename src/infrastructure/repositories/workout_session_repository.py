@@ -1,8 +1,14 @@
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
+from pymongo import ReturnDocument, UpdateOne
 from pymongo.database import Database
 from bson import ObjectId
 from datetime import datetime
-from ...domain.entities.workout_session import WorkoutSessionEntity
+from ...domain.entities.workout_session import (
+    WorkoutSessionEntity,
+    ExerciseLog,
+    SessionActivity,
+)
+from ...domain.exceptions import VersionConflictError
 
 
 def convert_objectid_to_str(doc: dict) -> dict:
@@ -11,9 +17,15 @@ def convert_objectid_to_str(doc: dict) -> dict:
     return doc
 
 
+def local_day_expression(timezone: str, field: str = "$start_time") -> dict:
+    """Aggregation expression for the user's calendar day of a stored UTC date"""
+    return {"$dateToString": {"format": "%Y-%m-%d", "date": field, "timezone": timezone}}
+
+
 class WorkoutSessionRepository:
     def __init__(self, db: Database):
         self.collection = db["workout_sessions"]
+        self.backfills = db["backfills"]
         self._create_indexes()
 
     def _create_indexes(self):
@@ -21,6 +33,11 @@ class WorkoutSessionRepository:
         self.collection.create_index("user_id")
         self.collection.create_index("start_time")
         self.collection.create_index([("user_id", 1), ("start_time", -1)])
+        self.collection.create_index([("user_id", 1), ("updated_at", 1)])
+        # Lets find_completed_without_records skip sessions already applied
+        self.collection.create_index(
+            "records_indexed", partialFilterExpression={"is_completed": True}
+        )
 
     async def create(self, session: WorkoutSessionEntity) -> str:
         """Create a new workout session"""
@@ -28,27 +45,45 @@ class WorkoutSessionRepository:
         result = self.collection.insert_one(session_dict)
         return str(result.inserted_id)
 
-    async def find_by_id(self, session_id: str) -> Optional[WorkoutSessionEntity]:
-        """Find session by ID"""
-        session_data = self.collection.find_one({"_id": ObjectId(session_id)})
+    async def find_by_id(
+        self, session_id: str, projection: Optional[dict] = None
+    ) -> Optional[Union[WorkoutSessionEntity, dict]]:
+        """Find session by ID; with a projection the raw partial document is returned"""
+        session_data = self.collection.find_one({"_id": ObjectId(session_id)}, projection)
         if session_data:
-            return WorkoutSessionEntity(**convert_objectid_to_str(session_data))
+            return self._to_result(session_data, projection)
         return None
 
+    def _to_result(self, doc: dict, projection: Optional[dict]) -> Union[WorkoutSessionEntity, dict]:
+        doc = convert_objectid_to_str(doc)
+        if projection:
+            return doc
+        return WorkoutSessionEntity(**doc)
+
+    async def find_by_ids_for_user(
+        self, session_ids: List[str], user_id: str, projection: Optional[dict] = None
+    ) -> List[Union[WorkoutSessionEntity, dict]]:
+        """Find sessions by IDs, restricted to those owned by the user"""
+        cursor = self.collection.find(
+            {
+                "_id": {"$in": [ObjectId(session_id) for session_id in session_ids]},
+                "user_id": user_id,
+            },
+            projection,
+        )
+        return [self._to_result(doc, projection) for doc in cursor]
+
     async def find_by_user(
-        self, user_id: str, limit: int = 50, skip: int = 0
-    ) -> List[WorkoutSessionEntity]:
+        self, user_id: str, limit: int = 50, skip: int = 0, projection: Optional[dict] = None
+    ) -> List[Union[WorkoutSessionEntity, dict]]:
         """Find sessions by user"""
-        sessions = []
         cursor = (
-            self.collection.find({"user_id": user_id})
+            self.collection.find({"user_id": user_id}, projection)
             .sort("start_time", -1)
             .skip(skip)
             .limit(limit)
         )
-        for doc in cursor:
-            sessions.append(WorkoutSessionEntity(**convert_objectid_to_str(doc)))
-        return sessions
+        return [self._to_result(doc, projection) for doc in cursor]
 
     async def find_by_user_and_date_range(
         self, user_id: str, start_date: datetime, end_date: datetime
@@ -65,15 +100,389 @@ class WorkoutSessionRepository:
             sessions.append(WorkoutSessionEntity(**convert_objectid_to_str(doc)))
         return sessions
 
+    async def count_completed_by_local_day(
+        self, user_id: str, start_date: datetime, end_date: datetime, timezone: str
+    ) -> Dict[str, int]:
+        """Count completed sessions per local day (YYYY-MM-DD) in the database"""
+        pipeline = [
+            {
+                "$match": {
+                    "user_id": user_id,
+                    "is_completed": True,
+                    "start_time": {"$gte": start_date, "$lte": end_date},
+                }
+            },
+            {"$group": {"_id": local_day_expression(timezone), "count": {"$sum": 1}}},
+        ]
+        return {doc["_id"]: doc["count"] for doc in self.collection.aggregate(pipeline)}
+
+    async def find_completed_by_local_day(
+        self, user_ids: List[str], start_date: datetime, end_date: datetime, timezone: str
+    ) -> Dict[str, List[dict]]:
+        """Calendar entries of completed sessions grouped by local day, oldest first"""
+        pipeline = [
+            {
+                "$match": {
+                    "user_id": {"$in": user_ids},
+                    "is_completed": True,
+                    "start_time": {"$gte": start_date, "$lt": end_date},
+                }
+            },
+            {"$sort": {"start_time": 1}},
+            {
+                "$group": {
+                    "_id": local_day_expression(timezone),
+                    "sessions": {
+                        "$push": {
+                            "id": {"$toString": "$_id"},
+                            "user_id": "$user_id",
+                            "package_name": "$package_name",
+                            "duration_minutes": "$duration_minutes",
+                            "start_time": "$start_time",
+                        }
+                    },
+                }
+            },
+        ]
+        return {doc["_id"]: doc["sessions"] for doc in self.collection.aggregate(pipeline)}
+
+    async def find_completed_with_exercise(
+        self, user_id: str, exercise_id: str
+    ) -> List[WorkoutSessionEntity]:
+        """Find a user's completed sessions that logged an exercise"""
+        cursor = self.collection.find(
+            {"user_id": user_id, "is_completed": True, "exercises.exercise_id": exercise_id}
+        )
+        return [WorkoutSessionEntity(**convert_objectid_to_str(doc)) for doc in cursor]
+
+    async def find_completed_without_records(self, limit: int = 500) -> List[WorkoutSessionEntity]:
+        """Find completed sessions not yet applied to the personal records"""
+        cursor = self.collection.find(
+            {"is_completed": True, "records_indexed": {"$ne": True}}
+        ).limit(limit)
+        return [WorkoutSessionEntity(**convert_objectid_to_str(doc)) for doc in cursor]
+
+    async def mark_records_indexed(self, session_ids: List[str]) -> None:
+        """Flag sessions as applied to the personal records"""
+        self.collection.update_many(
+            {"_id": {"$in": [ObjectId(i) for i in session_ids]}},
+            {"$set": {"records_indexed": True}},
+        )
+
+    async def find_updated_since(
+        self, user_id: str, since: Optional[datetime]
+    ) -> List[WorkoutSessionEntity]:
+        """Find sessions of a user changed since a point in time, or all of them"""
+        query = {"user_id": user_id}
+        if since:
+            query["updated_at"] = {"$gte": since}
+        cursor = self.collection.find(query)
+        return [WorkoutSessionEntity(**convert_objectid_to_str(doc)) for doc in cursor]
+
+    async def count_completed(self, user_id: str) -> int:
+        """Count all completed sessions of a user"""
+        return self.collection.count_documents({"user_id": user_id, "is_completed": True})
+
     async def update(self, session_id: str, session: WorkoutSessionEntity) -> bool:
-        """Update a session"""
-        session_dict = session.model_dump(by_alias=True, exclude={"id"})
+        """Update a session if its version is unchanged since it was read"""
+        session.updated_at = datetime.utcnow()
+        session_dict = session.model_dump(by_alias=True, exclude={"id", "version"})
+        # Documents written before versioning have no version field and count as 0
+        expected_version = session.version if session.version else {"$in": [0, None]}
         result = self.collection.update_one(
-            {"_id": ObjectId(session_id)}, {"$set": session_dict}
+            {"_id": ObjectId(session_id), "version": expected_version},
+            {"$set": session_dict, "$inc": {"version": 1}},
+        )
+        if result.matched_count == 0:
+            current = self.collection.find_one({"_id": ObjectId(session_id)}, {"version": 1})
+            if current:
+                raise VersionConflictError(current.get("version", 0))
+            return False
+        session.version += 1
+        return True
+
+    async def replace_exercises_many(
+        self, sessions: List[WorkoutSessionEntity]
+    ) -> Dict[str, bool]:
+        """Write the exercises of several sessions at once, each guarded by its version"""
+        if not sessions:
+            return {}
+        now = datetime.utcnow()
+        exercises = {str(s.id): [ex.model_dump() for ex in s.exercises] for s in sessions}
+        result = self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {
+                        "_id": ObjectId(str(s.id)),
+                        "version": s.version if s.version else {"$in": [0, None]},
+                    },
+                    {
+                        "$set": {"exercises": exercises[str(s.id)], "updated_at": now},
+                        "$inc": {"version": 1},
+                    },
+                )
+                for s in sessions
+            ],
+            ordered=False,
         )
-        return result.modified_count > 0
+
+        if result.matched_count == len(sessions):
+            written = {str(s.id): True for s in sessions}
+        else:
+            # Bulk results are aggregate; check which sessions hold our write
+            stored = {
+                str(doc["_id"]): doc
+                for doc in self.collection.find(
+                    {"_id": {"$in": [ObjectId(str(s.id)) for s in sessions]}},
+                    {"exercises": 1, "version": 1},
+                )
+            }
+            written = {
+                str(s.id): str(s.id) in stored
+                and stored[str(s.id)].get("version", 0) == s.version + 1
+                and stored[str(s.id)].get("exercises") == exercises[str(s.id)]
+                for s in sessions
+            }
+        for s in sessions:
+            if written[str(s.id)]:
+                s.version += 1
+        return written
 
     async def delete(self, session_id: str) -> bool:
         """Delete a session"""
         result = self.collection.delete_one({"_id": ObjectId(session_id)})
         return result.deleted_count > 0
+
+    async def set_activity(
+        self,
+        session_id: str,
+        activity: Optional[SessionActivity],
+        previous: Optional[SessionActivity],
+    ) -> bool:
+        """Swap a session's contribution to the rollups, only if it is still previous"""
+        query: dict = {"_id": ObjectId(session_id)}
+        if previous:
+            query.update({f"activity.{k}": v for k, v in previous.model_dump().items()})
+        else:
+            query["activity"] = None  # missing or null
+        result = self.collection.update_one(
+            query, {"$set": {"activity": activity.model_dump() if activity else None}}
+        )
+        return result.matched_count > 0
+
+    async def find_completed_without_activity(self, limit: int = 500) -> List[WorkoutSessionEntity]:
+        """Find completed sessions not yet counted in the daily activity rollups"""
+        sessions = []
+        cursor = self.collection.find(
+            {"is_completed": True, "activity": {"$exists": False}}
+        ).limit(limit)
+        for doc in cursor:
+            sessions.append(WorkoutSessionEntity(**convert_objectid_to_str(doc)))
+        return sessions
+
+    # Sessions are stored with an activity field from the start, so only those
+    # older than the rollups lack one and the backfill above has to run once
+    async def activity_backfilled(self) -> bool:
+        """Whether every completed session already carries its activity"""
+        return self.backfills.find_one({"_id": "workout_sessions.activity"}) is not None
+
+    async def mark_activity_backfilled(self) -> None:
+        """Record that the activity backfill finished, so later boots skip it"""
+        self.backfills.update_one(
+            {"_id": "workout_sessions.activity"}, {"$set": {"done_at": datetime.utcnow()}}, upsert=True
+        )
+
+    # The partial updates below return the updated document projected to what
+    # the caller needs (at least is_completed), or None when nothing matched.
+
+    async def push_exercise(
+        self, session_id: str, user_id: str, exercise: ExerciseLog
+    ) -> Optional[dict]:
+        """Append a single exercise to the session"""
+        return self.collection.find_one_and_update(
+            {"_id": ObjectId(session_id), "user_id": user_id},
+            {
+                "$push": {"exercises": exercise.model_dump()},
+                "$set": {"updated_at": datetime.utcnow()},
+                "$inc": {"version": 1},
+            },
+            projection={"is_completed": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def set_exercise_notes(
+        self, session_id: str, user_id: str, exercise_id: str, notes: Optional[str]
+    ) -> bool:
+        """Update the notes of a single exercise"""
+        result = self.collection.update_one(
+            {
+                "_id": ObjectId(session_id),
+                "user_id": user_id,
+                "exercises.exercise_id": exercise_id,
+            },
+            {
+                "$set": {"exercises.$.notes": notes, "updated_at": datetime.utcnow()},
+                "$inc": {"version": 1},
+            },
+        )
+        return result.matched_count > 0
+
+    async def pull_exercise(
+        self, session_id: str, user_id: str, exercise_id: str
+    ) -> Optional[dict]:
+        """Remove an exercise from the session"""
+        return self.collection.find_one_and_update(
+            {
+                "_id": ObjectId(session_id),
+                "user_id": user_id,
+                "exercises.exercise_id": exercise_id,
+            },
+            {
+                "$pull": {"exercises": {"exercise_id": exercise_id}},
+                "$set": {"updated_at": datetime.utcnow()},
+                "$inc": {"version": 1},
+            },
+            projection={"is_completed": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def push_set(
+        self,
+        session_id: str,
+        user_id: str,
+        exercise_id: str,
+        exercise_type: str,
+        set_data: dict,
+    ) -> Optional[dict]:
+        """Append a set to an exercise; the result holds the matched exercise"""
+        return self.collection.find_one_and_update(
+            {
+                "_id": ObjectId(session_id),
+                "user_id": user_id,
+                "exercises": {
+                    "$elemMatch": {"exercise_id": exercise_id, "type": exercise_type}
+                },
+            },
+            {
+                "$push": {"exercises.$.sets": set_data},
+                "$set": {"updated_at": datetime.utcnow()},
+                "$inc": {"version": 1},
+            },
+            projection={"exercises.$": 1, "is_completed": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def set_set(
+        self,
+        session_id: str,
+        user_id: str,
+        exercise_id: str,
+        exercise_type: str,
+        set_index: int,
+        set_data: dict,
+    ) -> Optional[dict]:
+        """Replace a single set of an exercise"""
+        return self.collection.find_one_and_update(
+            {
+                "_id": ObjectId(session_id),
+                "user_id": user_id,
+                "exercises": {
+                    "$elemMatch": {
+                        "exercise_id": exercise_id,
+                        "type": exercise_type,
+                        f"sets.{set_index}": {"$exists": True},
+                    }
+                },
+            },
+            {
+                "$set": {
+                    f"exercises.$.sets.{set_index}": set_data,
+                    "updated_at": datetime.utcnow(),
+                },
+                "$inc": {"version": 1},
+            },
+            projection={"is_completed": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def pull_set(
+        self, session_id: str, user_id: str, exercise_id: str, set_index: int
+    ) -> Optional[dict]:
+        """Remove a single set of an exercise by index"""
+        # MongoDB has no pull-by-index, so the array is rebuilt without the slot
+        # in one pipeline update, on the same exercise the $elemMatch picks
+        sets = {"$ifNull": [{"$arrayElemAt": ["$exercises.sets", "$$i"]}, []]}
+        target = {
+            "$arrayElemAt": [
+                {
+                    "$filter": {
+                        "input": {"$range": [0, {"$size": "$exercises"}]},
+                        "as": "i",
+                        "cond": {
+                            "$and": [
+                                {"$eq": [{"$arrayElemAt": ["$exercises.exercise_id", "$$i"]}, exercise_id]},
+                                {"$gt": [{"$size": sets}, set_index]},
+                            ]
+                        },
+                    }
+                },
+                0,
+            ]
+        }
+        without_set = {
+            "$map": {
+                "input": {
+                    "$filter": {
+                        "input": {"$range": [0, {"$size": sets}]},
+                        "as": "j",
+                        "cond": {"$ne": ["$$j", set_index]},
+                    }
+                },
+                "as": "j",
+                "in": {"$arrayElemAt": [sets, "$$j"]},
+            }
+        }
+        return self.collection.find_one_and_update(
+            {
+                "_id": ObjectId(session_id),
+                "user_id": user_id,
+                "exercises": {
+                    "$elemMatch": {
+                        "exercise_id": exercise_id,
+                        f"sets.{set_index}": {"$exists": True},
+                    }
+                },
+            },
+            [
+                {
+                    "$set": {
+                        "exercises": {
+                            "$let": {
+                                "vars": {"target": target},
+                                "in": {
+                                    "$map": {
+                                        "input": {"$range": [0, {"$size": "$exercises"}]},
+                                        "as": "i",
+                                        "in": {
+                                            "$cond": [
+                                                {"$eq": ["$$i", "$$target"]},
+                                                {
+                                                    "$mergeObjects": [
+                                                        {"$arrayElemAt": ["$exercises", "$$i"]},
+                                                        {"sets": without_set},
+                                                    ]
+                                                },
+                                                {"$arrayElemAt": ["$exercises", "$$i"]},
+                                            ]
+                                        },
+                                    }
+                                },
+                            }
+                        },
+                        "updated_at": datetime.utcnow(),
+                        "version": {"$add": [{"$ifNull": ["$version", 0]}, 1]},
+                    }
+                }
+            ],
+            projection={"is_completed": 1},
+        )
@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -14,15 +15,37 @@ from .presentation.routes import (
     water_intake_routes,
     weight_history_routes,
     reminder_routes,
+    batch_routes,
+    sync_routes,
 )
 
 
+async def flush_water_buffer_periodically():
+    """Flush the water write-behind buffer once entries reach their max age"""
+    while True:
+        await asyncio.sleep(settings.WATER_BUFFER_MAX_SECONDS)
+        await water_intake_routes.get_water_intake_use_cases().flush_buffered(only_if_due=True)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     connect_to_mongo()
+    await competition_group_routes.get_group_use_cases().migrate_embedded_members()
+    # Bitmaps are seeded from the buckets as they stand, before backfill_activity adds to both
+    await workout_session_routes.get_session_use_cases().backfill_activity_years()
+    await workout_session_routes.get_session_use_cases().backfill_activity()
+    await workout_session_routes.get_session_use_cases().backfill_personal_records()
+    await workout_package_routes.get_package_use_cases().backfill_exercise_snapshots()
+    await water_intake_routes.get_water_intake_use_cases().backfill_water_counters()
+    flusher = None
+    if settings.WATER_BUFFER_ENABLED:
+        flusher = asyncio.create_task(flush_water_buffer_periodically())
     yield
     # Shutdown
+    if flusher:
+        flusher.cancel()
+    await water_intake_routes.get_water_intake_use_cases().flush_buffered()
     close_mongo_connection()
 
 
@@ -46,6 +69,8 @@ app.include_router(competition_group_routes.router)
 app.include_router(water_intake_routes.router)
 app.include_router(weight_history_routes.router)
 app.include_router(reminder_routes.router)
+app.include_router(batch_routes.router)
+app.include_router(sync_routes.router)
 
 
 @app.get("/")
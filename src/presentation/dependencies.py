@@ -1,13 +1,26 @@
-from fastapi import Depends, HTTPException, status, Header
-from typing import Optional
+from fastapi import Depends, HTTPException, Query, Request, status, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+from bson import ObjectId
+import hashlib
 from ..core.database import get_database
 from ..core.security import decode_access_token, verify_admin_key
 from ..infrastructure.repositories.user_repository import UserRepository
+from ..infrastructure.repositories.idempotency_repository import IdempotencyRepository
+from ..infrastructure.repositories.group_membership_repository import GroupMembershipRepository
+from ..infrastructure.repositories.calendar_snapshot_repository import CalendarSnapshotRepository
+from ..infrastructure.repositories.muscle_volume_repository import MuscleVolumeRepository
 from ..application.use_cases.auth_use_cases import AuthUseCases
 
 
-async def get_current_user_id(authorization: Optional[str] = Header(None)) -> str:
+async def get_current_user_id(request: Request, authorization: Optional[str] = Header(None)) -> str:
     """Get current user ID from JWT token"""
+    # Sub-requests of /batch were authenticated once by the batch itself
+    batch_user_id = getattr(request.state, "batch_user_id", None)
+    if batch_user_id:
+        return batch_user_id
+
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,6 +49,121 @@ async def get_current_user_id(authorization: Optional[str] = Header(None)) -> st
     return user_id
 
 
+MAX_IDS_PER_REQUEST = 100
+
+
+def get_ids_query(
+    ids: Optional[str] = Query(None, description="Comma-separated IDs to fetch in one request"),
+) -> Optional[List[str]]:
+    """Parse the ids query parameter used by bulk reads"""
+    if ids is None:
+        return None
+    id_list = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+    if len(id_list) > MAX_IDS_PER_REQUEST:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_IDS_PER_REQUEST} ids per request",
+        )
+    if not all(ObjectId.is_valid(i) for i in id_list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid id")
+    return id_list
+
+
+def fields_query(allowed: Iterable[str]):
+    """Build a dependency that parses a fields query parameter against an allow-list"""
+    allowed = set(allowed)
+
+    def parse_fields(
+        fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    ) -> Optional[List[str]]:
+        if fields is None:
+            return None
+        field_list = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [f for f in field_list if f not in allowed]
+        if not field_list or unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(sorted(allowed))}",
+            )
+        return field_list
+
+    return parse_fields
+
+
+class Idempotency:
+    """Runs a create handler at most once per Idempotency-Key header.
+
+    Retries with the same key get the stored response back; without the
+    header the handler simply runs.
+    """
+
+    def __init__(
+        self,
+        repository: IdempotencyRepository,
+        user_id: str,
+        scope: str,
+        key: Optional[str],
+        fingerprint: str,
+    ):
+        self.repository = repository
+        self.user_id = user_id
+        self.scope = scope
+        self.key = key
+        self.fingerprint = fingerprint
+
+    async def run(self, call: Callable[[], Awaitable[Any]], status_code: int = status.HTTP_200_OK) -> Any:
+        if not self.key:
+            return await call()
+
+        claim = await self.repository.claim(self.user_id, self.scope, self.key, self.fingerprint)
+        if claim:
+            if claim.get("fingerprint") != self.fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request",
+                )
+            if not claim.get("response"):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                )
+            stored = claim["response"]
+            return JSONResponse(
+                status_code=stored["status_code"],
+                content=stored["body"],
+                headers={"Idempotent-Replayed": "true"},
+            )
+
+        try:
+            result = await call()
+        except BaseException:
+            await self.repository.release(self.user_id, self.scope, self.key)
+            raise
+        await self.repository.complete(
+            self.user_id,
+            self.scope,
+            self.key,
+            {"status_code": status_code, "body": jsonable_encoder(result)},
+        )
+        return result
+
+
+async def get_idempotency(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, max_length=128),
+    user_id: str = Depends(get_current_user_id),
+) -> Idempotency:
+    """Idempotency guard scoped to the user, method and path of the request"""
+    fingerprint = hashlib.sha256(await request.body()).hexdigest()
+    return Idempotency(
+        IdempotencyRepository(get_database()),
+        user_id,
+        f"{request.method} {request.url.path}",
+        idempotency_key,
+        fingerprint,
+    )
+
+
 async def verify_admin(x_admin_key: Optional[str] = Header(None)) -> bool:
     """Verify admin access"""
     if not x_admin_key or not verify_admin_key(x_admin_key):
@@ -50,4 +178,7 @@ def get_auth_use_cases() -> AuthUseCases:
     """Get auth use cases instance"""
     db = get_database()
     user_repository = UserRepository(db)
-    return AuthUseCases(user_repository)
+    return AuthUseCases(
+        user_repository, GroupMembershipRepository(db), CalendarSnapshotRepository(db),
+        MuscleVolumeRepository(db),
+    )
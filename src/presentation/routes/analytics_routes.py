@@ -1,30 +1,65 @@
-from fastapi import APIRouter, Depends, Query
-from typing import List, Dict
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Dict, Optional
 from ..schemas.analytics_schemas import (
     WorkoutStatsResponse,
     ExerciseProgressionResponse,
     CalendarDataResponse,
+    DashboardResponse,
+    PersonalRecordResponse,
+    StreakResponse,
+    HeatmapResponse,
+    MuscleVolumeWeekResponse,
+    PeriodComparisonResponse,
 )
 from ..dependencies import get_current_user_id
 from ...core.database import get_database
 from ...infrastructure.repositories.workout_session_repository import (
     WorkoutSessionRepository,
 )
-from ...infrastructure.repositories.water_intake_repository import WaterIntakeRepository
+from ...infrastructure.repositories.daily_activity_repository import DailyActivityRepository
 from ...infrastructure.repositories.user_repository import UserRepository
 from ...application.use_cases.analytics_use_cases import AnalyticsUseCases
+from ...application.use_cases.dashboard_use_cases import DashboardUseCases
+from ...application.use_cases.reminder_use_cases import ReminderUseCases
+from ...infrastructure.repositories.reminder_repository import ReminderRepository
 from ...infrastructure.repositories.weight_history_repository import WeightHistoryRepository
+from ...infrastructure.repositories.calendar_snapshot_repository import CalendarSnapshotRepository
+from ...infrastructure.repositories.sync_tombstone_repository import SyncTombstoneRepository
+from ...infrastructure.repositories.personal_record_repository import PersonalRecordRepository
+from ...infrastructure.repositories.activity_year_repository import ActivityYearRepository
+from ...infrastructure.repositories.exercise_repository import ExerciseRepository
+from ...infrastructure.repositories.muscle_volume_repository import MuscleVolumeRepository
+from ...infrastructure.repositories.water_intake_repository import WaterIntakeRepository
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+MAX_CHART_POINTS = 2000
+
 
 def get_analytics_use_cases() -> AnalyticsUseCases:
     db = get_database()
     session_repository = WorkoutSessionRepository(db)
-    water_repo = WaterIntakeRepository(db)
+    activity_repo = DailyActivityRepository(db)
     user_repo = UserRepository(db)
     weight_repo = WeightHistoryRepository(db)
-    return AnalyticsUseCases(session_repository, water_repo, user_repo, weight_repo)
+    snapshot_repo = CalendarSnapshotRepository(db)
+    record_repo = PersonalRecordRepository(db)
+    year_repo = ActivityYearRepository(db)
+    exercise_repo = ExerciseRepository(db)
+    muscle_volume_repo = MuscleVolumeRepository(db)
+    water_repo = WaterIntakeRepository(db)
+    return AnalyticsUseCases(
+        session_repository, activity_repo, user_repo, weight_repo, snapshot_repo, record_repo, year_repo,
+        exercise_repo, muscle_volume_repo, water_repo,
+    )
+
+
+def get_dashboard_use_cases(
+    analytics_use_cases: AnalyticsUseCases = Depends(get_analytics_use_cases),
+) -> DashboardUseCases:
+    db = get_database()
+    reminder_use_cases = ReminderUseCases(ReminderRepository(db), SyncTombstoneRepository(db), UserRepository(db))
+    return DashboardUseCases(analytics_use_cases, reminder_use_cases)
 
 
 @router.get("/stats", response_model=WorkoutStatsResponse)
@@ -38,20 +73,98 @@ async def get_workout_stats(
     return stats
 
 
+@router.get("/dashboard", response_model=DashboardResponse)
+async def get_dashboard(
+    days: int = Query(30, ge=1, le=365),
+    weight_days: int = Query(90, ge=1, le=365),
+    user_id: str = Depends(get_current_user_id),
+    dashboard_use_cases: DashboardUseCases = Depends(get_dashboard_use_cases),
+):
+    """Get stats, calendar, water, weight and today's reminders in one response"""
+    return await dashboard_use_cases.get_dashboard(user_id, days, weight_days)
+
+
 @router.get("/progression/{exercise_id}", response_model=List[ExerciseProgressionResponse])
 async def get_exercise_progression(
     exercise_id: str,
     days: int = Query(90, ge=1, le=365),
+    max_points: Optional[int] = Query(None, ge=3, le=MAX_CHART_POINTS),
     user_id: str = Depends(get_current_user_id),
     analytics_use_cases: AnalyticsUseCases = Depends(get_analytics_use_cases),
 ):
-    """Get exercise progression data"""
+    """Get exercise progression data, optionally downsampled to max_points"""
     progression = await analytics_use_cases.get_exercise_progression(
-        user_id, exercise_id, days
+        user_id, exercise_id, days, max_points
     )
     return progression
 
 
+@router.get("/records", response_model=List[PersonalRecordResponse])
+async def get_personal_records(
+    user_id: str = Depends(get_current_user_id),
+    analytics_use_cases: AnalyticsUseCases = Depends(get_analytics_use_cases),
+):
+    """Get best weight, estimated 1RM and volume set for every exercise"""
+    return await analytics_use_cases.get_personal_records(user_id)
+
+
+@router.get("/records/{exercise_id}", response_model=PersonalRecordResponse)
+async def get_exercise_records(
+    exercise_id: str,
+    user_id: str = Depends(get_current_user_id),
+    analytics_use_cases: AnalyticsUseCases = Depends(get_analytics_use_cases),
+):
+    """Get best weight, estimated 1RM and volume set for one exercise"""
+    records = await analytics_use_cases.get_exercise_records(user_id, exercise_id)
+    if not records:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No records for this exercise")
+    return records
+
+
+@router.get("/streak", response_model=StreakResponse)
+async def get_streak(
+    user_id: str = Depends(get_current_user_id),
+    analytics_use_cases: AnalyticsUseCases = Depends(get_analytics_use_cases),
+):
+    """Get current and longest streaks of consecutive workout days and weeks"""
+    return await analytics_use_cases.get_streaks(user_id)
+
+
+@router.get("/heatmap", response_model=HeatmapResponse)
+async def get_heatmap(
+    year: int = Query(..., ge=2020, le=2100),
+    user_id: str = Depends(get_current_user_id),
+    analytics_use_cases: AnalyticsUseCases = Depends(get_analytics_use_cases),
+):
+    """Get the activity level (0-4) of every day of a year"""
+    return await analytics_use_cases.get_heatmap(user_id, year)
+
+
+@router.get("/muscle-volume", response_model=List[MuscleVolumeWeekResponse])
+async def get_muscle_volume(
+    weeks: int = Query(8, ge=1, le=52),
+    user_id: str = Depends(get_current_user_id),
+    analytics_use_cases: AnalyticsUseCases = Depends(get_analytics_use_cases),
+):
+    """Get weekly strength volume by muscle group and category, oldest week first"""
+    return await analytics_use_cases.get_muscle_volume(user_id, weeks)
+
+
+@router.get("/compare", response_model=PeriodComparisonResponse)
+async def compare_periods(
+    period: str = Query("week", pattern="^(week|month)$"),
+    periods: int = Query(2, ge=2, le=12),
+    to_date: bool = Query(False),
+    user_id: str = Depends(get_current_user_id),
+    analytics_use_cases: AnalyticsUseCases = Depends(get_analytics_use_cases),
+):
+    """Compare workouts, volume, duration, calories and water across consecutive weeks or months"""
+    try:
+        return await analytics_use_cases.compare_periods(user_id, period, periods, to_date)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.get("/calendar", response_model=CalendarDataResponse)
 async def get_calendar_data(
     year: int = Query(..., ge=2020, le=2100),
@@ -59,9 +172,10 @@ async def get_calendar_data(
     user_id: str = Depends(get_current_user_id),
     analytics_use_cases: AnalyticsUseCases = Depends(get_analytics_use_cases),
 ):
-    """Get calendar data for a specific month"""
+    """Get calendar data for a specific month, with the current streaks"""
     calendar_data = await analytics_use_cases.get_calendar_data(user_id, year, month)
-    return {"calendar_data": calendar_data}
+    streak = await analytics_use_cases.get_streaks(user_id)
+    return {"calendar_data": calendar_data, "streak": streak}
 
 
 @router.get("/water/recommendation", response_model=Dict)
@@ -86,9 +200,10 @@ async def get_water_stats(
 @router.get("/weight/progression", response_model=List[Dict])
 async def get_weight_progression(
     days: int = Query(90, ge=1, le=365),
+    max_points: Optional[int] = Query(None, ge=3, le=MAX_CHART_POINTS),
     user_id: str = Depends(get_current_user_id),
     analytics_use_cases: AnalyticsUseCases = Depends(get_analytics_use_cases),
 ):
-    """Get weight progression data"""
-    progression = await analytics_use_cases.get_weight_progression(user_id, days)
+    """Get weight progression data, optionally downsampled to max_points"""
+    progression = await analytics_use_cases.get_weight_progression(user_id, days, max_points)
     return progression
\ No newline at end of file
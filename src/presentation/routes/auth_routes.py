@@ -67,7 +67,8 @@ async def update_me(
             height=request.height,
             weight=request.weight,
             gender=request.gender,
-            birth_date=request.birth_date
+            birth_date=request.birth_date,
+            timezone=request.timezone,
         )
         if success:
             user = await auth_use_cases.get_current_user(user_id)
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import time
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from ..schemas.batch_schemas import BatchRequest, BatchResponse, BatchSubRequest
+from ..dependencies import get_current_user_id
+from ...core.concurrency import run_in_thread
+from ...core.config import settings
+
+router = APIRouter(prefix="/batch", tags=["Batch"])
+
+
+_TIMED_OUT = {"status": status.HTTP_504_GATEWAY_TIMEOUT, "body": None}
+
+
+async def _dispatch(app, sub_request: BatchSubRequest, user_id: str, deadline: float) -> dict:
+    """Run one sub-request through the application in-process, until the deadline"""
+    # Cancelling the awaiting task can't stop a worker thread, so the thread checks
+    # the deadline itself: skipped if it starts late, abandoned at its next await
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return _TIMED_OUT
+    path, _, query = sub_request.path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": sub_request.method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"accept", b"application/json")],
+        "client": None,
+        "server": None,
+        "state": {"batch_user_id": user_id},
+    }
+    response = {"status": status.HTTP_500_INTERNAL_SERVER_ERROR, "body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    try:
+        await asyncio.wait_for(app(scope, receive, send), remaining)
+    except asyncio.TimeoutError:
+        return _TIMED_OUT
+
+    body = response["body"]
+    try:
+        body = json.loads(body) if body else None
+    except ValueError:
+        body = body.decode(errors="replace")
+    return {"status": response["status"], "body": body}
+
+
+@router.post("", response_model=BatchResponse)
+async def batch(
+    request: BatchRequest,
+    http_request: Request,
+    user_id: str = Depends(get_current_user_id),
+):
+    """Run several GET requests concurrently and return all responses together"""
+    if len(request.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch accepts at most {settings.BATCH_MAX_REQUESTS} requests",
+        )
+    if any(sub.path.startswith(router.prefix) for sub in request.requests):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Batches cannot be nested"
+        )
+
+    # Handlers block on PyMongo, so each sub-request gets its own worker thread
+    app = http_request.app
+    deadline = time.monotonic() + settings.BATCH_TIMEOUT_SECONDS
+    tasks = [
+        asyncio.ensure_future(
+            run_in_thread(lambda sub=sub: _dispatch(app, sub, user_id, deadline))
+        )
+        for sub in request.requests
+    ]
+    await asyncio.wait(tasks, timeout=settings.BATCH_TIMEOUT_SECONDS)
+
+    responses = []
+    for task in tasks:
+        if not task.done():
+            # Stops waiting only; the thread gives up on its own at its next await
+            task.cancel()
+            responses.append(_TIMED_OUT)
+        elif task.exception():
+            responses.append({"status": status.HTTP_500_INTERNAL_SERVER_ERROR, "body": None})
+        else:
+            responses.append(task.result())
+    return {"responses": responses}
@@ -1,22 +1,36 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from typing import Dict, List, Optional
+from fastapi.responses import JSONResponse
+from typing import Dict, List, Literal, Optional
 from ..schemas.competition_group_schemas import (
     CreateGroupRequest,
     JoinGroupRequest,
     GroupResponse,
     GroupDetailsResponse,
+    LeaderboardResponse,
+    MemberRankResponse,
 )
-from ..dependencies import get_current_user_id
+from ..dependencies import get_current_user_id, fields_query, get_idempotency, Idempotency
 from ...core.database import get_database
 from ...infrastructure.repositories.competition_group_repository import (
     CompetitionGroupRepository,
 )
+from ...infrastructure.repositories.group_membership_repository import (
+    GroupMembershipRepository,
+)
+from ...infrastructure.repositories.daily_activity_repository import (
+    DailyActivityRepository,
+)
+from ...infrastructure.repositories.calendar_snapshot_repository import (
+    CalendarSnapshotRepository,
+)
 from ...infrastructure.repositories.user_repository import UserRepository
 from ...infrastructure.repositories.workout_session_repository import (
     WorkoutSessionRepository,
 )
 from ...application.use_cases.competition_group_use_cases import (
     CompetitionGroupUseCases,
+    GROUP_FIELDS,
+    GROUP_DETAIL_FIELDS,
 )
 
 router = APIRouter(prefix="/groups", tags=["Competition Groups"])
@@ -25,10 +39,14 @@ router = APIRouter(prefix="/groups", tags=["Competition Groups"])
 def get_group_use_cases() -> CompetitionGroupUseCases:
     db = get_database()
     group_repository = CompetitionGroupRepository(db)
+    membership_repository = GroupMembershipRepository(db)
     user_repository = UserRepository(db)
     session_repository = WorkoutSessionRepository(db)
+    activity_repository = DailyActivityRepository(db)
+    snapshot_repository = CalendarSnapshotRepository(db)
     return CompetitionGroupUseCases(
-        group_repository, user_repository, session_repository
+        group_repository, membership_repository, user_repository, session_repository,
+        activity_repository, snapshot_repository,
     )
 
 
@@ -37,15 +55,19 @@ async def create_group(
     request: CreateGroupRequest,
     user_id: str = Depends(get_current_user_id),
     group_use_cases: CompetitionGroupUseCases = Depends(get_group_use_cases),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
     """Create a new competition group"""
-    try:
-        result = await group_use_cases.create_group(
-            user_id, request.name, request.description
-        )
-        return result
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    async def create():
+        try:
+            result = await group_use_cases.create_group(
+                user_id, request.name, request.description
+            )
+            return result
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return await idempotency.run(create, status.HTTP_201_CREATED)
 
 
 @router.post("/join", response_model=dict)
@@ -64,28 +86,42 @@ async def join_group(
 
 @router.get("", response_model=List[GroupResponse])
 async def get_user_groups(
+    fields: Optional[List[str]] = Depends(fields_query(GROUP_FIELDS)),
     user_id: str = Depends(get_current_user_id),
     group_use_cases: CompetitionGroupUseCases = Depends(get_group_use_cases),
 ):
     """Get all groups for current user"""
-    groups = await group_use_cases.get_user_groups(user_id)
+    groups = await group_use_cases.get_user_groups(user_id, fields)
+    if fields:
+        # Partial groups do not satisfy GroupResponse
+        return JSONResponse(content=groups)
     return groups
 
 
-@router.get("/{group_id}", response_model=GroupDetailsResponse)
-async def get_group_details(
+@router.get("/{group_id}/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
     group_id: str,
+    limit: int = Query(50, ge=1, le=100),
+    skip: int = Query(0, ge=0),
     user_id: str = Depends(get_current_user_id),
     group_use_cases: CompetitionGroupUseCases = Depends(get_group_use_cases),
 ):
-    """Get group details with leaderboard"""
+    """Get one page of the group leaderboard"""
     try:
-        group = await group_use_cases.get_group_details(group_id, user_id)
-        if not group:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Group not found"
-            )
-        return group
+        return await group_use_cases.get_leaderboard(group_id, user_id, skip, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+
+@router.get("/{group_id}/leaderboard/me", response_model=MemberRankResponse)
+async def get_my_rank(
+    group_id: str,
+    user_id: str = Depends(get_current_user_id),
+    group_use_cases: CompetitionGroupUseCases = Depends(get_group_use_cases),
+):
+    """Get the current user's rank in the group leaderboard"""
+    try:
+        return await group_use_cases.get_member_rank(group_id, user_id)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
@@ -137,16 +173,24 @@ async def get_group_calendar(
 async def get_group_details(
     group_id: str,
     days: Optional[int] = Query(None, ge=1, le=365),
+    metric: Literal["workouts", "volume", "duration_minutes", "calories"] = "workouts",
+    period: Optional[Literal["day", "week", "month"]] = None,
+    fields: Optional[List[str]] = Depends(fields_query(GROUP_DETAIL_FIELDS)),
     user_id: str = Depends(get_current_user_id),
     group_use_cases: CompetitionGroupUseCases = Depends(get_group_use_cases),
 ):
     """Get group details with leaderboard"""
     try:
-        group = await group_use_cases.get_group_details(group_id, user_id, days)
+        group = await group_use_cases.get_group_details(
+            group_id, user_id, days, metric, period, fields
+        )
         if not group:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Group not found"
             )
+        if fields:
+            # Partial groups do not satisfy GroupDetailsResponse
+            return JSONResponse(content=group)
         return group
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
\ No newline at end of file
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from typing import List, Optional
 from ..schemas.exercise_schemas import CreateExerciseRequest, ExerciseResponse
-from ..dependencies import verify_admin, get_current_user_id
+from ..dependencies import verify_admin, get_current_user_id, get_ids_query
 from ...core.database import get_database
 from ...infrastructure.repositories.exercise_repository import ExerciseRepository
+from ...infrastructure.repositories.workout_package_repository import (
+    WorkoutPackageRepository,
+)
 from ...application.use_cases.exercise_use_cases import ExerciseUseCases
 
 router = APIRouter(prefix="/exercises", tags=["Exercises"])
@@ -12,7 +15,8 @@ router = APIRouter(prefix="/exercises", tags=["Exercises"])
 def get_exercise_use_cases() -> ExerciseUseCases:
     db = get_database()
     exercise_repository = ExerciseRepository(db)
-    return ExerciseUseCases(exercise_repository)
+    package_repository = WorkoutPackageRepository(db)
+    return ExerciseUseCases(exercise_repository, package_repository)
 
 
 @router.post(
@@ -40,11 +44,14 @@ async def create_exercise(
 @router.get("", response_model=List[ExerciseResponse])
 async def get_exercises(
     category: str = None,
+    ids: Optional[List[str]] = Depends(get_ids_query),
     user_id: str = Depends(get_current_user_id),
     exercise_use_cases: ExerciseUseCases = Depends(get_exercise_use_cases),
 ):
-    """Get all exercises or filter by category"""
-    if category:
+    """Get all exercises, filter by category or fetch several by ID"""
+    if ids is not None:
+        exercises = await exercise_use_cases.get_exercises_by_ids(ids)
+    elif category:
         exercises = await exercise_use_cases.get_exercises_by_category(category)
     else:
         exercises = await exercise_use_cases.get_all_exercises()
@@ -62,3 +69,29 @@ async def get_exercise(
     if not exercise:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Exercise not found")
     return exercise
+
+
+@router.put(
+    "/{exercise_id}",
+    response_model=dict,
+    dependencies=[Depends(verify_admin)],
+)
+async def update_exercise(
+    exercise_id: str,
+    request: CreateExerciseRequest,
+    exercise_use_cases: ExerciseUseCases = Depends(get_exercise_use_cases),
+):
+    """Update an exercise (admin only)"""
+    try:
+        packages_updated = await exercise_use_cases.update_exercise(
+            exercise_id=exercise_id,
+            name=request.name,
+            description=request.description,
+            category=request.category,
+            type=request.type,
+            muscle_groups=request.muscle_groups,
+            equipment=request.equipment,
+        )
+        return {"message": "Exercise updated successfully", "packages_updated": packages_updated}
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
@@ -2,8 +2,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
 from ...application.use_cases.reminder_use_cases import ReminderUseCases
 from ...infrastructure.repositories.reminder_repository import ReminderRepository
+from ...infrastructure.repositories.sync_tombstone_repository import SyncTombstoneRepository
+from ...infrastructure.repositories.user_repository import UserRepository
 from ...core.database import get_database
-from ..dependencies import get_current_user_id
+from ..dependencies import get_current_user_id, get_idempotency, Idempotency
 from ..schemas.reminder_schemas import CreateReminderRequest, ReminderResponse, UpdateReminderRequest
 
 router = APIRouter(prefix="/reminders", tags=["Reminders"])
@@ -11,13 +13,14 @@ router = APIRouter(prefix="/reminders", tags=["Reminders"])
 def get_reminder_use_cases() -> ReminderUseCases:
     db = get_database()
     repo = ReminderRepository(db)
-    return ReminderUseCases(repo)
+    return ReminderUseCases(repo, SyncTombstoneRepository(db), UserRepository(db))
 
 @router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def create_reminder(
     request: CreateReminderRequest,
     user_id: str = Depends(get_current_user_id),
     use_cases: ReminderUseCases = Depends(get_reminder_use_cases),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
     # Validação básica para frequency_details
     if request.frequency == 'weekly' and not isinstance(request.frequency_details, list):
@@ -27,14 +30,17 @@ async def create_reminder(
     if request.frequency == 'daily' and request.frequency_details is not None:
          raise HTTPException(status_code=400, detail="Daily frequency does not require details.")
 
-    reminder_id = await use_cases.create_reminder(
-        user_id,
-        request.title,
-        request.time,
-        request.frequency,
-        request.frequency_details
-    )
-    return {"id": reminder_id}
+    async def create():
+        reminder_id = await use_cases.create_reminder(
+            user_id,
+            request.title,
+            request.time,
+            request.frequency,
+            request.frequency_details
+        )
+        return {"id": reminder_id}
+
+    return await idempotency.run(create, status.HTTP_201_CREATED)
 
 @router.get("", response_model=List[ReminderResponse])
 async def get_reminders(
@@ -115,9 +121,14 @@ async def toggle_reminder(
     reminder_id: str,
     user_id: str = Depends(get_current_user_id),
     use_cases: ReminderUseCases = Depends(get_reminder_use_cases),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
-    try:
-        await use_cases.toggle_today_completion(reminder_id, user_id)
-        return {"message": "Reminder updated"}
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
\ No newline at end of file
+    # A retried toggle would otherwise flip the reminder back
+    async def toggle():
+        try:
+            await use_cases.toggle_today_completion(reminder_id, user_id)
+            return {"message": "Reminder updated"}
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+    return await idempotency.run(toggle)
\ No newline at end of file
@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+from ..schemas.sync_schemas import SyncResponse
+from ..schemas.mutation_schemas import MutationBatchRequest, MutationBatchResponse
+from ..dependencies import get_current_user_id
+from ...core.config import settings
+from ...core.database import get_database
+from ...infrastructure.repositories.idempotency_repository import IdempotencyRepository
+from ...infrastructure.repositories.sync_tombstone_repository import SyncTombstoneRepository
+from ...application.use_cases.sync_use_cases import SyncUseCases
+from ...application.use_cases.mutation_use_cases import MutationUseCases
+from ...application.use_cases.workout_session_use_cases import WorkoutSessionUseCases
+from ...application.use_cases.workout_package_use_cases import WorkoutPackageUseCases
+from ...application.use_cases.reminder_use_cases import ReminderUseCases
+from ...application.use_cases.water_intake_use_cases import WaterIntakeUseCases
+from ...application.use_cases.weight_history_use_cases import WeightHistoryUseCases
+from .workout_session_routes import get_session_use_cases
+from .workout_package_routes import get_package_use_cases
+from .reminder_routes import get_reminder_use_cases
+from .water_intake_routes import get_water_intake_use_cases
+from .weight_history_routes import get_weight_history_use_cases
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+def get_sync_use_cases(
+    session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
+    package_use_cases: WorkoutPackageUseCases = Depends(get_package_use_cases),
+    reminder_use_cases: ReminderUseCases = Depends(get_reminder_use_cases),
+    water_intake_use_cases: WaterIntakeUseCases = Depends(get_water_intake_use_cases),
+    weight_history_use_cases: WeightHistoryUseCases = Depends(get_weight_history_use_cases),
+) -> SyncUseCases:
+    return SyncUseCases(
+        session_use_cases,
+        package_use_cases,
+        reminder_use_cases,
+        water_intake_use_cases,
+        weight_history_use_cases,
+        SyncTombstoneRepository(get_database()),
+    )
+
+
+def get_mutation_use_cases(
+    session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
+    reminder_use_cases: ReminderUseCases = Depends(get_reminder_use_cases),
+    water_intake_use_cases: WaterIntakeUseCases = Depends(get_water_intake_use_cases),
+    weight_history_use_cases: WeightHistoryUseCases = Depends(get_weight_history_use_cases),
+) -> MutationUseCases:
+    return MutationUseCases(
+        water_intake_use_cases,
+        weight_history_use_cases,
+        session_use_cases,
+        reminder_use_cases,
+        IdempotencyRepository(get_database()),
+    )
+
+
+@router.get("", response_model=SyncResponse)
+async def sync(
+    since: Optional[str] = Query(None, description="Token returned by the previous sync"),
+    user_id: str = Depends(get_current_user_id),
+    sync_use_cases: SyncUseCases = Depends(get_sync_use_cases),
+):
+    """Get everything changed since the last sync, or everything on first sync"""
+    try:
+        return await sync_use_cases.get_changes(user_id, since)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/mutations", response_model=MutationBatchResponse)
+async def apply_mutations(
+    request: MutationBatchRequest,
+    user_id: str = Depends(get_current_user_id),
+    mutation_use_cases: MutationUseCases = Depends(get_mutation_use_cases),
+):
+    """Apply a queue of offline mutations, returning one result per operation"""
+    if len(request.operations) > settings.MUTATION_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A queue accepts at most {settings.MUTATION_MAX_OPERATIONS} operations",
+        )
+    keys = [op.key for op in request.operations]
+    if len(keys) != len(set(keys)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Operation keys must be unique"
+        )
+
+    results = await mutation_use_cases.apply(
+        user_id, [op.model_dump() for op in request.operations]
+    )
+    return {"results": results}
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, status
 from ..schemas.water_intake_schemas import LogWaterRequest
-from ..dependencies import get_current_user_id
+from ..dependencies import get_current_user_id, get_idempotency, Idempotency
 from ...core.database import get_database
 from ...infrastructure.repositories.water_intake_repository import WaterIntakeRepository
+from ...infrastructure.repositories.daily_activity_repository import DailyActivityRepository
+from ...infrastructure.repositories.user_repository import UserRepository
 from ...application.use_cases.water_intake_use_cases import WaterIntakeUseCases
 
 router = APIRouter(prefix="/water", tags=["Water Intake"])
@@ -10,13 +12,18 @@ router = APIRouter(prefix="/water", tags=["Water Intake"])
 def get_water_intake_use_cases() -> WaterIntakeUseCases:
     db = get_database()
     repo = WaterIntakeRepository(db)
-    return WaterIntakeUseCases(repo)
+    activity_repository = DailyActivityRepository(db)
+    return WaterIntakeUseCases(repo, activity_repository, UserRepository(db))
 
 @router.post("", status_code=status.HTTP_201_CREATED)
 async def log_water_intake(
     request: LogWaterRequest,
     user_id: str = Depends(get_current_user_id),
     use_cases: WaterIntakeUseCases = Depends(get_water_intake_use_cases),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
-    await use_cases.log_water(user_id, request.amount_ml)
-    return {"message": "Water intake logged successfully"}
\ No newline at end of file
+    async def log():
+        await use_cases.log_water(user_id, request.amount_ml)
+        return {"message": "Water intake logged successfully"}
+
+    return await idempotency.run(log, status.HTTP_201_CREATED)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, status
 from ..schemas.weight_history_schemas import LogWeightRequest
-from ..dependencies import get_current_user_id
+from ..dependencies import get_current_user_id, get_idempotency, Idempotency
 from ...core.database import get_database
 from ...infrastructure.repositories.weight_history_repository import WeightHistoryRepository
 from ...infrastructure.repositories.user_repository import UserRepository
@@ -19,6 +19,10 @@ async def log_weight(
     request: LogWeightRequest,
     user_id: str = Depends(get_current_user_id),
     use_cases: WeightHistoryUseCases = Depends(get_weight_history_use_cases),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
-    await use_cases.log_weight(user_id, request.weight)
-    return {"message": "Weight logged successfully"}
\ No newline at end of file
+    async def log():
+        await use_cases.log_weight(user_id, request.weight)
+        return {"message": "Weight logged successfully"}
+
+    return await idempotency.run(log, status.HTTP_201_CREATED)
\ No newline at end of file
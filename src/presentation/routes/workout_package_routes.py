@@ -1,16 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi.responses import JSONResponse
+from typing import List, Literal, Optional
 from ..schemas.workout_package_schemas import (
     CreatePackageRequest,
     UpdatePackageRequest,
     PackageResponse,
 )
-from ..dependencies import get_current_user_id
+from ..dependencies import (
+    get_current_user_id,
+    get_ids_query,
+    fields_query,
+    get_idempotency,
+    Idempotency,
+)
 from ...core.database import get_database
 from ...infrastructure.repositories.workout_package_repository import (
     WorkoutPackageRepository,
 )
-from ...application.use_cases.workout_package_use_cases import WorkoutPackageUseCases
+from ...infrastructure.repositories.exercise_repository import ExerciseRepository
+from ...infrastructure.repositories.sync_tombstone_repository import (
+    SyncTombstoneRepository,
+)
+from ...application.use_cases.workout_package_use_cases import (
+    WorkoutPackageUseCases,
+    PACKAGE_FIELDS,
+)
+from ...domain.exceptions import VersionConflictError
 
 router = APIRouter(prefix="/packages", tags=["Workout Packages"])
 
@@ -18,7 +33,16 @@ router = APIRouter(prefix="/packages", tags=["Workout Packages"])
 def get_package_use_cases() -> WorkoutPackageUseCases:
     db = get_database()
     package_repository = WorkoutPackageRepository(db)
-    return WorkoutPackageUseCases(package_repository)
+    exercise_repository = ExerciseRepository(db)
+    tombstone_repository = SyncTombstoneRepository(db)
+    return WorkoutPackageUseCases(package_repository, exercise_repository, tombstone_repository)
+
+
+def _sparse_response(content, fields: Optional[List[str]]):
+    """Partial packages do not satisfy PackageResponse, so skip response validation"""
+    if fields:
+        return JSONResponse(content=content)
+    return content
 
 
 @router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
@@ -26,50 +50,69 @@ async def create_package(
     request: CreatePackageRequest,
     user_id: str = Depends(get_current_user_id),
     package_use_cases: WorkoutPackageUseCases = Depends(get_package_use_cases),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
     """Create a new workout package"""
-    exercises = [ex.model_dump() for ex in request.exercises]
-    package_id = await package_use_cases.create_package(
-        user_id=user_id,
-        name=request.name,
-        description=request.description,
-        exercises=exercises,
-        is_public=request.is_public,
-    )
-    return {"id": package_id, "message": "Package created successfully"}
+    async def create():
+        exercises = [ex.model_dump() for ex in request.exercises]
+        package_id = await package_use_cases.create_package(
+            user_id=user_id,
+            name=request.name,
+            description=request.description,
+            exercises=exercises,
+            is_public=request.is_public,
+        )
+        return {"id": package_id, "message": "Package created successfully"}
+
+    return await idempotency.run(create, status.HTTP_201_CREATED)
 
 
 @router.get("", response_model=List[PackageResponse])
 async def get_user_packages(
+    ids: Optional[List[str]] = Depends(get_ids_query),
+    expand: Optional[Literal["exercises"]] = None,
+    fields: Optional[List[str]] = Depends(fields_query(PACKAGE_FIELDS)),
     user_id: str = Depends(get_current_user_id),
     package_use_cases: WorkoutPackageUseCases = Depends(get_package_use_cases),
 ):
-    """Get all packages for current user"""
-    packages = await package_use_cases.get_user_packages(user_id)
-    return packages
+    """Get all packages for current user, or several own or public packages by ID"""
+    expand_exercises = expand == "exercises"
+    if ids is not None:
+        packages = await package_use_cases.get_packages_by_ids(
+            ids, user_id, expand_exercises, fields
+        )
+    else:
+        packages = await package_use_cases.get_user_packages(user_id, expand_exercises, fields)
+    return _sparse_response(packages, fields)
 
 
 @router.get("/public", response_model=List[PackageResponse])
 async def get_public_packages(
+    expand: Optional[Literal["exercises"]] = None,
+    fields: Optional[List[str]] = Depends(fields_query(PACKAGE_FIELDS)),
     user_id: str = Depends(get_current_user_id),
     package_use_cases: WorkoutPackageUseCases = Depends(get_package_use_cases),
 ):
     """Get all public packages"""
-    packages = await package_use_cases.get_public_packages()
-    return packages
+    packages = await package_use_cases.get_public_packages(expand == "exercises", fields)
+    return _sparse_response(packages, fields)
 
 
 @router.get("/{package_id}", response_model=PackageResponse)
 async def get_package(
     package_id: str,
+    expand: Optional[Literal["exercises"]] = None,
+    fields: Optional[List[str]] = Depends(fields_query(PACKAGE_FIELDS)),
     user_id: str = Depends(get_current_user_id),
     package_use_cases: WorkoutPackageUseCases = Depends(get_package_use_cases),
 ):
     """Get package by ID"""
-    package = await package_use_cases.get_package_by_id(package_id)
+    package = await package_use_cases.get_package_by_id(
+        package_id, expand == "exercises", fields
+    )
     if not package:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Package not found")
-    return package
+    return _sparse_response(package, fields)
 
 
 @router.put("/{package_id}", response_model=dict)
@@ -82,15 +125,21 @@ async def update_package(
     """Update a workout package"""
     try:
         exercises = [ex.model_dump() for ex in request.exercises]
-        await package_use_cases.update_package(
+        version = await package_use_cases.update_package(
             package_id=package_id,
             user_id=user_id,
             name=request.name,
             description=request.description,
             exercises=exercises,
             is_public=request.is_public,
+            expected_version=request.version,
+        )
+        return {"message": "Package updated successfully", "version": version}
+    except VersionConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "current_version": e.current_version},
         )
-        return {"message": "Package updated successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
@@ -114,10 +163,14 @@ async def copy_package(
     package_id: str,
     user_id: str = Depends(get_current_user_id),
     package_use_cases: WorkoutPackageUseCases = Depends(get_package_use_cases),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
     """Copy a public package to user's account"""
-    try:
-        new_package_id = await package_use_cases.copy_package(package_id, user_id)
-        return {"id": new_package_id, "message": "Package copied successfully"}
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    async def copy():
+        try:
+            new_package_id = await package_use_cases.copy_package(package_id, user_id)
+            return {"id": new_package_id, "message": "Package copied successfully"}
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+    return await idempotency.run(copy, status.HTTP_201_CREATED)
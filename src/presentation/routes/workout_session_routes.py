@@ -1,13 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi.responses import JSONResponse
+from typing import List, Optional, Union
 from datetime import datetime
 
 from ..schemas.workout_session_schemas import (
     StartSessionRequest,
     UpdateSessionRequest,
     SessionResponse,
+    ExerciseLogData,
+    UpdateExerciseNotesRequest,
+    StrengthSetData,
+    CardioSetData,
+    ExerciseFragmentResponse,
+    SetFragmentResponse,
+)
+from ..dependencies import (
+    get_current_user_id,
+    get_ids_query,
+    fields_query,
+    get_idempotency,
+    Idempotency,
 )
-from ..dependencies import get_current_user_id
 from ...core.database import get_database
 from ...infrastructure.repositories.workout_session_repository import (
     WorkoutSessionRepository,
@@ -16,8 +29,33 @@ from ...infrastructure.repositories.workout_package_repository import (
     WorkoutPackageRepository,
 )
 from ...infrastructure.repositories.exercise_repository import ExerciseRepository
-from ...application.use_cases.workout_session_use_cases import WorkoutSessionUseCases
+from ...application.use_cases.workout_session_use_cases import (
+    WorkoutSessionUseCases,
+    SESSION_FIELDS,
+)
+from ...domain.exceptions import VersionConflictError
 from ...infrastructure.repositories.user_repository import UserRepository
+from ...infrastructure.repositories.group_membership_repository import (
+    GroupMembershipRepository,
+)
+from ...infrastructure.repositories.daily_activity_repository import (
+    DailyActivityRepository,
+)
+from ...infrastructure.repositories.calendar_snapshot_repository import (
+    CalendarSnapshotRepository,
+)
+from ...infrastructure.repositories.sync_tombstone_repository import (
+    SyncTombstoneRepository,
+)
+from ...infrastructure.repositories.personal_record_repository import (
+    PersonalRecordRepository,
+)
+from ...infrastructure.repositories.activity_year_repository import (
+    ActivityYearRepository,
+)
+from ...infrastructure.repositories.muscle_volume_repository import (
+    MuscleVolumeRepository,
+)
 
 router = APIRouter(prefix="/sessions", tags=["Workout Sessions"])
 
@@ -28,8 +66,18 @@ def get_session_use_cases() -> WorkoutSessionUseCases:
     package_repository = WorkoutPackageRepository(db)
     exercise_repository = ExerciseRepository(db)
     user_repository = UserRepository(db) 
+    membership_repository = GroupMembershipRepository(db)
+    activity_repository = DailyActivityRepository(db)
+    snapshot_repository = CalendarSnapshotRepository(db)
+    tombstone_repository = SyncTombstoneRepository(db)
+    record_repository = PersonalRecordRepository(db)
+    activity_year_repository = ActivityYearRepository(db)
+    muscle_volume_repository = MuscleVolumeRepository(db)
     return WorkoutSessionUseCases(
-        session_repository, package_repository, exercise_repository, user_repository 
+        session_repository, package_repository, exercise_repository, user_repository,
+        membership_repository, activity_repository, snapshot_repository,
+        tombstone_repository, record_repository, activity_year_repository,
+        muscle_volume_repository,
     )
 
 
@@ -38,24 +86,32 @@ async def start_session(
     request: StartSessionRequest,
     user_id: str = Depends(get_current_user_id),
     session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
     """Start a new workout session"""
-    try:
-        session_id = await session_use_cases.start_session(user_id, request.package_id)
-        return {"id": session_id, "message": "Session started successfully"}
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    async def start():
+        try:
+            session_id = await session_use_cases.start_session(user_id, request.package_id)
+            return {"id": session_id, "message": "Session started successfully"}
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return await idempotency.run(start, status.HTTP_201_CREATED)
 
 
 @router.get("", response_model=List[dict])
 async def get_sessions(
     limit: int = Query(50, ge=1, le=100),
     skip: int = Query(0, ge=0),
+    ids: Optional[List[str]] = Depends(get_ids_query),
+    fields: Optional[List[str]] = Depends(fields_query(SESSION_FIELDS)),
     user_id: str = Depends(get_current_user_id),
     session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
 ):
-    """Get all sessions for current user"""
-    sessions = await session_use_cases.get_user_sessions(user_id, limit, skip)
+    """Get all sessions for current user, or several full sessions by ID"""
+    if ids is not None:
+        return await session_use_cases.get_sessions_by_ids(ids, user_id, fields)
+    sessions = await session_use_cases.get_user_sessions(user_id, limit, skip, fields)
     return sessions
 
 @router.get("/all", response_model=List[dict])
@@ -70,15 +126,19 @@ async def get_all_sessions(
 @router.get("/{session_id}", response_model=SessionResponse)
 async def get_session(
     session_id: str,
+    fields: Optional[List[str]] = Depends(fields_query(SESSION_FIELDS)),
     user_id: str = Depends(get_current_user_id),
     session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
 ):
     """Get session by ID"""
-    session = await session_use_cases.get_session(session_id, user_id)
+    session = await session_use_cases.get_session(session_id, user_id, fields)
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Session not found"
         )
+    if fields:
+        # Partial sessions do not satisfy SessionResponse
+        return JSONResponse(content=session)
     return session
 
 
@@ -91,28 +151,147 @@ async def update_session(
 ):
     """Update session with exercise data"""
     try:
-        await session_use_cases.update_session(
-            session_id, user_id, request.exercises
+        version = await session_use_cases.update_session(
+            session_id, user_id, request.exercises, request.version
+        )
+        return {"message": "Session updated successfully", "version": version}
+    except VersionConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "current_version": e.current_version},
         )
-        return {"message": "Session updated successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
 
-@router.post("/{session_id}/complete", response_model=dict)
-async def complete_session(
+@router.post("/{session_id}/exercises", response_model=ExerciseFragmentResponse, status_code=status.HTTP_201_CREATED)
+async def add_exercise(
     session_id: str,
+    request: ExerciseLogData,
     user_id: str = Depends(get_current_user_id),
     session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
-    """Complete a workout session"""
+    """Append a single exercise to a session"""
+    async def add():
+        try:
+            return await session_use_cases.add_exercise(session_id, user_id, request.model_dump())
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+    return await idempotency.run(add, status.HTTP_201_CREATED)
+
+
+@router.patch("/{session_id}/exercises/{exercise_id}", response_model=dict)
+async def update_exercise_notes(
+    session_id: str,
+    exercise_id: str,
+    request: UpdateExerciseNotesRequest,
+    user_id: str = Depends(get_current_user_id),
+    session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
+):
+    """Update the notes of a single exercise in a session"""
+    try:
+        return await session_use_cases.update_exercise_notes(
+            session_id, user_id, exercise_id, request.notes
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+
+@router.delete("/{session_id}/exercises/{exercise_id}", response_model=dict)
+async def remove_exercise(
+    session_id: str,
+    exercise_id: str,
+    user_id: str = Depends(get_current_user_id),
+    session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
+):
+    """Remove a single exercise from a session"""
     try:
-        await session_use_cases.complete_session(session_id, user_id)
-        return {"message": "Session completed successfully"}
+        await session_use_cases.remove_exercise(session_id, user_id, exercise_id)
+        return {"message": "Exercise removed successfully"}
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
 
+@router.post("/{session_id}/exercises/{exercise_id}/sets", response_model=SetFragmentResponse, status_code=status.HTTP_201_CREATED)
+async def add_set(
+    session_id: str,
+    exercise_id: str,
+    request: Union[StrengthSetData, CardioSetData],
+    user_id: str = Depends(get_current_user_id),
+    session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
+    idempotency: Idempotency = Depends(get_idempotency),
+):
+    """Append a single set to an exercise in a session"""
+    async def add():
+        try:
+            return await session_use_cases.add_set(
+                session_id, user_id, exercise_id, request.model_dump()
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+    return await idempotency.run(add, status.HTTP_201_CREATED)
+
+
+@router.put("/{session_id}/exercises/{exercise_id}/sets/{set_index}", response_model=SetFragmentResponse)
+async def update_set(
+    session_id: str,
+    exercise_id: str,
+    request: Union[StrengthSetData, CardioSetData],
+    set_index: int = Path(..., ge=0),
+    user_id: str = Depends(get_current_user_id),
+    session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
+):
+    """Replace a single set of an exercise in a session"""
+    try:
+        return await session_use_cases.update_set(
+            session_id, user_id, exercise_id, set_index, request.model_dump()
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+
+@router.delete("/{session_id}/exercises/{exercise_id}/sets/{set_index}", response_model=dict)
+async def remove_set(
+    session_id: str,
+    exercise_id: str,
+    set_index: int = Path(..., ge=0),
+    user_id: str = Depends(get_current_user_id),
+    session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
+):
+    """Remove a single set of an exercise in a session"""
+    try:
+        await session_use_cases.remove_set(session_id, user_id, exercise_id, set_index)
+        return {"message": "Set removed successfully"}
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+
+@router.post("/{session_id}/complete", response_model=dict)
+async def complete_session(
+    session_id: str,
+    user_id: str = Depends(get_current_user_id),
+    session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
+    idempotency: Idempotency = Depends(get_idempotency),
+):
+    """Complete a workout session"""
+    async def complete():
+        try:
+            await session_use_cases.complete_session(session_id, user_id)
+            return {"message": "Session completed successfully"}
+        except VersionConflictError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": str(e), "current_version": e.current_version},
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+    return await idempotency.run(complete)
+
+
 @router.delete("/{session_id}", response_model=dict)
 async def delete_session(
     session_id: str,
@@ -130,11 +309,15 @@ async def delete_session(
 async def start_empty_session(
     user_id: str = Depends(get_current_user_id),
     session_use_cases: WorkoutSessionUseCases = Depends(get_session_use_cases),
+    idempotency: Idempotency = Depends(get_idempotency),
 ):
     """Start a new empty workout session"""
-    try:
-        session_id = await session_use_cases.start_empty_session(user_id)
-        return {"id": session_id, "message": "Empty session started successfully"}
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    async def start():
+        try:
+            session_id = await session_use_cases.start_empty_session(user_id)
+            return {"id": session_id, "message": "Empty session started successfully"}
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return await idempotency.run(start, status.HTTP_201_CREATED)
 
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
 class WorkoutStatsResponse(BaseModel):
@@ -7,6 +7,17 @@ class WorkoutStatsResponse(BaseModel):
     total_duration_minutes: int
     average_duration_minutes: float
     workouts_by_day: Dict[str, int]
+    current_streak: int = 0
+    longest_streak: int = 0
+    current_week_streak: int = 0
+    longest_week_streak: int = 0
+
+
+class StreakResponse(BaseModel):
+    current_streak: int
+    longest_streak: int
+    current_week_streak: int
+    longest_week_streak: int
 
 
 class ExerciseProgressionResponse(BaseModel):
@@ -16,5 +27,60 @@ class ExerciseProgressionResponse(BaseModel):
     volume: float
 
 
+class RecordSetResponse(BaseModel):
+    value: float
+    weight: float
+    reps: int
+    session_id: str
+    date: str
+
+
+class PersonalRecordResponse(BaseModel):
+    exercise_id: str
+    exercise_name: str
+    best_weight: Optional[RecordSetResponse] = None
+    best_e1rm: Optional[RecordSetResponse] = None
+    best_volume: Optional[RecordSetResponse] = None
+
+
+class HeatmapResponse(BaseModel):
+    year: int
+    max_level: int
+    levels: str  # one digit per day, January 1st first
+
+
+class MuscleVolumeWeekResponse(BaseModel):
+    week_start: str  # local Monday
+    by_muscle_group: Dict[str, float]
+    by_category: Dict[str, float]
+
+
+class PeriodTotalsResponse(BaseModel):
+    start: str
+    end: str
+    workouts: int
+    volume: float
+    duration_minutes: int
+    calories: float
+    water_ml: int
+
+
+class PeriodComparisonResponse(BaseModel):
+    period: str
+    to_date: bool
+    periods: List[PeriodTotalsResponse]  # current period first
+    change_percent: Dict[str, Optional[float]]  # current vs previous, None when previous is 0
+
+
 class CalendarDataResponse(BaseModel):
     calendar_data: Dict[str, List[Dict]]
+    streak: Optional[StreakResponse] = None
+
+
+class DashboardResponse(BaseModel):
+    stats: Dict
+    calendar_data: Dict[str, List[Dict]]
+    water_stats: Dict[str, int]
+    water_recommendation: Dict
+    weight_progression: List[Dict]
+    today_reminders: List[Dict]
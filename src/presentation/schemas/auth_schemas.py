@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional
 from datetime import date
+from ...core.timezones import is_valid_timezone
 
 
 class RegisterRequest(BaseModel):
@@ -30,6 +31,7 @@ class UserResponse(BaseModel):
     weight: Optional[float] = None
     gender: Optional[str] = None
     birth_date: Optional[date] = None
+    timezone: str = "UTC"
     created_at: str
 
 
@@ -41,6 +43,14 @@ class UpdateUserRequest(BaseModel):
     weight: Optional[float] = None
     gender: Optional[str] = None
     birth_date: Optional[date] = None
+    timezone: Optional[str] = None  # IANA name, e.g. "America/Sao_Paulo"; omitted keeps the current one
+
+    @field_validator("timezone")
+    @classmethod
+    def validate_timezone(cls, v: Optional[str]) -> Optional[str]:
+        if v is not None and not is_valid_timezone(v):
+            raise ValueError("Unknown timezone")
+        return v
 
 
 class ChangePasswordRequest(BaseModel):
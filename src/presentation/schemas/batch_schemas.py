@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Literal
+
+
+class BatchSubRequest(BaseModel):
+    method: Literal["GET"] = "GET"
+    path: str = Field(..., pattern="^/")  # e.g. "/sessions/<id>" or "/exercises?category=legs"
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest] = Field(..., min_length=1)
+
+
+class BatchSubResponse(BaseModel):
+    status: int
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    responses: List[BatchSubResponse]
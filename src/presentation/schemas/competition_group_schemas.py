@@ -25,6 +25,7 @@ class GroupMemberResponse(BaseModel):
     user_id: str
     username: str
     workout_count: int
+    score: float = 0
     joined_at: str
 
 
@@ -35,4 +36,27 @@ class GroupDetailsResponse(BaseModel):
     owner_id: str
     invite_code: str
     members: List[GroupMemberResponse]
+    metric: str = "workouts"
     created_at: str
+    version: int = 0
+
+
+class LeaderboardEntryResponse(BaseModel):
+    rank: int
+    user_id: str
+    username: str
+    workout_count: int
+
+
+class LeaderboardResponse(BaseModel):
+    group_id: str
+    total_members: int
+    entries: List[LeaderboardEntryResponse]
+
+
+class MemberRankResponse(BaseModel):
+    group_id: str
+    user_id: str
+    rank: int
+    workout_count: int
+    total_members: int
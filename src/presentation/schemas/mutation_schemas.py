@@ -0,0 +1,67 @@
+from pydantic import BaseModel, Field
+from typing import Annotated, List, Literal, Optional, Union
+from .workout_session_schemas import StrengthSetData, CardioSetData
+
+
+class MutationOperationBase(BaseModel):
+    key: str = Field(..., min_length=1, max_length=128)  # client-generated, unique per operation
+
+
+class LogWaterOperation(MutationOperationBase):
+    type: Literal["log_water"]
+    amount_ml: int = Field(..., gt=0)
+
+
+class LogWeightOperation(MutationOperationBase):
+    type: Literal["log_weight"]
+    weight: float = Field(..., gt=0)
+
+
+class AddSetOperation(MutationOperationBase):
+    type: Literal["add_set"]
+    session_id: str
+    exercise_id: str
+    set: Union[StrengthSetData, CardioSetData]
+
+
+class UpdateSetOperation(MutationOperationBase):
+    type: Literal["update_set"]
+    session_id: str
+    exercise_id: str
+    set_index: int = Field(..., ge=0)
+    set: Union[StrengthSetData, CardioSetData]
+
+
+class SetReminderCompletionOperation(MutationOperationBase):
+    type: Literal["set_reminder_completion"]
+    reminder_id: str
+    completed: bool  # target state, so replaying the operation is safe
+
+
+MutationOperation = Annotated[
+    Union[
+        LogWaterOperation,
+        LogWeightOperation,
+        AddSetOperation,
+        UpdateSetOperation,
+        SetReminderCompletionOperation,
+    ],
+    Field(discriminator="type"),
+]
+
+
+class MutationBatchRequest(BaseModel):
+    operations: List[MutationOperation] = Field(..., min_length=1)
+
+
+class MutationResult(BaseModel):
+    key: str
+    status: Literal["applied", "error"]
+    id: Optional[str] = None  # created document, for log operations
+    result: Optional[dict] = None  # written set, for set operations
+    error: Optional[str] = None
+    replayed: bool = False  # applied by an earlier upload of the same key
+
+
+class MutationBatchResponse(BaseModel):
+    results: List[MutationResult]
@@ -25,4 +25,5 @@ class ReminderResponse(BaseModel):
     frequency: str
     frequency_details: Optional[Union[List[int], int]] = None
     created_at: str
+    last_completed_date: Optional[str] = None
     completed: Optional[bool] = None # Only relevant for /today endpoint
\ No newline at end of file
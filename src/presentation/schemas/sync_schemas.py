@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+from typing import Dict, List
+
+
+class SyncResponse(BaseModel):
+    token: str  # pass back as ?since= on the next sync
+    full: bool  # True when changes hold every document and local state should be replaced
+    changes: Dict[str, List[Dict]]
+    deleted: Dict[str, List[str]]
@@ -20,6 +20,7 @@ class UpdatePackageRequest(BaseModel):
     description: Optional[str] = None
     exercises: List[ExerciseInPackageRequest]
     is_public: bool = False
+    version: Optional[int] = None
 
 
 class PackageResponse(BaseModel):
@@ -31,3 +32,4 @@ class PackageResponse(BaseModel):
     is_public: bool
     created_at: str
     updated_at: Optional[str] = None
+    version: int = 0
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Union
 
 
@@ -24,13 +24,32 @@ class CardioSetData(BaseModel):
 class ExerciseLogData(BaseModel):
     exercise_id: str
     exercise_name: str
-    type: str
-    sets: List[Union[StrengthSetData, CardioSetData]]
+    type: str = Field(..., pattern="^(strength|cardio)$")
+    sets: List[Union[StrengthSetData, CardioSetData]] = []
     notes: Optional[str] = None
 
 
 class UpdateSessionRequest(BaseModel):
     exercises: List[dict]
+    version: Optional[int] = None
+
+
+class UpdateExerciseNotesRequest(BaseModel):
+    notes: Optional[str] = None
+
+
+class ExerciseFragmentResponse(BaseModel):
+    exercise_id: str
+    exercise_name: str
+    type: str
+    sets: List[dict]
+    notes: Optional[str] = None
+
+
+class SetFragmentResponse(BaseModel):
+    exercise_id: str
+    set_index: int
+    set: dict
 
 
 class SessionResponse(BaseModel):
@@ -44,3 +63,4 @@ class SessionResponse(BaseModel):
     duration_minutes: Optional[int]
     is_completed: bool
     total_calories: Optional[float] = None
+    version: int = 0